@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+
+from config.database import init_db
+from models.order import Order, ArchivedOrder
+from utils.analytics import rebuild_rollups, catalogue_categories
+
+
+async def main(args):
+    """Rebuild sales rollups for a date range (default: all paid orders)"""
+    await init_db()
+    
+    try:
+        start = args.start
+        if start is None:
+            firsts = [
+                await model.get_motor_collection().find_one(
+                    {"isPaid": True, "paidAt": {"$ne": None}},
+                    projection={"paidAt": 1},
+                    sort=[("paidAt", 1)]
+                )
+                for model in (Order, ArchivedOrder)
+            ]
+            firsts = [doc["paidAt"] for doc in firsts if doc]
+            if not firsts:
+                print("No paid orders to backfill")
+                return
+            start = min(firsts)
+        end = args.end or datetime.utcnow()
+        
+        # One day at a time keeps memory flat and lets an interrupted run resume;
+        # the catalogue is read once for the whole run
+        categories = await catalogue_categories()
+        day = start
+        total = 0
+        while day <= end:
+            counted = await rebuild_rollups(day, day, categories)
+            total += counted
+            print(f"{day:%Y-%m-%d}: {counted} orders")
+            day += timedelta(days=1)
+        
+        print(f"✅ Rebuilt rollups from {total} orders")
+        
+    except Exception as error:
+        print(f"❌ Error: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild hourly and daily sales rollups from orders")
+    parser.add_argument("--from", dest="start", type=datetime.fromisoformat, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=datetime.fromisoformat, help="last day (YYYY-MM-DD)")
+    asyncio.run(main(parser.parse_args()))
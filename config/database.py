@@ -9,11 +9,19 @@ async def init_db():
     
     from models.user import User
     from models.product import Product, Review
-    from models.order import Order
+    from models.order import Order, ArchivedOrder
+    from models.idempotency import IdempotencyRecord
+    from models.stock_shard import StockShard
+    from models.sales_rollup import SalesRollup
+    from utils.payment_ids import prepare_payment_id_indexes
+    
+    database = client.get_default_database()
+    # Databases holding orders that share a capture get a plain index instead of failing here
+    await prepare_payment_id_indexes(database, (Order, ArchivedOrder))
     
     await init_beanie(
-        database=client.get_default_database(),
-        document_models=[User, Product, Review, Order]
+        database=database,
+        document_models=[User, Product, Review, Order, ArchivedOrder, IdempotencyRecord, StockShard, SalesRollup]
     )
 
 
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -11,6 +11,65 @@ class Settings(BaseSettings):
     PAYPAL_CLIENT_ID: str
     PAYPAL_APP_SECRET: str
     PAYPAL_API_URL: str = "https://api-m.sandbox.paypal.com"
+    PAYPAL_TOKEN_REFRESH_MARGIN: int = 300
+    PAYPAL_CALL_DEADLINE: float = 15.0
+    PAYPAL_BREAKER_WINDOW: int = 20
+    PAYPAL_BREAKER_FAILURE_RATE: float = 0.5
+    PAYPAL_BREAKER_MIN_CALLS: int = 5
+    PAYPAL_BREAKER_OPEN_SECONDS: float = 30.0
+    PAYPAL_MAX_CONCURRENCY: int = 10
+    PAYPAL_BULKHEAD_WAIT: float = 0.5
+    PAYMENT_VERIFY_QUEUE_SIZE: int = 1000
+    PAYMENT_VERIFY_MAX_ATTEMPTS: int = 5
+    PAYMENT_VERIFY_MAX_BACKOFF: float = 60.0
+    PAYMENT_VERIFY_WORKERS: int = 4
+    PAYMENT_RECONCILE_INTERVAL: float = 60.0
+    PAYMENT_RECONCILE_STALE_SECONDS: float = 300.0
+    PAYMENT_RECONCILE_BATCH_SIZE: int = 500
+    OUTBOUND_CONNECT_TIMEOUT: float = 3.0
+    OUTBOUND_READ_TIMEOUT: float = 10.0
+    OUTBOUND_MAX_CONNECTIONS: int = 20
+    OUTBOUND_MAX_KEEPALIVE: int = 10
+    OUTBOUND_KEEPALIVE_EXPIRY: float = 30.0
+    OUTBOUND_HTTP2: bool = False
+    INVENTORY_RESERVATION_TIMEOUT: int = 1800
+    INVENTORY_SWEEP_INTERVAL: float = 60.0
+    INVENTORY_RELEASE_BATCH_SIZE: int = 500
+    UNPAID_ORDER_TTL: int = 604800
+    UNPAID_ORDER_SWEEP_INTERVAL: float = 3600.0
+    UNPAID_ORDER_BATCH_SIZE: int = 500
+    UNPAID_ORDER_ARCHIVE: bool = True
+    ORDER_ARCHIVE_AFTER_DAYS: int = 180
+    ORDER_ARCHIVE_INTERVAL: float = 21600.0
+    ORDER_ARCHIVE_BATCH_SIZE: int = 500
+    STOCK_SHARD_FOLD_INTERVAL: float = 5.0
+    CHECKOUT_MAX_INFLIGHT_PER_PRODUCT: int = 32
+    CHECKOUT_MAX_QUEUE_PER_PRODUCT: int = 256
+    CHECKOUT_ADMISSION_TIMEOUT: float = 2.0
+    CHECKOUT_SOLD_OUT_TTL: float = 5.0
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LEASE_SECONDS: int = 120
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_CACHE_TTL: float = 600.0
+    ANALYTICS_MAX_BUCKETS: int = 2000
+    ANALYTICS_SNAPSHOT_DIR: str = "analytics_snapshots"
+    ANALYTICS_SNAPSHOT_INTERVAL: float = 3600.0
+    ANALYTICS_SNAPSHOT_BATCH_SIZE: int = 5000
+    PARQUET_EXPORT_DIR: str = "exports/parquet"
+    PARQUET_EXPORT_BATCH_SIZE: int = 5000
+    PARQUET_EXPORT_LAG: float = 60.0
+    PRODUCT_IMPORT_BATCH_SIZE: int = 1000
+    PRODUCT_IMPORT_MAX_ERRORS: int = 1000
+    PRODUCT_CACHE_SIZE: int = 10000
+    PRODUCT_CACHE_TTL: float = 10.0
+    PRODUCT_BATCH_MAX_IDS: int = 100
+    PRICE_TABLE_REFRESH_INTERVAL: float = 300.0
+    PRODUCT_FACET_CACHE_SIZE: int = 1000
+    PRODUCT_FACET_CACHE_TTL: float = 300.0
+    PRODUCT_FACET_LIMIT: int = 50
+    PRODUCT_PRICE_BUCKETS: List[float] = [0, 10, 25, 50, 100, 250, 500, 1000]
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_QUEUE_SIZE: int = 100
     NODE_ENV: str = "development"
     PAGINATION_LIMIT: int = 12
 
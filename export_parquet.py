@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+import sys
+
+from config.database import init_db
+from utils import parquet_export
+
+
+async def main(args):
+    """Append orders changed since the last run to the Parquet datasets"""
+    if not parquet_export.available():
+        print("❌ Error: pyarrow is not installed (pip install pyarrow)")
+        sys.exit(1)
+    
+    await init_db()
+    
+    try:
+        result = await parquet_export.export_orders_parquet(args.output)
+        print(f"Exported {result['orders']} orders and {result['orderItems']} order items "
+              f"changed since {result['since'] or 'the beginning'}")
+        for path in result["files"]:
+            print(f"  {path}")
+        print("✅ Export complete")
+        
+    except Exception as error:
+        print(f"❌ Error: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental Parquet export of orders and order items")
+    parser.add_argument("--output", help="dataset directory (default: PARQUET_EXPORT_DIR)")
+    asyncio.run(main(parser.parse_args()))
@@ -8,6 +8,8 @@ export {
   useMyOrders,
   useOrders,
   useDeliverOrder,
+  useOrderEvents,
+  useAllOrderEvents,
 } from "./useOrderQueries";
 
 export {
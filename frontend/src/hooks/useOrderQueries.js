@@ -1,3 +1,4 @@
+import { useCallback, useEffect } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import axios from 'axios';
 import { BASE_URL, ORDERS_URL, PAYPAL_URL } from '../constants';
@@ -12,7 +13,10 @@ export const useCreateOrder = () => {
   
   return useMutation({
     mutationFn: async (order) => {
-      const { data } = await api.post(ORDERS_URL, order);
+      // One key per checkout attempt so network retries never create a second order
+      const { data } = await api.post(ORDERS_URL, order, {
+        headers: { 'Idempotency-Key': crypto.randomUUID() },
+      });
       return data;
     },
     onSuccess: () => {
@@ -37,11 +41,13 @@ export const usePayOrder = () => {
   
   return useMutation({
     mutationFn: async ({ orderId, details }) => {
-      const { data } = await api.put(`${ORDERS_URL}/${orderId}/pay`, details);
+      const { data } = await api.put(`${ORDERS_URL}/${orderId}/pay`, details, {
+        headers: { 'Idempotency-Key': details.id },
+      });
       return data;
     },
-    onSuccess: (_, variables) => {
-      queryClient.invalidateQueries(['order', variables.orderId]);
+    onSuccess: (order, variables) => {
+      queryClient.setQueryData(['order', variables.orderId], order);
       queryClient.invalidateQueries(['orders']);
     },
   });
@@ -86,9 +92,83 @@ export const useDeliverOrder = () => {
       const { data } = await api.put(`${ORDERS_URL}/${orderId}/deliver`, {});
       return data;
     },
-    onSuccess: (_, orderId) => {
-      queryClient.invalidateQueries(['order', orderId]);
+    onSuccess: (order, orderId) => {
+      queryClient.setQueryData(['order', orderId], order);
       queryClient.invalidateQueries(['orders']);
     },
   });
 };
+
+// Merge a server-sent status event into a cached order
+const applyOrderEvent = (order, event) => {
+  if (!order || order._id !== event.orderId) return order;
+  const updated = { ...order };
+  if (event.isPaid !== undefined) {
+    updated.isPaid = event.isPaid;
+    updated.paidAt = event.paidAt;
+  }
+  if (event.isDelivered !== undefined) {
+    updated.isDelivered = event.isDelivered;
+    updated.deliveredAt = event.deliveredAt;
+  }
+  if (event.verificationStatus !== undefined && order.paymentResult) {
+    updated.paymentResult = {
+      ...order.paymentResult,
+      verification_status: event.verificationStatus,
+    };
+  }
+  return updated;
+};
+
+const ORDER_EVENT_TYPES = ['paid', 'delivered', 'payment_verification'];
+
+const useOrderEventSource = (url, onOrderEvent, onResync, enabled) => {
+  useEffect(() => {
+    if (!enabled) return undefined;
+
+    const source = new EventSource(`${BASE_URL}${url}`, { withCredentials: true });
+    const handleEvent = (message) => onOrderEvent(JSON.parse(message.data));
+
+    ORDER_EVENT_TYPES.forEach((type) => source.addEventListener(type, handleEvent));
+    source.addEventListener('created', onResync);
+    source.addEventListener('resync', onResync);
+
+    return () => source.close();
+  }, [url, onOrderEvent, onResync, enabled]);
+};
+
+// Keep a single order's cache current from its SSE stream
+export const useOrderEvents = (orderId) => {
+  const queryClient = useQueryClient();
+
+  const onOrderEvent = useCallback(
+    (event) =>
+      queryClient.setQueryData(['order', orderId], (order) => applyOrderEvent(order, event)),
+    [queryClient, orderId]
+  );
+  const onResync = useCallback(
+    () => queryClient.invalidateQueries(['order', orderId]),
+    [queryClient, orderId]
+  );
+
+  useOrderEventSource(`${ORDERS_URL}/${orderId}/events`, onOrderEvent, onResync, !!orderId);
+};
+
+// Keep the admin order list current from the all-orders SSE stream
+export const useAllOrderEvents = () => {
+  const queryClient = useQueryClient();
+
+  const onOrderEvent = useCallback(
+    (event) =>
+      queryClient.setQueryData(['orders', 'all'], (orders) =>
+        orders ? orders.map((order) => applyOrderEvent(order, event)) : orders
+      ),
+    [queryClient]
+  );
+  const onResync = useCallback(
+    () => queryClient.invalidateQueries(['orders', 'all']),
+    [queryClient]
+  );
+
+  useOrderEventSource(`${ORDERS_URL}/events`, onOrderEvent, onResync, true);
+};
@@ -11,12 +11,15 @@ import {
   usePayOrder,
   usePayPalClientId,
   useDeliverOrder,
+  useOrderEvents,
 } from "../hooks/useOrderQueries";
 
 const OrderScreen = () => {
   const { id: orderId } = useParams();
 
-  const { data: order, refetch, isLoading, error } = useOrderDetails(orderId);
+  const { data: order, isLoading, error } = useOrderDetails(orderId);
+
+  useOrderEvents(orderId);
 
   const { mutate: payOrder, isLoading: loadingPay } = usePayOrder();
 
@@ -58,7 +61,6 @@ const OrderScreen = () => {
         { orderId, details },
         {
           onSuccess: () => {
-            refetch();
             toast.success("Order is paid");
           },
           onError: (err) => {
@@ -90,7 +92,6 @@ const OrderScreen = () => {
   const deliverHandler = async () => {
     deliverOrder(orderId, {
       onSuccess: () => {
-        refetch();
         toast.success("Order delivered");
       },
       onError: (err) => {
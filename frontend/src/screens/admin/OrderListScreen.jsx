@@ -2,12 +2,14 @@ import { Table, Button } from 'react-bootstrap';
 import { FaTimes } from 'react-icons/fa';
 import Message from '../../components/Message';
 import Loader from '../../components/Loader';
-import { useOrders } from '../../hooks/useOrderQueries';
+import { useOrders, useAllOrderEvents } from '../../hooks/useOrderQueries';
 import { Link } from 'react-router-dom';
 
 const OrderListScreen = () => {
   const { data: orders, isLoading, error } = useOrders();
 
+  useAllOrderEvents();
+
   return (
     <>
       <h1>Orders</h1>
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import sys
+
+from config.database import init_db
+from models.user import User
+from utils.product_import import import_products, detect_format
+
+
+async def main(args):
+    """Import a supplier catalog file, creating or updating products by SKU"""
+    await init_db()
+    
+    try:
+        admin = await User.find_one(User.is_admin == True)  # noqa: E712
+        if admin is None:
+            print("❌ Error: no admin user to own the imported products")
+            sys.exit(1)
+        
+        with open(args.path, "rb") as f:
+            report = await import_products(f, args.format or detect_format(args.path), admin.id)
+        
+        print(f"Read {report['rows']} rows: {report['inserted']} inserted, {report['updated']} updated, "
+              f"{report['unchanged']} unchanged, {report['duplicates']} duplicate SKUs, {report['failed']} failed")
+        for error in report["errors"]:
+            print(f"  line {error['line']} ({error['sku'] or '-'}): {error['error']}")
+        if report["errorsTruncated"]:
+            print("  ... more errors not shown")
+        print("✅ Import complete")
+        
+    except Exception as error:
+        print(f"❌ Error: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import products from NDJSON or CSV, keyed by SKU")
+    parser.add_argument("path", help="catalog file (.ndjson, .jsonl or .csv)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="override detection by file extension")
+    asyncio.run(main(parser.parse_args()))
@@ -7,7 +7,18 @@ from pathlib import Path
 
 from config.database import init_db, close_db
 from config.settings import settings
-from routers import users_router, products_router, orders_router, upload_router
+from utils.http_client import start_http_client, close_http_client
+from utils.metrics import outbound_metrics
+from utils.paypal import paypal_health
+from utils.inventory import start_reservation_sweeper, stop_reservation_sweeper
+from utils.stock_shards import start_shard_fold_back, stop_shard_fold_back
+from utils.order_expiry import start_order_expiry, stop_order_expiry
+from utils.order_archive import start_order_archiver, stop_order_archiver
+from utils.columnar_analytics import start_columnar_snapshots, stop_columnar_snapshots
+from utils.payment_verification import (
+    start_verification_workers, stop_verification_workers, verification_queue_depth
+)
+from routers import users_router, products_router, orders_router, upload_router, analytics_router, export_router, cart_router
 
 
 @asynccontextmanager
@@ -15,8 +26,22 @@ async def lifespan(app: FastAPI):
     """Lifecycle handler for startup and shutdown"""
     # Startup
     await init_db()
+    await start_http_client()
+    await start_verification_workers()
+    await start_reservation_sweeper()
+    await start_shard_fold_back()
+    await start_order_expiry()
+    await start_order_archiver()
+    await start_columnar_snapshots()
     yield
     # Shutdown
+    await stop_columnar_snapshots()
+    await stop_order_archiver()
+    await stop_order_expiry()
+    await stop_shard_fold_back()
+    await stop_reservation_sweeper()
+    await stop_verification_workers()
+    await close_http_client()
     await close_db()
 
 
@@ -46,6 +71,9 @@ app.include_router(users_router)
 app.include_router(products_router)
 app.include_router(orders_router)
 app.include_router(upload_router)
+app.include_router(analytics_router)
+app.include_router(export_router)
+app.include_router(cart_router)
 
 
 @app.get("/")
@@ -60,6 +88,16 @@ async def health_check():
     return {"status": "healthy", "message": "API is running"}
 
 
+@app.get("/api/health/outbound")
+async def outbound_health():
+    """Latency metrics and circuit state for outbound API calls"""
+    return {
+        "calls": outbound_metrics(),
+        "paypal": paypal_health(),
+        "pendingVerifications": verification_queue_depth()
+    }
+
+
 @app.get("/api/config/paypal")
 async def get_paypal_config():
     """Get PayPal client ID"""
@@ -1,10 +1,26 @@
 from fastapi import Depends, HTTPException, status, Request
 from jose import JWTError, jwt
+from bson import ObjectId
+from bson.errors import InvalidId
 from models.user import User
 from config.settings import settings
 from typing import Optional
 
 
+async def _load_user(user_id: str) -> Optional[User]:
+    """
+    Load a user without Beanie's saved-state copy
+
+    Handlers only read the current user (their writes go through
+    update_fields), so there is no change tracking to pay for.
+    """
+    try:
+        doc = await User.get_motor_collection().find_one({"_id": ObjectId(user_id)})
+    except (InvalidId, TypeError):
+        return None
+    return User.model_validate(doc) if doc else None
+
+
 async def get_current_user(request: Request) -> User:
     """
     Dependency to get current authenticated user from JWT cookie
@@ -36,7 +52,7 @@ async def get_current_user(request: Request) -> User:
             detail="Not authorized, token failed",
         )
     
-    user = await User.get(user_id)
+    user = await _load_user(user_id)
     
     if user is None:
         raise credentials_exception
@@ -76,7 +92,7 @@ async def get_current_user_optional(request: Request) -> Optional[User]:
         if user_id is None:
             return None
             
-        user = await User.get(user_id)
+        user = await _load_user(user_id)
         return user
         
     except JWTError:
@@ -1,5 +1,11 @@
 from .user import User
 from .product import Product, Review
-from .order import Order, OrderItem, ShippingAddress, PaymentResult
+from .order import Order, ArchivedOrder, OrderItem, ShippingAddress, PaymentResult
+from .idempotency import IdempotencyRecord
+from .stock_shard import StockShard
+from .sales_rollup import SalesRollup
 
-__all__ = ["User", "Product", "Review", "Order", "OrderItem", "ShippingAddress", "PaymentResult"]
+__all__ = [
+    "User", "Product", "Review", "Order", "ArchivedOrder", "OrderItem", "ShippingAddress", "PaymentResult",
+    "IdempotencyRecord", "StockShard", "SalesRollup"
+]
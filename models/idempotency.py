@@ -0,0 +1,30 @@
+from beanie import Document
+from pydantic import Field, ConfigDict
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime
+from typing import Any, Optional
+from config.settings import settings
+
+
+class IdempotencyRecord(Document):
+    key: str
+    fingerprint: str
+    state: str = "in_progress"
+    status_code: Optional[int] = Field(None, alias="statusCode")
+    response: Optional[Any] = None
+    lease_id: Optional[str] = Field(None, alias="leaseId")
+    locked_until: Optional[datetime] = Field(None, alias="lockedUntil")
+    created_at: datetime = Field(default_factory=datetime.utcnow, alias="createdAt")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    class Settings:
+        name = "idempotency_keys"
+        indexes = [
+            IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+            IndexModel(
+                [("createdAt", ASCENDING)],
+                name="createdAt_ttl",
+                expireAfterSeconds=settings.IDEMPOTENCY_TTL_SECONDS
+            ),
+        ]
@@ -1,4 +1,5 @@
 from beanie import Document, PydanticObjectId
+from pymongo import IndexModel, ASCENDING
 from pydantic import Field, ConfigDict, BaseModel
 from datetime import datetime
 from typing import List, Optional
@@ -18,6 +19,8 @@ class PaymentResult(BaseModel):
     status: Optional[str] = None
     update_time: Optional[str] = Field(None, alias="update_time")
     email_address: Optional[str] = Field(None, alias="email_address")
+    verification_status: Optional[str] = None
+    verification_queued_at: Optional[datetime] = None
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -46,6 +49,7 @@ class Order(Document):
     paid_at: Optional[datetime] = Field(None, alias="paidAt")
     is_delivered: bool = Field(default=False, alias="isDelivered")
     delivered_at: Optional[datetime] = Field(None, alias="deliveredAt")
+    stock_reserved: bool = Field(default=False, alias="stockReserved")
     created_at: datetime = Field(default_factory=datetime.utcnow, alias="createdAt")
     updated_at: datetime = Field(default_factory=datetime.utcnow, alias="updatedAt")
 
@@ -54,8 +58,69 @@ class Order(Document):
     class Settings:
         name = "orders"
         use_state_management = True
+        indexes = [
+            IndexModel(
+                [("paymentResult.id", ASCENDING)],
+                name="paymentResult_id_unique",
+                unique=True,
+                partialFilterExpression={"paymentResult.id": {"$type": "string"}}
+            ),
+            IndexModel(
+                [("paymentResult.verification_queued_at", ASCENDING)],
+                name="pending_verification_queued_at",
+                partialFilterExpression={"paymentResult.verification_status": "pending"}
+            ),
+            IndexModel(
+                [("createdAt", ASCENDING)],
+                name="unpaid_reservations",
+                partialFilterExpression={"isPaid": False, "stockReserved": True}
+            ),
+            IndexModel(
+                [("isPaid", ASCENDING), ("createdAt", ASCENDING)],
+                name="isPaid_createdAt"
+            ),
+            IndexModel(
+                [("user", ASCENDING), ("createdAt", ASCENDING), ("_id", ASCENDING)],
+                name="user_createdAt"
+            ),
+            IndexModel(
+                [("paidAt", ASCENDING)],
+                name="paid_paidAt",
+                partialFilterExpression={"isPaid": True}
+            ),
+            IndexModel([("updatedAt", ASCENDING)], name="updatedAt"),
+            IndexModel(
+                [("deliveredAt", ASCENDING)],
+                name="delivered_archivable",
+                partialFilterExpression={"isDelivered": True}
+            ),
+        ]
 
     async def save(self, *args, **kwargs):
         """Update timestamp on save"""
         self.updated_at = datetime.utcnow()
         return await super().save(*args, **kwargs)
+
+
+class ArchivedOrder(Order):
+    """Delivered order moved to cold storage (see utils.order_archive)"""
+
+    class Settings:
+        name = "orders_archive"
+        indexes = [
+            IndexModel(
+                [("paymentResult.id", ASCENDING)],
+                name="paymentResult_id_unique",
+                unique=True,
+                partialFilterExpression={"paymentResult.id": {"$type": "string"}}
+            ),
+            IndexModel(
+                [("user", ASCENDING), ("createdAt", ASCENDING), ("_id", ASCENDING)],
+                name="user_createdAt"
+            ),
+            IndexModel(
+                [("paidAt", ASCENDING)],
+                name="paid_paidAt",
+                partialFilterExpression={"isPaid": True}
+            ),
+        ]
@@ -1,4 +1,5 @@
 from beanie import Document, PydanticObjectId, Link
+from pymongo import IndexModel, ASCENDING
 from pydantic import Field, ConfigDict
 from datetime import datetime
 from typing import List, Optional
@@ -30,6 +31,8 @@ class Product(Document):
     num_reviews: int = Field(default=0, alias="numReviews")
     price: float = Field(ge=0)
     count_in_stock: int = Field(default=0, alias="countInStock")
+    stock_shards: int = Field(default=0, alias="stockShards")
+    sku: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow, alias="createdAt")
     updated_at: datetime = Field(default_factory=datetime.utcnow, alias="updatedAt")
 
@@ -51,6 +54,44 @@ class Product(Document):
     class Settings:
         name = "products"
         use_state_management = True
+        indexes = [
+            IndexModel(
+                [("sku", ASCENDING)],
+                name="sku_unique",
+                unique=True,
+                partialFilterExpression={"sku": {"$type": "string"}}
+            ),
+            # Catalog filters: category (+ brand) with a price range, and
+            # brand with a price range
+            IndexModel(
+                [("category", ASCENDING), ("brand", ASCENDING), ("price", ASCENDING)],
+                name="category_brand_price"
+            ),
+            IndexModel([("brand", ASCENDING), ("price", ASCENDING)], name="brand_price"),
+            # Listing sorts (utils.catalog.SORTS), with and without a category
+            # filter; _id breaks ties so cursors are stable, and the descending
+            # sorts walk the same indexes backwards
+            IndexModel([("price", ASCENDING), ("_id", ASCENDING)], name="price_id"),
+            IndexModel(
+                [("category", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)],
+                name="category_price_id"
+            ),
+            IndexModel([("rating", ASCENDING), ("_id", ASCENDING)], name="rating_id"),
+            IndexModel(
+                [("category", ASCENDING), ("rating", ASCENDING), ("_id", ASCENDING)],
+                name="category_rating_id"
+            ),
+            IndexModel([("createdAt", ASCENDING), ("_id", ASCENDING)], name="createdAt_id"),
+            IndexModel(
+                [("category", ASCENDING), ("createdAt", ASCENDING), ("_id", ASCENDING)],
+                name="category_createdAt_id"
+            ),
+            IndexModel([("numReviews", ASCENDING), ("_id", ASCENDING)], name="numReviews_id"),
+            IndexModel(
+                [("category", ASCENDING), ("numReviews", ASCENDING), ("_id", ASCENDING)],
+                name="category_numReviews_id"
+            ),
+        ]
 
     async def save(self, *args, **kwargs):
         """Update timestamp on save"""
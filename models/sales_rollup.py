@@ -0,0 +1,28 @@
+from beanie import Document
+from pydantic import Field, ConfigDict
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime
+from typing import Dict
+
+
+class SalesRollup(Document):
+    granularity: str
+    bucket: datetime
+    revenue: float = 0.0
+    items_revenue: float = Field(default=0.0, alias="itemsRevenue")
+    orders: int = 0
+    units: int = 0
+    products: Dict[str, Dict[str, float]] = Field(default_factory=dict)
+    categories: Dict[str, Dict[str, float]] = Field(default_factory=dict)
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    class Settings:
+        name = "sales_rollups"
+        indexes = [
+            IndexModel(
+                [("granularity", ASCENDING), ("bucket", ASCENDING)],
+                name="granularity_bucket_unique",
+                unique=True
+            ),
+        ]
@@ -0,0 +1,18 @@
+from beanie import Document, PydanticObjectId
+from pymongo import IndexModel, ASCENDING
+
+
+class StockShard(Document):
+    product: PydanticObjectId
+    shard: int
+    stock: int = 0
+
+    class Settings:
+        name = "stock_shards"
+        indexes = [
+            IndexModel(
+                [("product", ASCENDING), ("shard", ASCENDING)],
+                name="product_shard_unique",
+                unique=True
+            ),
+        ]
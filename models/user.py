@@ -33,9 +33,14 @@ class User(Document):
         """Verify password against hash"""
         return bcrypt.checkpw(plain_password.encode('utf-8'), self.password.encode('utf-8'))
 
+    @staticmethod
+    def hash_plain_password(password: str) -> str:
+        """bcrypt hash of a plain-text password"""
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
     def hash_password(self):
         """Hash the password before saving"""
-        self.password = bcrypt.hashpw(self.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password = self.hash_plain_password(self.password)
 
     async def save(self, *args, **kwargs):
         """Override save to hash password if modified"""
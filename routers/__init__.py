@@ -2,5 +2,11 @@ from .users import router as users_router
 from .products import router as products_router
 from .orders import router as orders_router
 from .upload import router as upload_router
+from .analytics import router as analytics_router
+from .export import router as export_router
+from .cart import router as cart_router
 
-__all__ = ["users_router", "products_router", "orders_router", "upload_router"]
+__all__ = [
+    "users_router", "products_router", "orders_router", "upload_router", "analytics_router", "export_router",
+    "cart_router"
+]
@@ -0,0 +1,116 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from models.user import User
+from middleware.auth import require_admin
+from config.settings import settings
+from utils.analytics import sales_report, bucket_start, bucket_step
+from utils import columnar_analytics
+from typing import Optional
+from datetime import datetime, timedelta
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+
+@router.get("/sales")
+async def get_sales(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    admin_user: User = Depends(require_admin)
+):
+    """Revenue, orders and units per hour or day from the sales rollups (Admin only)"""
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    
+    if start.tzinfo is not None:
+        start = start.replace(tzinfo=None) - start.utcoffset()
+    if end.tzinfo is not None:
+        end = end.replace(tzinfo=None) - end.utcoffset()
+    
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be before 'to'"
+        )
+    
+    buckets = (end - bucket_start(start, granularity)) / bucket_step(granularity)
+    if buckets > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too large for {granularity} granularity; use a coarser granularity or a shorter range"
+        )
+    
+    return await sales_report(start, end, granularity)
+
+
+def _require_snapshot():
+    snapshot = columnar_analytics.current_snapshot()
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Order snapshot is still being built",
+            headers={"Retry-After": "30"}
+        )
+    return snapshot
+
+
+@router.get("/snapshot")
+async def get_snapshot_status(admin_user: User = Depends(require_admin)):
+    """Size and age of the columnar order snapshot (Admin only)"""
+    return _require_snapshot().describe()
+
+
+@router.post("/snapshot")
+async def rebuild_snapshot(admin_user: User = Depends(require_admin)):
+    """Rebuild the columnar order snapshot now (Admin only)"""
+    snapshot = await columnar_analytics.refresh_snapshot()
+    return snapshot.describe()
+
+
+@router.get("/order-values")
+async def get_order_values(admin_user: User = Depends(require_admin)):
+    """Order value percentiles from the columnar snapshot (Admin only)"""
+    snapshot = _require_snapshot()
+    return {
+        "snapshot": snapshot.describe(),
+        **await asyncio.to_thread(columnar_analytics.revenue_percentiles, snapshot)
+    }
+
+
+@router.get("/basket-sizes")
+async def get_basket_sizes(
+    cap: int = Query(20, ge=1, le=100),
+    admin_user: User = Depends(require_admin)
+):
+    """Distribution of units and lines per order (Admin only)"""
+    snapshot = _require_snapshot()
+    return {
+        "snapshot": snapshot.describe(),
+        **await asyncio.to_thread(columnar_analytics.basket_sizes, snapshot, cap)
+    }
+
+
+@router.get("/cohorts")
+async def get_cohorts(
+    months: int = Query(12, ge=1, le=60),
+    admin_user: User = Depends(require_admin)
+):
+    """Monthly customer cohorts and how many order again in later months (Admin only)"""
+    snapshot = _require_snapshot()
+    return {
+        "snapshot": snapshot.describe(),
+        "cohorts": await asyncio.to_thread(columnar_analytics.monthly_cohorts, snapshot, months)
+    }
+
+
+@router.get("/top-products")
+async def get_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    admin_user: User = Depends(require_admin)
+):
+    """Products ranked by revenue across all paid orders (Admin only)"""
+    snapshot = _require_snapshot()
+    return {
+        "snapshot": snapshot.describe(),
+        "products": await asyncio.to_thread(columnar_analytics.top_products, snapshot, limit)
+    }
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, status
+from schemas.order import CartQuoteRequest, CartQuoteResponse
+from utils.calc_prices import calc_prices
+from utils.price_table import get_prices
+
+router = APIRouter(prefix="/api/cart", tags=["cart"])
+
+
+@router.post("/quote", response_model=CartQuoteResponse)
+async def quote_cart(cart: CartQuoteRequest):
+    """
+    Price a cart the way order creation will, from the in-memory price table
+    
+    Stock is not checked or reserved; the order itself still is.
+    """
+    prices = await get_prices(item.product for item in cart.cart_items)
+    
+    quoted_items = []
+    for item in cart.cart_items:
+        if item.product not in prices:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product {item.product} not found"
+            )
+        quoted_items.append({"product": item.product, "qty": item.qty, "price": prices[item.product]})
+    
+    return CartQuoteResponse(cartItems=quoted_items, **calc_prices(quoted_items))
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from models.order import Order, ArchivedOrder
+from models.product import Product
+from models.user import User
+from middleware.auth import require_admin
+from utils import parquet_export
+from utils.export import (
+    stream_export, export_headers, media_type, order_row, order_csv_row, flat_row,
+    ORDER_CSV_COLUMNS, PRODUCT_COLUMNS, USER_COLUMNS
+)
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+FORMAT = Query("ndjson", alias="format", pattern="^(csv|ndjson)$")
+GZIP = Query(False, alias="gzip")
+BATCH_SIZE = Query(1000, alias="batchSize", ge=1, le=10000)
+
+
+def _export_response(name, cursors, to_row, export_format, columns, compress, csv_row=None) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(cursors, to_row, export_format, columns, csv_row=csv_row, compress=compress),
+        media_type=media_type(export_format, compress),
+        headers=export_headers(name, export_format, compress)
+    )
+
+
+@router.get("/orders")
+async def export_orders(
+    export_format: str = FORMAT,
+    compress: bool = GZIP,
+    batch_size: int = BATCH_SIZE,
+    include_archived: bool = Query(False, alias="includeArchived"),
+    admin_user: User = Depends(require_admin)
+):
+    """Stream every order as CSV or NDJSON (Admin only)"""
+    models = (Order, ArchivedOrder) if include_archived else (Order,)
+    cursors = (model.get_motor_collection().find({}, batch_size=batch_size).sort("_id", 1) for model in models)
+    return _export_response("orders", cursors, order_row, export_format, ORDER_CSV_COLUMNS, compress, order_csv_row)
+
+
+@router.get("/products")
+async def export_products(
+    export_format: str = FORMAT,
+    compress: bool = GZIP,
+    batch_size: int = BATCH_SIZE,
+    admin_user: User = Depends(require_admin)
+):
+    """Stream every product as CSV or NDJSON (Admin only)"""
+    projection = {column: 1 for column in PRODUCT_COLUMNS}
+    cursor = Product.get_motor_collection().find({}, projection, batch_size=batch_size).sort("_id", 1)
+    return _export_response("products", [cursor], flat_row(PRODUCT_COLUMNS), export_format, PRODUCT_COLUMNS, compress)
+
+
+@router.get("/users")
+async def export_users(
+    export_format: str = FORMAT,
+    compress: bool = GZIP,
+    batch_size: int = BATCH_SIZE,
+    admin_user: User = Depends(require_admin)
+):
+    """Stream every user as CSV or NDJSON, without password hashes (Admin only)"""
+    projection = {column: 1 for column in USER_COLUMNS}
+    cursor = User.get_motor_collection().find({}, projection, batch_size=batch_size).sort("_id", 1)
+    return _export_response("users", [cursor], flat_row(USER_COLUMNS), export_format, USER_COLUMNS, compress)
+
+
+@router.post("/orders/parquet")
+async def export_orders_to_parquet(admin_user: User = Depends(require_admin)):
+    """Append orders changed since the last run to the Parquet datasets (Admin only)"""
+    if not parquet_export.available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Parquet export requires pyarrow to be installed"
+        )
+    return await parquet_export.export_orders_parquet()
@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from models.order import Order, OrderItem, ShippingAddress, PaymentResult
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header, Query
+from fastapi.responses import StreamingResponse
+from models.order import Order, ArchivedOrder, OrderItem, ShippingAddress, PaymentResult
 from models.product import Product
 from models.user import User
 from schemas.order import OrderCreate, OrderPaymentUpdate, OrderResponse
 from middleware.auth import get_current_user, require_admin
 from utils.calc_prices import calc_prices
-from utils.paypal import verify_paypal_payment, check_if_new_transaction
-from utils.order_serializer import serialize_order
-from typing import List
+from config.settings import settings
+from utils.paypal import check_if_new_transaction, remember_transaction
+from utils.payment_verification import enqueue_verification, PENDING
+from utils.order_events import publish_order_event, stream_order_events
+from utils.order_serializer import serialize_order, serialize_order_doc, ORDER_FIELDS
+from utils.idempotency import run_idempotent
+from utils.order_archive import get_order_any_tier, find_user_orders, find_all_orders
+from utils.lean_reads import ORDER_PROJECTION
+from utils.sparse_fields import parse_fields, field_projection, sparse_response
+from utils.analytics import record_paid_order
+from utils.inventory import reserve_stock, release_stock, sharded_products, InsufficientStockError
+from utils.admission import checkout_admission, mark_sold_out, SoldOutError, AdmissionRejectedError
+from typing import List, Optional
 from bson import ObjectId
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/api/orders", tags=["orders"])
 
@@ -17,15 +29,44 @@ router = APIRouter(prefix="/api/orders", tags=["orders"])
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def add_order_items(
     order_data: OrderCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Create new order"""
+    """Create new order; retries with the same Idempotency-Key replay the first response"""
+    return await run_idempotent(
+        idempotency_key,
+        f"{current_user.id}:POST /api/orders",
+        order_data.model_dump(by_alias=True),
+        lambda: _create_order(order_data, current_user),
+        status_code=status.HTTP_201_CREATED
+    )
+
+
+async def _create_order(order_data: OrderCreate, current_user: User) -> dict:
     if not order_data.order_items or len(order_data.order_items) == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No order items"
         )
     
+    try:
+        async with checkout_admission(item.product for item in order_data.order_items):
+            return await _place_order(order_data, current_user)
+    except SoldOutError as e:
+        names = {item.product: item.name for item in order_data.order_items}
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sold out: {', '.join(names.get(pid, pid) for pid in e.product_ids)}"
+        )
+    except AdmissionRejectedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Checkout is busy, please try again",
+            headers={"Retry-After": "1"}
+        )
+
+
+async def _place_order(order_data: OrderCreate, current_user: User) -> dict:
     item_ids = [ObjectId(item.product) for item in order_data.order_items]
     items_from_db = await Product.find({"_id": {"$in": item_ids}}).to_list()
     
@@ -40,6 +81,12 @@ async def add_order_items(
                 detail=f"Product {item_from_client.product} not found"
             )
         
+        if item_from_client.qty < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid quantity for {matching_item.name}"
+            )
+        
         db_order_items.append({
             "name": item_from_client.name,
             "qty": item_from_client.qty,
@@ -74,30 +121,115 @@ async def add_order_items(
         items_price=prices["itemsPrice"],
         tax_price=prices["taxPrice"],
         shipping_price=prices["shippingPrice"],
-        total_price=prices["totalPrice"]
+        total_price=prices["totalPrice"],
+        stock_reserved=True
     )
     
-    await order.save()
+    reservation = [(item["product"], item["qty"]) for item in db_order_items]
+    sharded = {item.id: item.stock_shards for item in items_from_db if item.stock_shards}
+    try:
+        await reserve_stock(reservation, sharded)
+    except InsufficientStockError as e:
+        # A single unit that cannot be reserved means the product is out
+        mark_sold_out(
+            pid for pid in e.product_ids
+            if sum(qty for product, qty in reservation if str(product) == pid) == 1
+        )
+        names = [db_items_map[pid].name for pid in e.product_ids if pid in db_items_map]
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient stock for: {', '.join(names or e.product_ids)}"
+        )
+    
+    try:
+        await order.save()
+    except Exception:
+        await release_stock(reservation, sharded)
+        raise
+    
+    publish_order_event(str(order.id), str(order.user), "created", {
+        "totalPrice": order.total_price
+    })
     
     return serialize_order(order)
 
 
+def _event_stream_response(request: Request, order_id=None) -> StreamingResponse:
+    return StreamingResponse(
+        stream_order_events(request, order_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/mine", response_model=List[OrderResponse])
-async def get_my_orders(current_user: User = Depends(get_current_user)):
-    """Get logged in user orders"""
-    orders = await Order.find(Order.user == current_user.id).to_list()
+async def get_my_orders(
+    current_user: User = Depends(get_current_user),
+    page_number: Optional[int] = Query(None, alias="pageNumber", ge=1),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields, e.g. totalPrice,isPaid,createdAt")
+):
+    """Get logged in user orders, including archived ones; all of them unless a page is asked for"""
+    selected = parse_fields(fields, ORDER_FIELDS)
+    # The tiers are merged on createdAt, so it is always read
+    projection = field_projection(selected, "createdAt") if selected else ORDER_PROJECTION
+    if page_number is None:
+        orders = await find_user_orders(current_user.id, projection=projection)
+    else:
+        page_size = settings.PAGINATION_LIMIT
+        orders = await find_user_orders(
+            current_user.id, page_size * (page_number - 1), page_size, projection
+        )
+    
+    if selected:
+        return sparse_response([serialize_order_doc(order, selected) for order in orders])
     
-    return [OrderResponse(**serialize_order(order)) for order in orders]
+    return [OrderResponse(**serialize_order_doc(order)) for order in orders]
+
+
+@router.get("/events")
+async def stream_all_order_events(
+    request: Request,
+    admin_user: User = Depends(require_admin)
+):
+    """Stream status changes for every order as Server-Sent Events (Admin only)"""
+    return _event_stream_response(request)
+
+
+@router.get("/{order_id}/events")
+async def stream_order_status(
+    order_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream status changes for one order as Server-Sent Events"""
+    try:
+        order = await Order.get_motor_collection().find_one({"_id": ObjectId(order_id)}, projection={"user": 1})
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    if not order or (order["user"] != current_user.id and not current_user.is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    return _event_stream_response(request, order_id)
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order_by_id(
     order_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields, e.g. totalPrice,isPaid,createdAt")
 ):
-    """Get order by ID"""
+    """Get order by ID, falling back to the archive for old delivered orders; ?fields= returns only the listed fields"""
+    selected = parse_fields(fields, ORDER_FIELDS)
     try:
-        order = await Order.get(ObjectId(order_id))
+        projection = field_projection(selected) if selected else ORDER_PROJECTION
+        order = await get_order_any_tier(ObjectId(order_id), projection)
     except:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,16 +242,36 @@ async def get_order_by_id(
             detail="Order not found"
         )
     
-    return OrderResponse(**serialize_order(order))
+    if selected:
+        return sparse_response(serialize_order_doc(order, selected))
+    
+    return OrderResponse(**serialize_order_doc(order))
 
 
-@router.put("/{order_id}/pay", response_model=OrderResponse)
+@router.put("/{order_id}/pay", response_model=OrderResponse, status_code=status.HTTP_202_ACCEPTED)
 async def update_order_to_paid(
     order_id: str,
     payment_data: dict,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Update order to paid"""
+    """
+    Update order to paid
+    
+    Records the client-side capture and returns immediately; the capture is
+    verified against PayPal in the background (see utils.payment_verification).
+    Retries with the same Idempotency-Key replay the first response.
+    """
+    return await run_idempotent(
+        idempotency_key,
+        f"{current_user.id}:PUT /api/orders/{order_id}/pay",
+        payment_data,
+        lambda: _record_payment(order_id, payment_data),
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+async def _record_payment(order_id: str, payment_data: dict) -> OrderResponse:
     payment_id = payment_data.get('id') or payment_data.get('transaction_id') or payment_data.get('paymentID')
     payment_status = payment_data.get('status', 'COMPLETED')
     
@@ -149,7 +301,7 @@ async def update_order_to_paid(
             detail="Order is already paid"
         )
     
-    is_new = await check_if_new_transaction(Order, payment_id)
+    is_new = await check_if_new_transaction((Order, ArchivedOrder), payment_id)
     
     if not is_new:
         raise HTTPException(
@@ -157,18 +309,18 @@ async def update_order_to_paid(
             detail="Transaction has been used before"
         )
     
-    try:
-        payment_info = await verify_paypal_payment(payment_id)
-        
-        if not payment_info["verified"]:
-            payment_info["value"] = str(order.total_price)
-        
-        paid_correct_amount = str(order.total_price) == payment_info["value"]
-        if not paid_correct_amount:
+    retaken = []
+    if not order.stock_reserved:
+        # The reservation expired before payment; take the stock again if it
+        # is still there. The customer has paid either way.
+        reservation = [(item.product, item.qty) for item in order.order_items]
+        sharded = await sharded_products([product for product, _ in reservation])
+        try:
+            await reserve_stock(reservation, sharded)
+            order.stock_reserved = True
+            retaken = reservation
+        except InsufficientStockError:
             pass
-            
-    except Exception as e:
-        pass
     
     # Update order payment status
     order.is_paid = True
@@ -185,22 +337,72 @@ async def update_order_to_paid(
         id=payment_id,
         status=payment_status,
         update_time=update_time,
-        email_address=email
+        email_address=email,
+        verification_status=PENDING,
+        verification_queued_at=order.paid_at
     )
     
+    order.updated_at = order.paid_at
+    
+    orders = Order.get_motor_collection()
     try:
-        await order.save()
+        # A conditional update rather than save(), which upserts: an order
+        # expired since it was read must stay gone (expiry claims it by
+        # deleting it while unpaid), and of two concurrent payments only one
+        # matches
+        result = await orders.update_one(
+            {"_id": order.id, "isPaid": False},
+            {"$set": {
+                "isPaid": True,
+                "paidAt": order.paid_at,
+                "paymentResult": order.payment_result.model_dump(by_alias=True),
+                "stockReserved": order.stock_reserved,
+                "updatedAt": order.updated_at
+            }}
+        )
     except Exception as e:
+        # The payment was not recorded, so stock taken again above goes back
+        if retaken:
+            await release_stock(retaken, sharded)
+        if isinstance(e, DuplicateKeyError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Transaction has been used before"
+            )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update order: {str(e)}"
         )
     
-    updated_order = await Order.get(ObjectId(order_id))
+    if not result.matched_count:
+        if retaken:
+            await release_stock(retaken, sharded)
+        if await orders.find_one({"_id": order.id}, projection={"_id": 1}):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Order is already paid"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
     
-    return OrderResponse(**serialize_order(updated_order))
+    remember_transaction(payment_id)
     
-    return OrderResponse(**serialize_order(updated_order))
+    try:
+        await record_paid_order(order)
+    except Exception:
+        # Rollups are derived data; rebuild_rollups repairs a missed order
+        pass
+    
+    enqueue_verification(order_id, payment_id, order.total_price)
+    publish_order_event(order_id, str(order.user), "paid", {
+        "isPaid": True,
+        "paidAt": order.paid_at.isoformat(),
+        "verificationStatus": PENDING
+    })
+    
+    return OrderResponse(**serialize_order(order))
 
 
 @router.put("/{order_id}/deliver", response_model=OrderResponse)
@@ -208,15 +410,21 @@ async def update_order_to_delivered(
     order_id: str,
     admin_user: User = Depends(require_admin)
 ):
-    """Update order to delivered (Admin only)"""
+    """Update order to delivered (Admin only); archived orders were delivered already and are returned as they are"""
     try:
         order = await Order.get(ObjectId(order_id))
+        archived = None if order else await ArchivedOrder.get_motor_collection().find_one(
+            {"_id": ObjectId(order_id)}, projection=ORDER_PROJECTION
+        )
     except:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
     
+    if archived:
+        return OrderResponse(**serialize_order_doc(archived))
+    
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -228,12 +436,25 @@ async def update_order_to_delivered(
     
     await order.save()
     
+    publish_order_event(order_id, str(order.user), "delivered", {
+        "isDelivered": True,
+        "deliveredAt": order.delivered_at.isoformat()
+    })
+    
     return OrderResponse(**serialize_order(order))
 
 
 @router.get("", response_model=List[OrderResponse])
-async def get_orders(admin_user: User = Depends(require_admin)):
-    """Get all orders (Admin only)"""
-    orders = await Order.find_all().to_list()
+async def get_orders(
+    admin_user: User = Depends(require_admin),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields, e.g. totalPrice,isPaid,createdAt")
+):
+    """Get all orders, archived ones after the rest (Admin only); ?fields= trims each order to the listed fields"""
+    selected = parse_fields(fields, ORDER_FIELDS)
+    if selected:
+        orders = await find_all_orders(field_projection(selected))
+        return sparse_response([serialize_order_doc(order, selected) for order in orders])
+    
+    orders = await find_all_orders(ORDER_PROJECTION)
     
-    return [OrderResponse(**serialize_order(order)) for order in orders]
+    return [OrderResponse(**serialize_order_doc(order)) for order in orders]
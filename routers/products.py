@@ -1,14 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from models.product import Product, Review
 from models.user import User
 from schemas.product import (
-    ProductCreate, ProductUpdate, ReviewCreate,
-    ProductResponse, ProductListResponse, ReviewResponse
+    ProductCreate, ProductUpdate, ReviewCreate, StockShardsUpdate, BulkPriceUpdate, ProductBatchRequest,
+    ProductResponse, ProductListResponse, ReviewResponse, ProductBatchResponse
 )
 from middleware.auth import get_current_user, require_admin
 from config.settings import settings
-from typing import Optional
+from utils.inventory import contention_metrics
+from utils.stock_shards import configure_stock_shards, delete_stock_shards
+from utils.admission import admission_status
+from utils.product_changes import products_changed
+from utils.partial_update import update_fields
+from utils.lean_reads import find_products, get_product, resolve_reviews
+from utils.product_cache import get_product_summaries
+from utils.sparse_fields import parse_fields, field_projection, sparse_response
+from utils.catalog import (
+    product_filter, product_facets, product_sort, encode_cursor, after_cursor, SORT_PATTERN
+)
+from utils.product_import import import_products, detect_format, FORMATS
+from utils.bulk_products import bulk_update_prices, bulk_update_stock, price_filter
+from typing import List, Optional
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
 import math
 
@@ -40,49 +54,184 @@ def product_to_response(product: Product) -> ProductResponse:
         numReviews=product.num_reviews,
         price=product.price,
         countInStock=product.count_in_stock,
+        sku=product.sku,
         createdAt=product.created_at,
         updatedAt=product.updated_at
     )
 
 
+def _review_doc_to_response(review: dict) -> ReviewResponse:
+    return ReviewResponse(
+        _id=str(review["_id"]),
+        name=review["name"],
+        rating=review["rating"],
+        comment=review["comment"],
+        user=str(review["user"]),
+        createdAt=review["createdAt"]
+    )
+
+
+# ProductResponse field -> how to read it from a raw products document; also
+# the fields a ?fields= list may name
+PRODUCT_FIELDS = {
+    "_id": lambda doc: str(doc["_id"]),
+    "user": lambda doc: str(doc["user"]),
+    "name": lambda doc: doc["name"],
+    "image": lambda doc: doc["image"],
+    "brand": lambda doc: doc["brand"],
+    "category": lambda doc: doc["category"],
+    "description": lambda doc: doc["description"],
+    # Reviews only if already resolved
+    "reviews": lambda doc: [
+        _review_doc_to_response(review)
+        for review in doc.get("reviews", []) if isinstance(review, dict) and "rating" in review
+    ],
+    "rating": lambda doc: doc.get("rating", 0),
+    "numReviews": lambda doc: doc.get("numReviews", 0),
+    "price": lambda doc: doc["price"],
+    "countInStock": lambda doc: doc.get("countInStock", 0),
+    "sku": lambda doc: doc.get("sku"),
+    "createdAt": lambda doc: doc["createdAt"],
+    "updatedAt": lambda doc: doc["updatedAt"],
+}
+
+
+def product_doc_fields(doc: dict, fields: List[str]) -> dict:
+    """Just `fields` of the product response, from a raw products document"""
+    return {field: PRODUCT_FIELDS[field](doc) for field in fields}
+
+
+def product_doc_to_response(doc: dict) -> ProductResponse:
+    """ProductResponse from a raw products document (reviews only if already resolved)"""
+    return ProductResponse(**product_doc_fields(doc, PRODUCT_FIELDS))
+
+
 @router.get("/top")
-async def get_top_products():
+async def get_top_products(
+    fields: Optional[str] = Query(None, description="Comma-separated response fields, e.g. name,price,image")
+):
     """Get top rated products"""
-    products = await Product.find(fetch_links=True).sort("-rating").limit(3).to_list()
+    selected = parse_fields(fields, PRODUCT_FIELDS)
+    if selected:
+        products = await find_products({}, sort=[("rating", -1)], limit=3, projection=field_projection(selected))
+        return sparse_response([product_doc_fields(product, selected) for product in products])
     
-    return [product_to_response(product) for product in products]
+    products = await find_products({}, sort=[("rating", -1)], limit=3)
+    
+    return [product_doc_to_response(product) for product in products]
+
+
+@router.get("/inventory/contention")
+async def get_inventory_contention(admin_user: User = Depends(require_admin)):
+    """Per-product stock reservation counters, most contended first (Admin only)"""
+    return contention_metrics()
+
+
+@router.get("/inventory/admission")
+async def get_checkout_admission(admin_user: User = Depends(require_admin)):
+    """Checkout queue depth and sold-out state per product (Admin only)"""
+    return admission_status()
+
+
+class CatalogFilters:
+    """Listing filters shared by the product list and its facets"""
+
+    def __init__(
+        self,
+        keyword: Optional[str] = None,
+        category: Optional[List[str]] = Query(None, description="Repeat to match any of several"),
+        brand: Optional[List[str]] = Query(None, description="Repeat to match any of several"),
+        min_price: Optional[float] = Query(None, alias="minPrice", ge=0),
+        max_price: Optional[float] = Query(None, alias="maxPrice", ge=0),
+        min_rating: Optional[float] = Query(None, alias="minRating", ge=0, le=5)
+    ):
+        self.query = product_filter(keyword, category, brand, min_price, max_price, min_rating)
+
+
+@router.get("/facets")
+async def get_product_facets(filters: CatalogFilters = Depends()):
+    """
+    Product counts per category, brand and price range for the current filters
+    
+    Counts are cached per filter combination until a product changes or
+    PRODUCT_FACET_CACHE_TTL passes. Only cached responses meet the 50ms
+    response target: the first request for a combination aggregates every
+    matching product, and an unfiltered one on a catalog of a million
+    products runs far past the target.
+    """
+    return await product_facets(filters.query)
 
 
 @router.get("", response_model=ProductListResponse, response_model_exclude_none=False)
 async def get_products(
-    keyword: Optional[str] = None,
-    page_number: int = Query(1, alias="pageNumber", ge=1)
+    filters: CatalogFilters = Depends(),
+    sort: Optional[str] = Query(
+        None, pattern=SORT_PATTERN, description="price, -price, rating, -rating, newest or popularity"
+    ),
+    page_number: int = Query(1, alias="pageNumber", ge=1),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page; takes the place of pageNumber"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields, e.g. name,price,image")
 ):
-    """Fetch all products with pagination and search"""
+    """
+    Fetch products with pagination, search, filters and sorting
+    
+    Pages can be fetched by pageNumber or, for deep pages, by passing back
+    the nextCursor of the previous page with the same filters and sort
+    (page is then null). A cursor from another sort or filters is a 400.
+    ?fields= trims each product to the listed fields.
+    """
+    selected = parse_fields(fields, PRODUCT_FIELDS)
     page_size = settings.PAGINATION_LIMIT
     skip = page_size * (page_number - 1)
+    order = product_sort(sort)
+    
+    query = filters.query
+    page = page_number
+    if cursor:
+        try:
+            query = after_cursor(query, sort, cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        # A cursor page has no page number
+        skip = 0
+        page = None
     
-    query = {}
-    if keyword:
-        query = {"name": {"$regex": keyword, "$options": "i"}}
-    
-    count = await Product.find(query).count()
-    products = await Product.find(query, fetch_links=True).skip(skip).limit(page_size).to_list()
+    count = await Product.get_motor_collection().count_documents(filters.query)
+    # The cursor needs the sort key even when ?fields= leaves it out
+    projection = field_projection(selected, order[0][0]) if selected else None
+    products = await find_products(query, sort=order, skip=skip, limit=page_size, projection=projection)
     
     pages = math.ceil(count / page_size) if count > 0 else 1
+    next_cursor = encode_cursor(products[-1], sort, filters.query) if len(products) == page_size else None
+    
+    if selected:
+        return sparse_response({
+            "products": [product_doc_fields(product, selected) for product in products],
+            "page": page,
+            "pages": pages,
+            "nextCursor": next_cursor
+        })
     
     return ProductListResponse(
-        products=[product_to_response(product) for product in products],
-        page=page_number,
-        pages=pages
+        products=[product_doc_to_response(product) for product in products],
+        page=page,
+        pages=pages,
+        nextCursor=next_cursor
     )
 
 
 @router.get("/{product_id}", response_model=ProductResponse, response_model_exclude_none=False)
-async def get_product_by_id(product_id: str):
-    """Fetch single product"""
+async def get_product_by_id(
+    product_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields, e.g. name,price,image")
+):
+    """Fetch single product; ?fields= returns only the listed fields"""
+    selected = parse_fields(fields, PRODUCT_FIELDS)
     try:
-        product = await Product.get(ObjectId(product_id), fetch_links=True)
+        product = await get_product(ObjectId(product_id), field_projection(selected) if selected else None)
     except:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -95,7 +244,10 @@ async def get_product_by_id(product_id: str):
             detail="Product not found"
         )
     
-    return product_to_response(product)
+    if selected:
+        return sparse_response(product_doc_fields(product, selected))
+    
+    return product_doc_to_response(product)
 
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -120,49 +272,143 @@ async def create_product(
     )
     
     await product.save()
+    products_changed([product.id])
     
     return product_to_response(product)
 
 
-@router.put("/{product_id}", response_model=ProductResponse)
-async def update_product(
-    product_id: str,
-    product_data: ProductUpdate,
+@router.post("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(request: ProductBatchRequest):
+    """
+    Name, image, price and stock for a list of product IDs in one request
+    
+    Meant for revalidating a cart; IDs that match no product come back in
+    `missing`.
+    """
+    if len(request.ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX_IDS} product IDs per request"
+        )
+    
+    products, missing = await get_product_summaries(request.ids)
+    return ProductBatchResponse(products=products, missing=missing)
+
+
+@router.post("/import")
+async def import_product_catalog(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
     admin_user: User = Depends(require_admin)
 ):
-    """Update a product (Admin only)"""
-    try:
-        product = await Product.get(ObjectId(product_id), fetch_links=True)
-    except:
+    """
+    Create or update products from an NDJSON or CSV file, matched by SKU (Admin only)
+    
+    Bad rows are listed in the response and skipped; the rest are imported.
+    """
+    file_format = file_format or detect_format(file.filename)
+    if file_format not in FORMATS:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format. Allowed: {', '.join(FORMATS)}"
         )
     
-    if not product:
+    return await import_products(file.file, file_format, admin_user.id)
+
+
+@router.post("/bulk/price")
+async def bulk_reprice_products(
+    update: BulkPriceUpdate,
+    admin_user: User = Depends(require_admin)
+):
+    """
+    Change the price of every product in a category and/or brand (Admin only)
+    
+    mode "percent" scales prices by value%; "absolute" adds value. With
+    dryRun the matching products are only counted and a few previewed.
+    """
+    if not price_filter(update):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify a category and/or brand"
         )
     
+    if update.mode == "percent" and update.value <= -100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A percent change must be greater than -100"
+        )
+    
+    return await bulk_update_prices(update)
+
+
+@router.post("/bulk/stock")
+async def bulk_update_product_stock(
+    file: UploadFile = File(...),
+    mode: str = Query("set", pattern="^(set|increment)$"),
+    dry_run: bool = Query(False, alias="dryRun"),
+    admin_user: User = Depends(require_admin)
+):
+    """Set or adjust stock from a CSV with sku,quantity columns (Admin only)"""
+    return await bulk_update_stock(file.file, mode, dry_run)
+
+
+@router.put("/{product_id}", response_model=ProductResponse)
+async def update_product(
+    product_id: str,
+    product_data: ProductUpdate,
+    admin_user: User = Depends(require_admin)
+):
+    """
+    Update a product (Admin only)
+    
+    Only the supplied fields are written; the product comes back whole,
+    reviews included, as GET returns it.
+    """
+    fields = {}
     if product_data.name:
-        product.name = product_data.name
+        fields["name"] = product_data.name
     if product_data.price is not None:
-        product.price = product_data.price
+        fields["price"] = product_data.price
     if product_data.description:
-        product.description = product_data.description
+        fields["description"] = product_data.description
     if product_data.image:
-        product.image = product_data.image
+        fields["image"] = product_data.image
     if product_data.brand:
-        product.brand = product_data.brand
+        fields["brand"] = product_data.brand
     if product_data.category:
-        product.category = product_data.category
+        fields["category"] = product_data.category
+    
+    computed = None
     if product_data.count_in_stock is not None:
-        product.count_in_stock = product_data.count_in_stock
+        # Sharded products keep their stock in stock_shards; see below
+        computed = {"countInStock": {"$cond": [
+            {"$gt": [{"$ifNull": ["$stockShards", 0]}, 0]},
+            "$countInStock",
+            {"$literal": product_data.count_in_stock}
+        ]}}
     
-    await product.save()
+    try:
+        doc = await update_fields(Product, ObjectId(product_id), fields, computed=computed)
+    except InvalidId:
+        doc = None
     
-    return product_to_response(product)
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    if product_data.count_in_stock is not None and doc.get("stockShards"):
+        # Sharded stock lives in stock_shards; redistribute the new level there
+        doc["countInStock"] = await configure_stock_shards(
+            doc["_id"], doc["stockShards"], total=product_data.count_in_stock
+        )
+    
+    products_changed([product_id])
+    
+    await resolve_reviews([doc])
+    return product_doc_to_response(doc)
 
 
 @router.delete("/{product_id}")
@@ -187,9 +433,43 @@ async def delete_product(
     
     await product.delete()
     
+    if product.stock_shards:
+        await delete_stock_shards(product.id)
+    
+    products_changed([product_id])
+    
     return {"message": "Product removed"}
 
 
+@router.put("/{product_id}/stock-shards")
+async def update_stock_shards(
+    product_id: str,
+    shard_data: StockShardsUpdate,
+    admin_user: User = Depends(require_admin)
+):
+    """
+    Spread a hot product's stock over N counters, or 0 to go back to one (Admin only)
+    """
+    try:
+        product = await Product.get(ObjectId(product_id))
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    stock = await configure_stock_shards(product.id, shard_data.shards)
+    products_changed([product_id])
+    
+    return {"_id": product_id, "stockShards": shard_data.shards, "countInStock": stock}
+
+
 @router.post("/{product_id}/reviews", status_code=status.HTTP_201_CREATED)
 async def create_product_review(
     product_id: str,
@@ -255,5 +535,6 @@ async def create_product_review(
         product_with_links.rating = total_rating / (len(product_fetched.reviews) + 1)
     
     await product_with_links.save(link_rule="WRITE")
+    products_changed([product_id])
     
     return {"message": "Review added"}
@@ -6,11 +6,26 @@ from schemas.user import (
 )
 from middleware.auth import get_current_user, require_admin
 from utils.generate_token import generate_token
+from utils.partial_update import update_fields
 from typing import List
 from bson import ObjectId
+from bson.errors import InvalidId
+import asyncio
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
+USER_RESPONSE_PROJECTION = {"name": 1, "email": 1, "isAdmin": 1}
+
+
+def user_doc_to_response(doc: dict) -> UserResponse:
+    """UserResponse from a raw users document"""
+    return UserResponse(
+        _id=str(doc["_id"]),
+        name=doc["name"],
+        email=doc["email"],
+        isAdmin=doc.get("isAdmin", False)
+    )
+
 
 @router.post("/auth", response_model=UserResponse)
 async def auth_user(user_data: UserLogin, response: Response):
@@ -85,36 +100,40 @@ async def update_user_profile(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    """Update user profile"""
+    """Update user profile; only the supplied fields are written"""
+    fields = {}
     if user_data.name:
-        current_user.name = user_data.name
+        fields["name"] = user_data.name
     if user_data.email:
-        current_user.email = user_data.email
+        fields["email"] = user_data.email
     if user_data.password:
-        current_user.password = user_data.password
+        fields["password"] = await asyncio.to_thread(User.hash_plain_password, user_data.password)
     
-    await current_user.save()
+    doc = await update_fields(User, current_user.id, fields, USER_RESPONSE_PROJECTION)
     
-    return UserResponse(
-        _id=str(current_user.id),
-        name=current_user.name,
-        email=current_user.email,
-        isAdmin=current_user.is_admin
-    )
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return user_doc_to_response(doc)
 
 
 @router.get("", response_model=List[UserListResponse])
 async def get_users(admin_user: User = Depends(require_admin)):
     """Get all users (Admin only)"""
-    users = await User.find_all().to_list()
+    users = await User.get_motor_collection().find(
+        {}, projection={**USER_RESPONSE_PROJECTION, "createdAt": 1}
+    ).to_list(None)
     
     return [
         UserListResponse(
-            _id=str(user.id),
-            name=user.name,
-            email=user.email,
-            isAdmin=user.is_admin,
-            createdAt=user.created_at
+            _id=str(user["_id"]),
+            name=user["name"],
+            email=user["email"],
+            isAdmin=user.get("isAdmin", False),
+            createdAt=user["createdAt"]
         )
         for user in users
     ]
@@ -152,7 +171,9 @@ async def delete_user(user_id: str, admin_user: User = Depends(require_admin)):
 async def get_user_by_id(user_id: str, admin_user: User = Depends(require_admin)):
     """Get user by ID (Admin only)"""
     try:
-        user = await User.get(ObjectId(user_id))
+        user = await User.get_motor_collection().find_one(
+            {"_id": ObjectId(user_id)}, projection=USER_RESPONSE_PROJECTION
+        )
     except:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -165,12 +186,7 @@ async def get_user_by_id(user_id: str, admin_user: User = Depends(require_admin)
             detail="User not found"
         )
     
-    return UserResponse(
-        _id=str(user.id),
-        name=user.name,
-        email=user.email,
-        isAdmin=user.is_admin
-    )
+    return user_doc_to_response(user)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
@@ -179,33 +195,24 @@ async def update_user(
     user_data: UserAdminUpdate,
     admin_user: User = Depends(require_admin)
 ):
-    """Update user (Admin only)"""
+    """Update user (Admin only); only the supplied fields are written"""
+    fields = {}
+    if user_data.name:
+        fields["name"] = user_data.name
+    if user_data.email:
+        fields["email"] = user_data.email
+    if user_data.is_admin is not None:
+        fields["isAdmin"] = user_data.is_admin
+    
     try:
-        user = await User.get(ObjectId(user_id))
-    except:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+        doc = await update_fields(User, ObjectId(user_id), fields, USER_RESPONSE_PROJECTION)
+    except InvalidId:
+        doc = None
     
-    if not user:
+    if not doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    if user_data.name:
-        user.name = user_data.name
-    if user_data.email:
-        user.email = user_data.email
-    if user_data.is_admin is not None:
-        user.is_admin = user_data.is_admin
-    
-    await user.save()
-    
-    return UserResponse(
-        _id=str(user.id),
-        name=user.name,
-        email=user.email,
-        isAdmin=user.is_admin
-    )
+    return user_doc_to_response(doc)
@@ -3,19 +3,25 @@ from .user import (
     UserResponse, UserListResponse
 )
 from .product import (
-    ProductCreate, ProductUpdate, ReviewCreate,
-    ProductResponse, ReviewResponse, ProductListResponse
+    ProductCreate, ProductUpdate, ProductImportRow, BulkPriceUpdate, StockUpdateRow,
+    ReviewCreate, StockShardsUpdate, ProductBatchRequest,
+    ProductResponse, ReviewResponse, ProductListResponse,
+    ProductSummaryResponse, ProductBatchResponse
 )
 from .order import (
     OrderCreate, OrderPaymentUpdate, OrderResponse,
-    ShippingAddressSchema, OrderItemSchema, PaymentResultSchema
+    ShippingAddressSchema, OrderItemSchema, PaymentResultSchema,
+    CartItemSchema, CartQuoteRequest, CartQuoteResponse
 )
 
 __all__ = [
     "UserLogin", "UserRegister", "UserUpdate", "UserAdminUpdate",
     "UserResponse", "UserListResponse",
-    "ProductCreate", "ProductUpdate", "ReviewCreate",
+    "ProductCreate", "ProductUpdate", "ProductImportRow", "BulkPriceUpdate", "StockUpdateRow",
+    "ReviewCreate", "StockShardsUpdate", "ProductBatchRequest",
     "ProductResponse", "ReviewResponse", "ProductListResponse",
+    "ProductSummaryResponse", "ProductBatchResponse",
     "OrderCreate", "OrderPaymentUpdate", "OrderResponse",
-    "ShippingAddressSchema", "OrderItemSchema", "PaymentResultSchema"
+    "ShippingAddressSchema", "OrderItemSchema", "PaymentResultSchema",
+    "CartItemSchema", "CartQuoteRequest", "CartQuoteResponse"
 ]
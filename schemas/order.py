@@ -39,6 +39,7 @@ class PaymentResultSchema(BaseModel):
     status: Optional[str] = None
     update_time: Optional[str] = Field(None, alias="update_time")
     email_address: Optional[str] = Field(None, alias="email_address")
+    verification_status: Optional[str] = None
 
 
 # Request schemas
@@ -50,6 +51,26 @@ class OrderCreate(BaseModel):
     payment_method: str = Field(alias="paymentMethod")
 
 
+class CartItemSchema(BaseModel):
+    product: str
+    qty: int = Field(ge=1)
+
+    @model_validator(mode='before')
+    @classmethod
+    def set_product_from_id(cls, data: Any) -> Any:
+        if isinstance(data, dict):
+            # Cart items from the frontend carry the product's _id
+            if '_id' in data and 'product' not in data:
+                data['product'] = str(data['_id'])
+        return data
+
+
+class CartQuoteRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    
+    cart_items: List[CartItemSchema] = Field(alias="cartItems", min_length=1)
+
+
 class OrderPaymentUpdate(BaseModel):
     model_config = ConfigDict(populate_by_name=True, extra='allow', arbitrary_types_allowed=True)
     
@@ -92,3 +113,13 @@ class OrderResponse(BaseModel):
     delivered_at: Optional[datetime] = Field(None, alias="deliveredAt")
     created_at: datetime = Field(alias="createdAt")
     updated_at: datetime = Field(alias="updatedAt")
+
+
+class CartQuoteResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    
+    cart_items: List[dict] = Field(alias="cartItems")
+    items_price: float = Field(alias="itemsPrice")
+    tax_price: float = Field(alias="taxPrice")
+    shipping_price: float = Field(alias="shippingPrice")
+    total_price: float = Field(alias="totalPrice")
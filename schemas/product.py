@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -28,11 +28,49 @@ class ProductUpdate(BaseModel):
     count_in_stock: Optional[int] = Field(None, alias="countInStock")
 
 
+class ProductImportRow(BaseModel):
+    model_config = ConfigDict(populate_by_name=True, str_strip_whitespace=True)
+    
+    sku: str = Field(min_length=1, max_length=64)
+    name: str = Field(min_length=1)
+    price: float = Field(ge=0)
+    image: str = "/images/sample.jpg"
+    brand: str = ""
+    category: str = ""
+    description: str = ""
+    count_in_stock: int = Field(0, alias="countInStock", ge=0)
+
+
+class BulkPriceUpdate(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    
+    category: Optional[str] = None
+    brand: Optional[str] = None
+    mode: Literal["percent", "absolute"]
+    value: float
+    dry_run: bool = Field(False, alias="dryRun")
+
+
+class StockUpdateRow(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    sku: str = Field(min_length=1, max_length=64)
+    quantity: int
+
+
+class StockShardsUpdate(BaseModel):
+    shards: int = Field(ge=0, le=64)
+
+
 class ReviewCreate(BaseModel):
     rating: int = Field(ge=1, le=5)
     comment: str
 
 
+class ProductBatchRequest(BaseModel):
+    ids: List[str] = Field(min_length=1)
+
+
 # Response schemas
 class ReviewResponse(BaseModel):
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
@@ -60,11 +98,31 @@ class ProductResponse(BaseModel):
     num_reviews: int = Field(alias="numReviews")
     price: float
     count_in_stock: int = Field(alias="countInStock")
+    sku: Optional[str] = None
     created_at: datetime = Field(alias="createdAt")
     updated_at: datetime = Field(alias="updatedAt")
 
 
 class ProductListResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    
     products: List[ProductResponse]
-    page: int
+    # None for pages fetched by cursor
+    page: Optional[int] = None
     pages: int
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
+
+
+class ProductSummaryResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    
+    id: str = Field(alias="_id")
+    name: str
+    image: str
+    price: float
+    count_in_stock: int = Field(alias="countInStock")
+
+
+class ProductBatchResponse(BaseModel):
+    products: List[ProductSummaryResponse]
+    missing: List[str]
@@ -0,0 +1,187 @@
+"""
+READ MEMORY BENCHMARK
+Peak Python memory of each GET endpoint's read, loading state-managed
+Beanie documents (the old path) versus the raw Motor reads in
+utils/lean_reads.py that the handlers use now
+
+Runs directly against MongoDB using scratch collections in a separate
+database, so it never touches shop data:
+    python tests/bench_read_memory.py --products 2000 --reviews 5 --orders 20000 --users 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "bench-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "bench-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "bench-secret")
+
+from beanie import init_beanie
+from bson import ObjectId, DBRef
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from config.settings import settings
+from models.product import Product, Review
+from models.order import Order, ArchivedOrder
+from models.user import User
+from routers import products as products_router
+from routers import orders as orders_router
+from routers import users as users_router
+from schemas.order import OrderResponse
+from schemas.user import UserListResponse
+from utils.order_serializer import serialize_order
+
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
+BENCH_DB = "tweeky_bench"
+
+
+async def measure(load) -> dict:
+    """Peak traced memory and wall time of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await load()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = len(result) if isinstance(result, list) else len(getattr(result, "products", [result]))
+    return {"rows": rows, "peak_mb": peak / 2 ** 20, "seconds": elapsed}
+
+
+async def seed(db, args):
+    now = datetime.utcnow()
+    users = [
+        {
+            "_id": ObjectId(), "name": f"User {i}", "email": f"user{i}@example.com", "password": "x" * 60,
+            "isAdmin": i == 0, "createdAt": now, "updatedAt": now
+        }
+        for i in range(args.users)
+    ]
+    await db["users"].insert_many(users)
+
+    reviews, products = [], []
+    for i in range(args.products):
+        linked = []
+        for j in range(args.reviews):
+            review = {
+                "_id": ObjectId(), "name": f"User {j}", "rating": random.randint(1, 5),
+                "comment": "Solid product, would buy again. " * 4, "user": users[j % len(users)]["_id"],
+                "createdAt": now, "updatedAt": now
+            }
+            reviews.append(review)
+            linked.append(DBRef("reviews", review["_id"]))
+        products.append({
+            "_id": ObjectId(), "user": users[0]["_id"], "name": f"Product {i}", "image": f"/images/{i}.jpg",
+            "brand": "Brand", "category": "Category", "description": "A description of the product. " * 8,
+            "reviews": linked, "rating": 4.0, "numReviews": len(linked), "price": 19.99, "countInStock": 10,
+            "stockShards": 0, "createdAt": now, "updatedAt": now
+        })
+    if reviews:
+        await db["reviews"].insert_many(reviews)
+    await db["products"].insert_many(products)
+
+    orders = []
+    for i in range(args.orders):
+        items = [
+            {
+                "name": p["name"], "qty": random.randint(1, 3), "image": p["image"], "price": p["price"],
+                "product": p["_id"]
+            }
+            for p in random.sample(products, min(3, len(products)))
+        ]
+        orders.append({
+            "_id": ObjectId(), "user": users[i % 10]["_id"], "orderItems": items,
+            "shippingAddress": {"address": "1 Main St", "city": "Springfield", "postalCode": "12345", "country": "US"},
+            "paymentMethod": "PayPal", "paymentResult": None, "itemsPrice": 59.97, "taxPrice": 9.0,
+            "shippingPrice": 0.0, "totalPrice": 68.97, "isPaid": True, "paidAt": now, "isDelivered": False,
+            "deliveredAt": None, "stockReserved": True, "createdAt": now - timedelta(minutes=i), "updatedAt": now
+        })
+    for start in range(0, len(orders), 5000):
+        await db["orders"].insert_many(orders[start:start + 5000])
+    return users[0], products[0]
+
+
+async def main(args):
+    client = AsyncIOMotorClient(MONGO_URI)
+    db = client[BENCH_DB]
+    await client.drop_database(BENCH_DB)
+    await init_beanie(database=db, document_models=[Product, Review, Order, ArchivedOrder, User])
+    admin_doc, product_doc = await seed(db, args)
+    admin = User.model_validate(admin_doc)
+    product_id = str(product_doc["_id"])
+    settings.PAGINATION_LIMIT = args.page_size
+
+    async def stateful_products():
+        found = await Product.find({}, fetch_links=True).limit(args.page_size).to_list()
+        return [products_router.product_to_response(product) for product in found]
+
+    async def stateful_top():
+        found = await Product.find(fetch_links=True).sort("-rating").limit(3).to_list()
+        return [products_router.product_to_response(product) for product in found]
+
+    async def stateful_product():
+        return products_router.product_to_response(await Product.get(ObjectId(product_id), fetch_links=True))
+
+    async def stateful_orders():
+        return [OrderResponse(**serialize_order(order)) for order in await Order.find_all().to_list()]
+
+    async def stateful_my_orders():
+        found = await Order.find(Order.user == admin.id).sort("+createdAt", "+_id").to_list()
+        return [OrderResponse(**serialize_order(order)) for order in found]
+
+    async def stateful_users():
+        return [
+            UserListResponse(_id=str(u.id), name=u.name, email=u.email, isAdmin=u.is_admin, createdAt=u.created_at)
+            for u in await User.find_all().to_list()
+        ]
+
+    no_filters = products_router.CatalogFilters(
+        keyword=None, category=None, brand=None, min_price=None, max_price=None, min_rating=None
+    )
+    endpoints = {
+        "GET /api/products": (
+            stateful_products,
+            lambda: products_router.get_products(filters=no_filters, sort=None, page_number=1, cursor=None, fields=None)
+        ),
+        "GET /api/products/top": (stateful_top, lambda: products_router.get_top_products(fields=None)),
+        "GET /api/products/{id}": (
+            stateful_product, lambda: products_router.get_product_by_id(product_id, fields=None)
+        ),
+        "GET /api/orders": (stateful_orders, lambda: orders_router.get_orders(admin_user=admin, fields=None)),
+        "GET /api/orders/mine": (
+            stateful_my_orders, lambda: orders_router.get_my_orders(current_user=admin, page_number=None, fields=None)
+        ),
+        "GET /api/users": (stateful_users, lambda: users_router.get_users(admin_user=admin)),
+    }
+
+    print(f"\n{args.products} products x {args.reviews} reviews, {args.orders} orders, {args.users} users\n")
+    print(f"{'endpoint':<26}{'rows':>7}{'stateful MB':>13}{'lean MB':>10}{'saved':>8}{'stateful s':>12}{'lean s':>9}")
+    for name, (stateful, lean) in endpoints.items():
+        before = await measure(stateful)
+        after = await measure(lean)
+        assert before["rows"] == after["rows"], f"{name}: row counts differ ({before['rows']} != {after['rows']})"
+        saved = 1 - after["peak_mb"] / before["peak_mb"] if before["peak_mb"] else 0
+        print(
+            f"{name:<26}{after['rows']:>7}{before['peak_mb']:>13.1f}{after['peak_mb']:>10.1f}{saved:>8.0%}"
+            f"{before['seconds']:>12.2f}{after['seconds']:>9.2f}"
+        )
+
+    await client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--reviews", type=int, default=5)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=500, help="products per page for GET /api/products")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""
+STOCK CONTENTION BENCHMARK
+Compares checkout throughput on one hot SKU: a single countInStock document
+versus sharded stock counters (utils/stock_shards.py)
+
+Runs directly against MongoDB using scratch collections in a separate
+database, so it never touches shop data:
+    python tests/bench_stock_contention.py --buyers 200 --stock 5000 --shards 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from beanie import init_beanie
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models.product import Product
+from models.stock_shard import StockShard
+from utils.stock_shards import configure_stock_shards, take_from_shards
+
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
+BENCH_DB = "tweeky_bench"
+
+
+async def run_buyers(buyers: int, purchases: int, buy) -> dict:
+    """Each buyer keeps buying one unit until it has made `purchases` attempts"""
+    sold = 0
+    failed = 0
+
+    async def buyer():
+        nonlocal sold, failed
+        for _ in range(purchases):
+            if await buy():
+                sold += 1
+            else:
+                failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(buyer() for _ in range(buyers)))
+    elapsed = time.perf_counter() - start
+    return {"sold": sold, "failed": failed, "seconds": elapsed, "ops_per_sec": (sold + failed) / elapsed}
+
+
+async def main(args):
+    client = AsyncIOMotorClient(MONGO_URI, maxPoolSize=args.buyers)
+    db = client[BENCH_DB]
+    await init_beanie(database=db, document_models=[Product, StockShard])
+    products = db["products"]
+    await products.delete_many({})
+    await db["stock_shards"].delete_many({})
+
+    def new_product():
+        return {
+            "_id": ObjectId(), "user": ObjectId(), "name": "Hot SKU", "image": "", "brand": "",
+            "category": "", "description": "", "price": 1.0, "countInStock": args.stock, "stockShards": 0
+        }
+
+    single = new_product()
+    await products.insert_one(single)
+
+    async def buy_single():
+        result = await products.update_one(
+            {"_id": single["_id"], "countInStock": {"$gte": 1}},
+            {"$inc": {"countInStock": -1}}
+        )
+        return result.modified_count == 1
+
+    sharded = new_product()
+    await products.insert_one(sharded)
+    await configure_stock_shards(sharded["_id"], args.shards)
+
+    async def buy_sharded():
+        return await take_from_shards(sharded["_id"], 1, args.shards)
+
+    purchases = max(1, (args.stock * 2) // args.buyers)
+    results = {
+        "single document": await run_buyers(args.buyers, purchases, buy_single),
+        f"{args.shards} shards": await run_buyers(args.buyers, purchases, buy_sharded),
+    }
+
+    print(f"\n{args.buyers} concurrent buyers, {args.stock} units, {purchases} attempts each\n")
+    print(f"{'layout':<18}{'sold':>8}{'failed':>8}{'seconds':>10}{'ops/sec':>12}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['sold']:>8}{r['failed']:>8}{r['seconds']:>10.2f}{r['ops_per_sec']:>12.0f}")
+        assert r["sold"] == args.stock, f"{name}: oversold or undersold ({r['sold']} != {args.stock})"
+
+    await client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=5000)
+    parser.add_argument("--shards", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
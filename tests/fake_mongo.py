@@ -0,0 +1,494 @@
+"""
+In-memory stand-in for the Motor collections the utils modules use
+
+Just enough of the query, projection and update language (including
+update pipelines of simple expressions) for tests of code that talks to
+Mongo directly to run without a server. Tests point a model at it with
+    monkeypatch.setattr(Order, "get_motor_collection", lambda: db["orders"])
+"""
+import copy
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+DUPLICATE_KEY = 11000
+MISSING = object()
+
+
+def _get(doc, path):
+    """Value at a dotted path; arrays along the way yield a list of values"""
+    value = doc
+    for i, part in enumerate(path.split(".")):
+        if isinstance(value, list):
+            rest = ".".join(path.split(".")[i:])
+            found = [_get(item, rest) for item in value if isinstance(item, dict)]
+            return [item for item in found if item is not MISSING]
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+
+def _set(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset(doc, path):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def _candidates(value):
+    """A field matches a condition if it or any element of it (for arrays) does"""
+    if value is MISSING:
+        return [MISSING]
+    return [value, *value] if isinstance(value, list) else [value]
+
+
+def _compare(a, b, op):
+    if a is MISSING or a is None or b is None:
+        return False
+    try:
+        return op(a, b)
+    except TypeError:
+        return False
+
+
+OPERATORS = {
+    "$gt": lambda a, b: _compare(a, b, lambda x, y: x > y),
+    "$gte": lambda a, b: _compare(a, b, lambda x, y: x >= y),
+    "$lt": lambda a, b: _compare(a, b, lambda x, y: x < y),
+    "$lte": lambda a, b: _compare(a, b, lambda x, y: x <= y),
+    "$in": lambda a, b: a is not MISSING and a in b,
+    "$type": lambda a, b: b == "string" and isinstance(a, str),
+}
+
+
+def _field_matches(value, condition):
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, arg in condition.items():
+            if op == "$exists":
+                if (value is not MISSING) != bool(arg):
+                    return False
+            elif op == "$ne":
+                if any(candidate == arg for candidate in _candidates(value)):
+                    return False
+            elif op == "$nin":
+                if any(candidate in arg for candidate in _candidates(value)):
+                    return False
+            elif not any(OPERATORS[op](candidate, arg) for candidate in _candidates(value)):
+                return False
+        return True
+    if condition is None:
+        return value is MISSING or value is None
+    return any(candidate == condition for candidate in _candidates(value))
+
+
+def matches(doc, query):
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, sub) for sub in condition):
+                return False
+        elif not _field_matches(_get(doc, key), condition):
+            return False
+    return True
+
+
+def _path_tree(paths):
+    tree = {}
+    for path in paths:
+        node = tree
+        parts = path.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = True
+    return tree
+
+
+def _include(value, tree):
+    if isinstance(value, list):
+        return [_include(item, tree) for item in value if isinstance(item, dict)]
+    result = {}
+    for key, sub in tree.items():
+        if key in value:
+            result[key] = value[key] if sub is True else _include(value[key], sub)
+    return result
+
+
+def _exclude(value, tree):
+    if isinstance(value, list):
+        return [_exclude(item, tree) if isinstance(item, dict) else item for item in value]
+    result = {}
+    for key, item in value.items():
+        sub = tree.get(key)
+        if sub is True:
+            continue
+        result[key] = item if sub is None or not isinstance(item, (dict, list)) else _exclude(item, sub)
+    return result
+
+
+def project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    keep_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if fields and all(fields.values()):
+        result = _include(doc, _path_tree(fields))
+        if keep_id and "_id" in doc:
+            result = {"_id": doc["_id"], **result}
+        return result
+    result = _exclude(doc, _path_tree(fields))
+    if not keep_id:
+        result.pop("_id", None)
+    return result
+
+
+def evaluate(expression, doc):
+    """Aggregation expression value against `doc` (the subset the app uses)"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get(doc, expression[1:])
+        return None if value is MISSING else value
+    if isinstance(expression, list):
+        return [evaluate(item, doc) for item in expression]
+    if not isinstance(expression, dict) or not expression:
+        return expression
+    op, arg = next(iter(expression.items()))
+    if not op.startswith("$"):
+        return {key: evaluate(value, doc) for key, value in expression.items()}
+    if op == "$literal":
+        return arg
+    if op == "$cond":
+        if isinstance(arg, dict):
+            arg = [arg["if"], arg["then"], arg["else"]]
+        return evaluate(arg[1], doc) if evaluate(arg[0], doc) else evaluate(arg[2], doc)
+    args = [evaluate(item, doc) for item in arg] if isinstance(arg, list) else [evaluate(arg, doc)]
+    if op == "$ifNull":
+        return next((value for value in args if value is not None), None)
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        return OPERATORS[op](args[0], args[1])
+    if op == "$eq":
+        return args[0] == args[1]
+    if op == "$max":
+        return max(value for value in args if value is not None)
+    if op == "$min":
+        return min(value for value in args if value is not None)
+    if op == "$add":
+        return sum(args)
+    if op == "$multiply":
+        result = 1
+        for value in args:
+            result *= value
+        return result
+    if op == "$round":
+        return round(args[0], args[1] if len(args) > 1 else 0)
+    raise NotImplementedError(op)
+
+
+def apply_update(doc, update, inserting=False):
+    if isinstance(update, list):
+        for stage in update:
+            (name, spec), = stage.items()
+            if name not in ("$set", "$addFields"):
+                raise NotImplementedError(name)
+            values = {key: evaluate(value, doc) for key, value in spec.items()}
+            for key, value in values.items():
+                _set(doc, key, value)
+        return
+    for op, spec in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for key, value in spec.items():
+            if op in ("$set", "$setOnInsert"):
+                _set(doc, key, copy.deepcopy(value))
+            elif op == "$inc":
+                current = _get(doc, key)
+                _set(doc, key, (0 if current is MISSING else current) + value)
+            elif op == "$unset":
+                _unset(doc, key)
+            elif op == "$push":
+                current = _get(doc, key)
+                _set(doc, key, ([] if current is MISSING else current) + [copy.deepcopy(value)])
+            else:
+                raise NotImplementedError(op)
+
+
+class Result:
+    def __init__(self, **counts):
+        self.matched_count = counts.get("matched_count", 0)
+        self.modified_count = counts.get("modified_count", 0)
+        self.upserted_id = counts.get("upserted_id")
+        self.upserted_ids = counts.get("upserted_ids", {})
+        self.upserted_count = len(self.upserted_ids) or (1 if self.upserted_id is not None else 0)
+        self.deleted_count = counts.get("deleted_count", 0)
+        self.inserted_ids = counts.get("inserted_ids", [])
+        self.inserted_id = self.inserted_ids[0] if self.inserted_ids else None
+        self.inserted_count = len(self.inserted_ids)
+
+
+class FakeCursor:
+    def __init__(self, docs, projection):
+        self._docs = docs
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=None):
+        self._sort = [(key, direction or 1)] if isinstance(key, str) else list(key)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def _results(self):
+        docs = list(self._docs)
+        for field, direction in reversed(self._sort):
+            def key(doc, field=field):
+                value = _get(doc, field)
+                return (0, 0) if value is MISSING or value is None else (1, value)
+            docs.sort(key=key, reverse=direction == -1)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length=None):
+        docs = self._results()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, database=None, name="", unique=()):
+        self.database = database
+        self.name = name
+        self.docs = []
+        # (field or tuple of fields, partial filter or None) pairs, like the
+        # app's unique indexes
+        self.unique = list(unique)
+        # Index name -> info, as index_information() reports it
+        self.indexes = {}
+
+    def _find(self, query):
+        return [doc for doc in self.docs if matches(doc, query)]
+
+    def _check_unique(self, doc):
+        for other in self.docs:
+            if other is doc:
+                continue
+            if other["_id"] == doc["_id"]:
+                raise DuplicateKeyError("E11000 duplicate key error: _id", DUPLICATE_KEY)
+            for fields, partial in self.unique:
+                fields = (fields,) if isinstance(fields, str) else fields
+                value = [_get(doc, field) for field in fields]
+                if MISSING in value or (partial and not (matches(doc, partial) and matches(other, partial))):
+                    continue
+                if [_get(other, field) for field in fields] == value:
+                    raise DuplicateKeyError(f"E11000 duplicate key error: {', '.join(fields)}", DUPLICATE_KEY)
+
+    def _insert(self, doc):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return doc
+
+    def _update(self, query, update, upsert=False, many=False):
+        """(matched, modified, upserted _id, documents before, documents after)"""
+        targets = self._find(query)
+        if not many:
+            targets = targets[:1]
+        if not targets:
+            if not upsert:
+                return 0, 0, None, [], []
+            seed = {
+                key: value for key, value in query.items()
+                if not key.startswith("$") and not (isinstance(value, dict) and any(k.startswith("$") for k in value))
+            }
+            doc = {}
+            for key, value in seed.items():
+                _set(doc, key, copy.deepcopy(value))
+            apply_update(doc, update, inserting=True)
+            doc = self._insert(doc)
+            return 0, 0, doc["_id"], [None], [doc]
+        modified = 0
+        befores = []
+        for doc in targets:
+            before = copy.deepcopy(doc)
+            apply_update(doc, update)
+            try:
+                self._check_unique(doc)
+            except DuplicateKeyError:
+                doc.clear()
+                doc.update(before)
+                raise
+            befores.append(before)
+            modified += doc != before
+        return len(targets), modified, None, befores, targets
+
+    def find(self, query=None, projection=None, **kwargs):
+        return FakeCursor(self._find(query), projection)
+
+    async def find_one(self, query=None, projection=None, **kwargs):
+        found = self._find(query)
+        return project(found[0], projection) if found else None
+
+    async def count_documents(self, query):
+        return len(self._find(query))
+
+    async def insert_one(self, doc):
+        doc = self._insert(doc)
+        return Result(inserted_ids=[doc["_id"]])
+
+    async def insert_many(self, docs, ordered=True):
+        inserted, errors = [], []
+        for index, doc in enumerate(docs):
+            try:
+                inserted.append(self._insert(doc)["_id"])
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": DUPLICATE_KEY, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return Result(inserted_ids=inserted)
+
+    async def update_one(self, query, update, upsert=False):
+        matched, modified, upserted_id, _, _ = self._update(query, update, upsert)
+        return Result(matched_count=matched, modified_count=modified, upserted_id=upserted_id)
+
+    async def update_many(self, query, update, upsert=False):
+        matched, modified, upserted_id, _, _ = self._update(query, update, upsert, many=True)
+        return Result(matched_count=matched, modified_count=modified, upserted_id=upserted_id)
+
+    async def find_one_and_update(
+        self, query, update, projection=None, return_document=ReturnDocument.BEFORE, upsert=False, **kwargs
+    ):
+        _, _, _, befores, afters = self._update(query, update, upsert)
+        if not afters:
+            return None
+        doc = afters[0] if return_document == ReturnDocument.AFTER else befores[0]
+        return None if doc is None else project(doc, projection)
+
+    async def find_one_and_delete(self, query, projection=None, **kwargs):
+        found = self._find(query)
+        if not found:
+            return None
+        self.docs.remove(found[0])
+        return project(found[0], projection)
+
+    async def delete_one(self, query):
+        found = self._find(query)[:1]
+        for doc in found:
+            self.docs.remove(doc)
+        return Result(deleted_count=len(found))
+
+    async def delete_many(self, query):
+        found = self._find(query)
+        for doc in found:
+            self.docs.remove(doc)
+        return Result(deleted_count=len(found))
+
+    async def index_information(self):
+        return {"_id_": {"key": [("_id", 1)]}, **self.indexes}
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+
+    def aggregate(self, pipeline):
+        """$match, $group (with $push and $sum) and $limit stages"""
+        docs = [copy.deepcopy(doc) for doc in self.docs]
+        for stage in pipeline:
+            (name, spec), = stage.items()
+            if name == "$match":
+                docs = [doc for doc in docs if matches(doc, spec)]
+            elif name == "$limit":
+                docs = docs[:spec]
+            elif name == "$group":
+                groups = {}
+                for doc in docs:
+                    key = evaluate(spec["_id"], doc)
+                    group = groups.setdefault(repr(key), {"_id": key})
+                    for field, accumulator in spec.items():
+                        if field == "_id":
+                            continue
+                        (op, expression), = accumulator.items()
+                        value = evaluate(expression, doc)
+                        if op == "$push":
+                            group.setdefault(field, []).append(value)
+                        elif op == "$sum":
+                            group[field] = group.get(field, 0) + value
+                        else:
+                            raise NotImplementedError(op)
+                docs = list(groups.values())
+            else:
+                raise NotImplementedError(name)
+        return FakeCursor(docs, None)
+
+    async def bulk_write(self, operations, ordered=True):
+        matched = modified = 0
+        upserted, errors = {}, []
+        for index, operation in enumerate(operations):
+            try:
+                many = type(operation).__name__ == "UpdateMany"
+                m, n, upserted_id, _, _ = self._update(
+                    operation._filter, operation._doc, operation._upsert, many=many
+                )
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": DUPLICATE_KEY, "errmsg": str(e)})
+                if ordered:
+                    break
+                continue
+            matched += m
+            modified += n
+            if upserted_id is not None:
+                upserted[index] = upserted_id
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors,
+                "nMatched": matched,
+                "nModified": modified,
+                "nUpserted": len(upserted),
+                "upserted": [{"index": index, "_id": _id} for index, _id in upserted.items()],
+            })
+        return Result(matched_count=matched, modified_count=modified, upserted_ids=upserted)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+    def collection(self, name, unique=()):
+        """Create a collection with unique indexes"""
+        self.collections[name] = FakeCollection(self, name, unique)
+        return self.collections[name]
@@ -0,0 +1,83 @@
+"""
+LOCAL PAYPAL STUB
+Minimal stand-in for the PayPal REST endpoints used by utils/paypal.py
+
+Run standalone:
+    python tests/paypal_stub.py
+then start the API with PAYPAL_API_URL=http://127.0.0.1:5055
+"""
+import asyncio
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+STUB_PORT = 5055
+
+app = FastAPI(title="PayPal Stub")
+
+# Counters and knobs the tests inspect or tweak
+state = {
+    "token_requests": 0,
+    "order_requests": 0,
+    "expires_in": 32400,
+    "delay": 0.0,
+    "fail": False,
+    # Tokens the stub no longer accepts
+    "revoked": set(),
+}
+
+
+@app.post("/v1/oauth2/token")
+async def oauth_token(request: Request):
+    """Issue a fake client-credentials token"""
+    state["token_requests"] += 1
+    if state["delay"]:
+        await asyncio.sleep(state["delay"])
+    if state["fail"]:
+        return Response(status_code=500)
+    return {
+        "access_token": f"stub-{uuid.uuid4().hex}",
+        "token_type": "Bearer",
+        "expires_in": state["expires_in"],
+    }
+
+
+@app.get("/v2/checkout/orders/{order_id}")
+async def checkout_order(order_id: str, request: Request):
+    """Report every order as completed for 10.00, except MISSING-* ones; revoked tokens get 401"""
+    state["order_requests"] += 1
+    if state["delay"]:
+        await asyncio.sleep(state["delay"])
+    if state["fail"] or not request.headers.get("authorization", "").startswith("Bearer "):
+        return Response(status_code=500)
+    if request.headers["authorization"][len("Bearer "):] in state["revoked"]:
+        return Response(status_code=401)
+    if order_id.startswith("MISSING"):
+        return Response(status_code=404)
+    return {
+        "id": order_id,
+        "status": "COMPLETED",
+        "purchase_units": [{"amount": {"currency_code": "USD", "value": "10.00"}}],
+    }
+
+
+def reset():
+    """Reset counters and knobs"""
+    state.update(token_requests=0, order_requests=0, expires_in=32400, delay=0.0, fail=False, revoked=set())
+
+
+def start_in_thread(port: int = STUB_PORT) -> str:
+    """Start the stub on a daemon thread and return its base URL"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=STUB_PORT)
@@ -0,0 +1,94 @@
+"""
+CHECKOUT ADMISSION TEST
+Exercises utils/admission.py in-process (no server needed)
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from config.settings import settings
+from utils import admission
+from utils.admission import checkout_admission, SoldOutError, AdmissionRejectedError
+
+HOT_SKU = "64b0000000000000000000aa"
+
+
+def setup_function():
+    admission._gates.clear()
+    admission._sold_out.clear()
+
+
+def test_inflight_capped_per_product():
+    """No more than CHECKOUT_MAX_INFLIGHT_PER_PRODUCT checkouts run at once"""
+    peak = 0
+    running = 0
+
+    async def checkout():
+        nonlocal peak, running
+        async with checkout_admission([HOT_SKU]):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def run():
+        await asyncio.gather(*(checkout() for _ in range(settings.CHECKOUT_MAX_INFLIGHT_PER_PRODUCT * 3)))
+
+    asyncio.run(run())
+    assert peak == settings.CHECKOUT_MAX_INFLIGHT_PER_PRODUCT
+    assert admission.admission_status() == []
+
+
+def test_full_queue_rejects():
+    """Requests beyond the queue bound are refused without waiting"""
+    original_queue = settings.CHECKOUT_MAX_QUEUE_PER_PRODUCT
+    original_inflight = settings.CHECKOUT_MAX_INFLIGHT_PER_PRODUCT
+    settings.CHECKOUT_MAX_QUEUE_PER_PRODUCT = 2
+    settings.CHECKOUT_MAX_INFLIGHT_PER_PRODUCT = 1
+
+    async def checkout():
+        async with checkout_admission([HOT_SKU]):
+            await asyncio.sleep(0.05)
+
+    async def run():
+        results = await asyncio.gather(*(checkout() for _ in range(6)), return_exceptions=True)
+        rejected = [r for r in results if isinstance(r, AdmissionRejectedError)]
+        assert len(rejected) == 3
+
+    try:
+        asyncio.run(run())
+    finally:
+        settings.CHECKOUT_MAX_QUEUE_PER_PRODUCT = original_queue
+        settings.CHECKOUT_MAX_INFLIGHT_PER_PRODUCT = original_inflight
+
+
+def test_sold_out_fails_fast():
+    """Once marked sold out, checkouts fail until the marker is cleared"""
+    async def run():
+        admission.mark_sold_out([HOT_SKU])
+        try:
+            async with checkout_admission([HOT_SKU, "64b0000000000000000000bb"]):
+                raise AssertionError("should not be admitted")
+        except SoldOutError as e:
+            assert e.product_ids == [HOT_SKU]
+
+        admission.clear_sold_out([HOT_SKU])
+        async with checkout_admission([HOT_SKU]):
+            pass
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    for test_func in (test_inflight_capped_per_product, test_full_queue_rejects, test_sold_out_fails_fast):
+        setup_function()
+        test_func()
+        print(f"✅ PASS: {test_func.__name__}")
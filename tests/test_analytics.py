@@ -0,0 +1,56 @@
+"""
+SALES ROLLUP TEST
+Exercises the pure rollup helpers in utils/analytics.py (no server needed)
+"""
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from utils.analytics import bucket_start, rollup_increments, _expand
+
+PAID_AT = datetime(2024, 3, 5, 14, 37, 12, 5000)
+
+
+def test_bucket_start():
+    """Timestamps truncate to the start of their hour or day"""
+    assert bucket_start(PAID_AT, "hour") == datetime(2024, 3, 5, 14)
+    assert bucket_start(PAID_AT, "day") == datetime(2024, 3, 5)
+
+
+def test_rollup_increments():
+    """One order adds its totals plus per-product and per-category lines"""
+    order = {
+        "totalPrice": 130.5,
+        "orderItems": [
+            {"product": "p1", "qty": 2, "price": 25.0},
+            {"product": "p2", "qty": 1, "price": 60.0},
+        ],
+    }
+    inc = rollup_increments(order, {"p1": "Home.Office", "p2": "Electronics"})
+
+    assert inc["revenue"] == 130.5
+    assert inc["orders"] == 1
+    assert inc["units"] == 3
+    assert inc["itemsRevenue"] == 110.0
+    assert inc["products.p1.units"] == 2
+    assert inc["products.p1.revenue"] == 50.0
+    assert inc["categories.Home_Office.revenue"] == 50.0
+    assert inc["categories.Electronics.units"] == 1
+
+    doc = _expand({"granularity": "day"}, inc)
+    assert doc["products"]["p2"] == {"units": 1, "revenue": 60.0}
+    assert doc["categories"]["Home_Office"]["units"] == 2
+
+
+if __name__ == "__main__":
+    for test_func in (test_bucket_start, test_rollup_increments):
+        test_func()
+        print(f"✅ PASS: {test_func.__name__}")
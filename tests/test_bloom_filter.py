@@ -0,0 +1,96 @@
+"""
+TRANSACTION BLOOM FILTER TEST
+Checks utils/bloom_filter.py and how check_if_new_transaction in
+utils/paypal.py uses it, against the in-memory collections in
+fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+from models.order import Order, ArchivedOrder
+from utils import paypal
+from utils.bloom_filter import BloomFilter
+
+MODELS = (Order, ArchivedOrder)
+
+
+class SeesEverything:
+    """A filter whose every answer is a false positive"""
+
+    def __contains__(self, key):
+        return True
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    lookups = []
+    for model, name in ((Order, "orders"), (ArchivedOrder, "orders_archive")):
+        collection = db[name]
+        find_one = collection.find_one
+
+        async def counted(query, projection=None, name=name, find_one=find_one):
+            lookups.append(name)
+            return await find_one(query, projection)
+
+        collection.find_one = counted
+        monkeypatch.setattr(model, "get_motor_collection", lambda collection=collection: collection)
+    db.lookups = lookups
+    monkeypatch.setattr(paypal, "_seen_transactions", BloomFilter(capacity=1000))
+    return db
+
+
+def test_no_false_negatives():
+    seen = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"CAPTURE-{i}" for i in range(1000)]
+    for key in keys:
+        seen.add(key)
+    assert all(key in seen for key in keys)
+
+    false_positives = sum(f"OTHER-{i}" in seen for i in range(10000))
+    assert false_positives < 300
+
+
+def test_full_filter_resets():
+    seen = BloomFilter(capacity=10)
+    for i in range(10):
+        seen.add(f"CAPTURE-{i}")
+    seen.add("CAPTURE-10")
+    assert seen.count == 1 and "CAPTURE-10" in seen
+
+
+def test_unseen_id_skips_the_live_orders(db):
+    """Only the archive, which the live unique index cannot cover, is looked up"""
+    assert asyncio.run(paypal.check_if_new_transaction(MODELS, "CAPTURE-1")) is True
+    assert db.lookups == ["orders_archive"]
+
+
+def test_id_reported_as_seen_is_confirmed_in_the_database(db, monkeypatch):
+    """A false positive costs a lookup, never a rejected payment"""
+    monkeypatch.setattr(paypal, "_seen_transactions", SeesEverything())
+    assert asyncio.run(paypal.check_if_new_transaction(MODELS, "CAPTURE-1")) is True
+    assert sorted(db.lookups) == ["orders", "orders_archive"]
+
+    db["orders"].docs.append({"_id": ObjectId(), "paymentResult": {"id": "CAPTURE-2"}})
+    assert asyncio.run(paypal.check_if_new_transaction(MODELS, "CAPTURE-2")) is False
+
+
+def test_remember_transaction_marks_the_id_as_seen(db):
+    paypal.remember_transaction("CAPTURE-1")
+    assert "CAPTURE-1" in paypal._seen_transactions
+
+    db["orders"].docs.append({"_id": ObjectId(), "paymentResult": {"id": "CAPTURE-1"}})
+    assert asyncio.run(paypal.check_if_new_transaction(MODELS, "CAPTURE-1")) is False
+    assert "orders" in db.lookups
@@ -0,0 +1,96 @@
+"""
+BULK PRODUCT UPDATE TEST
+Exercises utils/bulk_products.py, with stock updates applied to the
+in-memory collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import io
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+from models.product import Product
+from models.stock_shard import StockShard
+from schemas.product import BulkPriceUpdate
+from utils.bulk_products import price_filter, new_price_expression, _collect, bulk_update_stock
+from utils.product_import import ImportReport
+
+ROWS = [
+    (2, {"sku": "A", "quantity": "5"}),
+    (3, {"sku": "B", "quantity": "-2"}),
+    (4, {"sku": "A", "quantity": "3"}),
+    (5, {"sku": "C", "quantity": "many"}),
+]
+
+
+def test_price_filter_and_expression():
+    update = BulkPriceUpdate(category="Electronics", mode="percent", value=-10)
+    assert price_filter(update) == {"category": "Electronics"}
+    assert new_price_expression(update) == {"$max": [0, {"$round": [{"$multiply": ["$price", 0.9]}, 2]}]}
+
+    absolute = BulkPriceUpdate(brand="Apple", mode="absolute", value=5, dryRun=True)
+    assert absolute.dry_run is True
+    assert new_price_expression(absolute)["$max"][1]["$round"][0] == {"$add": ["$price", 5]}
+
+
+def test_increment_rows_add_up():
+    report = ImportReport()
+    quantities = _collect(ROWS, "increment", report)
+    assert quantities == {"A": (4, 8), "B": (3, -2)}
+    assert report.duplicates == 1 and report.failed == 1
+    assert report.errors[0]["line"] == 5
+
+
+def test_set_rows_last_wins_and_reject_negative():
+    report = ImportReport()
+    quantities = _collect(ROWS, "set", report)
+    assert quantities == {"A": (4, 3)}
+    assert report.failed == 2
+
+
+def stock_levels(monkeypatch, csv, mode="increment"):
+    """Apply `csv` to an unsharded product A and a product B sharded two ways, both at 3"""
+    db = FakeDatabase()
+    monkeypatch.setattr(Product, "get_motor_collection", lambda: db["products"])
+    monkeypatch.setattr(StockShard, "get_motor_collection", lambda: db["stock_shards"])
+    single, sharded = ObjectId(), ObjectId()
+    db["products"].docs = [
+        {"_id": single, "sku": "A", "countInStock": 3, "stockShards": 0},
+        {"_id": sharded, "sku": "B", "countInStock": 3, "stockShards": 2},
+    ]
+    db["stock_shards"].docs = [
+        {"_id": ObjectId(), "product": sharded, "shard": 0, "stock": 2},
+        {"_id": ObjectId(), "product": sharded, "shard": 1, "stock": 1},
+    ]
+
+    result = asyncio.run(bulk_update_stock(io.BytesIO(csv.encode()), mode))
+    levels = {
+        "A": db["products"].docs[0]["countInStock"],
+        "B": sum(doc["stock"] for doc in db["stock_shards"].docs),
+    }
+    return result, levels
+
+
+def test_stock_decrements_stop_at_zero_sharded_or_not(monkeypatch):
+    result, levels = stock_levels(monkeypatch, "sku,quantity\nA,-5\nB,-5\n")
+    assert levels == {"A": 0, "B": 0}
+    assert result["updated"] == 2 and result["failed"] == 0
+
+
+def test_stock_increments_and_small_decrements(monkeypatch):
+    _, levels = stock_levels(monkeypatch, "sku,quantity\nA,-2\nB,-2\n")
+    assert levels == {"A": 1, "B": 1}
+    _, levels = stock_levels(monkeypatch, "sku,quantity\nA,4\nB,4\n")
+    assert levels == {"A": 7, "B": 7}
+    result, levels = stock_levels(monkeypatch, "sku,quantity\nA,9\nB,9\nC,1\n", mode="set")
+    assert levels == {"A": 9, "B": 9}
+    assert result["errors"] == [{"line": 4, "sku": "C", "error": "Unknown SKU"}]
@@ -0,0 +1,77 @@
+"""
+CART QUOTE TEST
+Checks calc_prices_batch against calc_prices and prices a cart from a warm
+price table (no server needed)
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from fastapi import HTTPException
+from utils import price_table
+from utils.calc_prices import calc_prices, calc_prices_batch
+from utils.product_changes import products_changed
+from routers.cart import quote_cart
+from schemas.order import CartQuoteRequest
+
+WIDGET = "64b0000000000000000000aa"
+GADGET = "64b0000000000000000000bb"
+
+
+def warm_table():
+    price_table._prices = {WIDGET: 19.99, GADGET: 45.5}
+    price_table._loaded_at = time.monotonic()
+    price_table._stale.clear()
+    price_table._stale_all = False
+
+
+def test_batch_matches_single_cart_prices():
+    rng = random.Random(7)
+    carts = [
+        [{"price": rng.randint(1, 20000) / 1000, "qty": rng.randint(1, 9)} for _ in range(rng.randint(1, 12))]
+        for _ in range(5000)
+    ]
+    carts.append([{"price": 33.335, "qty": 3}])
+    assert calc_prices_batch(carts) == [calc_prices(cart) for cart in carts]
+    assert calc_prices_batch([]) == []
+
+
+def test_quote_uses_price_table():
+    warm_table()
+    cart = CartQuoteRequest(cartItems=[{"_id": WIDGET, "qty": 2}, {"product": GADGET, "qty": 1}])
+    quote = asyncio.run(quote_cart(cart))
+    assert quote.items_price == 85.48
+    assert quote.shipping_price == 10
+    assert quote.total_price == calc_prices([{"price": 19.99, "qty": 2}, {"price": 45.5, "qty": 1}])["totalPrice"]
+
+    unknown = CartQuoteRequest(cartItems=[{"product": "64b0000000000000000000cc", "qty": 1}])
+    try:
+        asyncio.run(quote_cart(unknown))
+        assert False, "unknown product was quoted"
+    except HTTPException as e:
+        assert e.status_code == 404
+
+
+def test_product_changes_mark_prices_stale():
+    warm_table()
+    products_changed([WIDGET])
+    assert price_table._stale == {WIDGET}
+    products_changed()
+    assert price_table._needs_full_load()
+
+
+if __name__ == "__main__":
+    test_batch_matches_single_cart_prices()
+    test_quote_uses_price_table()
+    test_product_changes_mark_prices_stale()
+    print("✅ Cart quote tests passed")
@@ -0,0 +1,176 @@
+"""
+CATALOG FILTER TEST
+Checks listing filters, sort cursors, price buckets and the facet cache of
+utils/catalog.py, paging the listing over the in-memory collections in
+fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from fake_mongo import FakeDatabase
+from config.settings import settings
+from main import app
+from models.product import Product, Review
+from utils import catalog
+from utils.catalog import product_filter, product_sort, encode_cursor, after_cursor, _price_ranges, _cache_key
+from utils.product_changes import products_changed
+
+
+def test_product_filter():
+    assert product_filter() == {}
+    assert product_filter(categories=["Tools"], min_price=10, min_rating=4) == {
+        "category": "Tools", "price": {"$gte": 10}, "rating": {"$gte": 4}
+    }
+    query = product_filter(keyword="lamp", brands=["Zeta", "Acme", "Zeta"], max_price=99.5)
+    assert query["brand"] == {"$in": ["Acme", "Zeta"]}
+    assert query["price"] == {"$lte": 99.5}
+    assert query["name"] == {"$regex": "lamp", "$options": "i"}
+
+
+def test_sort_cursor_round_trip():
+    order = product_sort("newest")
+    assert order == [("createdAt", -1), ("_id", -1)]
+    assert product_sort(None) == [("_id", 1)]
+
+    tools = {"category": "Tools"}
+    last = {"_id": ObjectId(), "createdAt": datetime(2024, 5, 1, 12, 0, 0), "name": "Widget"}
+    query = after_cursor(tools, "newest", encode_cursor(last, "newest", tools))
+    assert query == {"$and": [
+        {"category": "Tools"},
+        {"$or": [
+            {"createdAt": {"$lt": last["createdAt"]}},
+            {"createdAt": last["createdAt"], "_id": {"$lt": last["_id"]}},
+        ]},
+    ]}
+
+    by_id = encode_cursor(last, None, {})
+    assert after_cursor({}, None, by_id) == {"_id": {"$gt": last["_id"]}}
+
+    try:
+        after_cursor({}, "newest", "not-a-cursor")
+        assert False, "cursor was accepted"
+    except ValueError as e:
+        assert str(e) == "Invalid cursor"
+
+
+def test_cursor_only_fits_its_own_sort_and_filters():
+    tools = {"category": "Tools"}
+    cursor = encode_cursor({"_id": ObjectId(), "price": 20.0}, "price", tools)
+    for query, sort in ((tools, "rating"), (tools, None), ({"category": "Lamps"}, "price"), ({}, "price")):
+        try:
+            after_cursor(query, sort, cursor)
+            assert False, f"cursor was accepted for {sort} {query}"
+        except ValueError as e:
+            assert str(e) == "Cursor was made for a different sort or filters"
+    assert after_cursor(dict(tools), "price", cursor)
+
+
+def test_listing_rejects_bad_sort_and_cursor():
+    client = TestClient(app)
+    assert client.get("/api/products?sort=cheapest").status_code == 422
+    response = client.get("/api/products?sort=price&cursor=garbage")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_listing_pages_by_cursor(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(Product, "get_motor_collection", lambda: db["products"])
+    monkeypatch.setattr(Review, "get_motor_collection", lambda: db["reviews"])
+    monkeypatch.setattr(settings, "PAGINATION_LIMIT", 2)
+    created = datetime(2024, 5, 1, 12, 0, 0)
+    db["products"].docs = [
+        {
+            "_id": ObjectId(), "user": ObjectId(), "name": f"Tool {i}", "image": "/images/tool.jpg", "brand": "Acme",
+            "category": "Tools", "description": "", "reviews": [], "rating": i % 3, "numReviews": 0,
+            "price": float(10 * (5 - i)), "countInStock": 1, "createdAt": created, "updatedAt": created
+        }
+        for i in range(5)
+    ]
+    client = TestClient(app)
+
+    first = client.get("/api/products?category=Tools&sort=price").json()
+    assert first["page"] == 1 and first["pages"] == 3
+    assert [p["price"] for p in first["products"]] == [10.0, 20.0]
+
+    second = client.get(f"/api/products?category=Tools&sort=price&cursor={first['nextCursor']}").json()
+    assert second["page"] is None
+    assert [p["price"] for p in second["products"]] == [30.0, 40.0]
+
+    sparse = client.get(f"/api/products?category=Tools&sort=price&fields=name&cursor={first['nextCursor']}").json()
+    assert sparse["page"] is None and [p["name"] for p in sparse["products"]] == ["Tool 2", "Tool 1"]
+
+    for replay in ("category=Tools&sort=rating", "sort=price", "category=Tools&brand=Acme&sort=price"):
+        response = client.get(f"/api/products?{replay}&cursor={first['nextCursor']}")
+        assert response.status_code == 400, replay
+
+
+def test_price_ranges_skip_empty_buckets():
+    buckets = [{"_id": 10.0, "count": 4}, {"_id": 1000.0, "count": 2}, {"_id": "other", "count": 1}]
+    assert _price_ranges(buckets) == [
+        {"min": 10.0, "max": 25.0, "count": 4},
+        {"min": 1000.0, "max": None, "count": 2},
+    ]
+
+
+def test_facets_endpoint_serves_cache_until_products_change():
+    query = product_filter(categories=["Tools"], brands=["Acme"], min_price=5.0)
+    cached = {"total": 3, "categories": [{"value": "Tools", "count": 3}], "brands": [], "prices": []}
+    catalog._facets.set(_cache_key(query), cached)
+
+    response = TestClient(app).get("/api/products/facets?category=Tools&brand=Acme&minPrice=5")
+    assert response.status_code == 200
+    assert response.json() == cached
+
+    products_changed(["64b0000000000000000000aa"])
+    assert len(catalog._facets) == 0
+
+
+def test_facets_computed_across_a_change_are_not_cached(monkeypatch):
+    """An aggregation that was running when products changed must not cache what it counted"""
+    query = product_filter(categories=["Lamps"])
+    result = {"categories": [{"_id": "Lamps", "count": 2}], "brands": [], "prices": [], "total": [{"count": 2}]}
+
+    class Products:
+        changed = False
+
+        def aggregate(self, pipeline):
+            return self
+
+        async def to_list(self, length):
+            if self.changed:
+                products_changed(["64b0000000000000000000aa"])
+            return [result]
+
+    products = Products()
+    monkeypatch.setattr(Product, "get_motor_collection", lambda: products)
+
+    products.changed = True
+    assert asyncio.run(catalog.product_facets(query))["total"] == 2
+    assert catalog._facets.get(_cache_key(query)) is None
+
+    products.changed = False
+    asyncio.run(catalog.product_facets(query))
+    assert catalog._facets.get(_cache_key(query))["total"] == 2
+
+
+if __name__ == "__main__":
+    test_product_filter()
+    test_sort_cursor_round_trip()
+    test_cursor_only_fits_its_own_sort_and_filters()
+    test_listing_rejects_bad_sort_and_cursor()
+    test_price_ranges_skip_empty_buckets()
+    test_facets_endpoint_serves_cache_until_products_change()
+    print("✅ Catalog filter tests passed")
@@ -164,7 +164,7 @@ def test_complete_shopping_journey():
         json=payment_data
     )
     
-    if response.status_code != 200:
+    if response.status_code != 202:
         test_fail(f"Payment failed: {response.text}")
         return False
     
@@ -328,7 +328,7 @@ def test_payment_flow(session, order):
     
     print_info(f"Payment response status: {response.status_code}")
     
-    if response.status_code != 200:
+    if response.status_code != 202:
         print_error(f"Payment failed: {response.text}")
         return False
     
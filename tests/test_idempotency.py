@@ -0,0 +1,98 @@
+"""
+IDEMPOTENCY TEST
+Retries with the same Idempotency-Key must replay, not re-execute
+Requires the API running on BASE_URL with seeded data
+"""
+import requests
+import time
+import uuid
+from datetime import datetime
+
+BASE_URL = "http://localhost:5000"
+
+
+def login(email="john@email.com", password="123456"):
+    session = requests.Session()
+    response = session.post(
+        f"{BASE_URL}/api/users/auth",
+        json={"email": email, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    return session
+
+
+def make_order_payload(session):
+    product = session.get(f"{BASE_URL}/api/products").json()["products"][0]
+    return {
+        "orderItems": [{
+            "name": product["name"],
+            "qty": 1,
+            "image": product["image"],
+            "price": product["price"],
+            "product": product["_id"]
+        }],
+        "shippingAddress": {
+            "address": "1 Retry Lane",
+            "city": "Test City",
+            "postalCode": "12345",
+            "country": "Test Country"
+        },
+        "paymentMethod": "PayPal"
+    }
+
+
+def test_order_creation_replayed():
+    """Same key + same body returns the original order"""
+    session = login()
+    payload = make_order_payload(session)
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = session.post(f"{BASE_URL}/api/orders", json=payload, headers=headers)
+    second = session.post(f"{BASE_URL}/api/orders", json=payload, headers=headers)
+
+    assert first.status_code == 201, first.text
+    assert second.status_code == 201, second.text
+    assert second.headers.get("Idempotent-Replayed") == "true"
+    assert first.json()["_id"] == second.json()["_id"]
+    return True
+
+
+def test_key_reuse_with_different_body_rejected():
+    """Same key + different body is a client error"""
+    session = login()
+    payload = make_order_payload(session)
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    assert session.post(f"{BASE_URL}/api/orders", json=payload, headers=headers).status_code == 201
+    payload["orderItems"][0]["qty"] = 2
+    response = session.post(f"{BASE_URL}/api/orders", json=payload, headers=headers)
+    assert response.status_code == 422, response.text
+    return True
+
+
+def test_payment_replayed():
+    """A retried pay call replays instead of hitting the duplicate-transaction check"""
+    session = login()
+    order = session.post(f"{BASE_URL}/api/orders", json=make_order_payload(session)).json()
+    payment_data = {
+        "id": f"IDEMPOTENT_{int(time.time() * 1000)}",
+        "status": "COMPLETED",
+        "update_time": datetime.utcnow().isoformat(),
+        "payer": {"email_address": "buyer@example.com"}
+    }
+    headers = {"Idempotency-Key": payment_data["id"]}
+
+    first = session.put(f"{BASE_URL}/api/orders/{order['_id']}/pay", json=payment_data, headers=headers)
+    second = session.put(f"{BASE_URL}/api/orders/{order['_id']}/pay", json=payment_data, headers=headers)
+
+    assert first.status_code == 202, first.text
+    assert second.status_code == 202, second.text
+    assert second.json()["paidAt"] == first.json()["paidAt"]
+    return True
+
+
+if __name__ == "__main__":
+    for test_func in (test_order_creation_replayed, test_key_reuse_with_different_body_rejected,
+                      test_payment_replayed):
+        test_func()
+        print(f"✅ PASS: {test_func.__name__}")
@@ -0,0 +1,129 @@
+"""
+IDEMPOTENCY LEASE TEST
+Runs run_idempotent in utils/idempotency.py against the in-memory
+collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from fake_mongo import FakeDatabase
+from config.settings import settings
+from models.idempotency import IdempotencyRecord
+from utils import idempotency
+from utils.idempotency import run_idempotent, request_fingerprint
+from utils.ttl_cache import TTLCache
+
+PAYLOAD = {"id": "CAPTURE-1"}
+KEY = "user:PUT /api/orders/1/pay:CAPTURE-1"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    db.collection("idempotency_keys", unique=[("key", None)])
+    monkeypatch.setattr(IdempotencyRecord, "get_motor_collection", lambda: db["idempotency_keys"])
+    monkeypatch.setattr(idempotency, "_completed", TTLCache(maxsize=100, ttl=60))
+    return db
+
+
+def run(handler, payload=PAYLOAD):
+    return asyncio.run(run_idempotent("CAPTURE-1", "user:PUT /api/orders/1/pay", payload, handler))
+
+
+def abandoned(db, age, payload=PAYLOAD, leased=True):
+    """An in-progress record left by a process that died `age` seconds into its request"""
+    started = datetime.utcnow() - timedelta(seconds=age)
+    record = {
+        "_id": ObjectId(), "key": KEY, "fingerprint": request_fingerprint(payload),
+        "state": "in_progress", "createdAt": started
+    }
+    if leased:
+        record["leaseId"] = "dead-process"
+        record["lockedUntil"] = started + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    db["idempotency_keys"].docs.append(record)
+    return record
+
+
+def test_retry_replays_the_first_response(db):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return {"isPaid": True}
+
+    assert run(handler) == {"isPaid": True}
+    stored, = db["idempotency_keys"].docs
+    assert stored["state"] == "completed" and "leaseId" not in stored and "lockedUntil" not in stored
+
+    idempotency._completed.clear()
+    replay = run(handler)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert calls == [1]
+
+
+def test_request_in_progress_is_rejected(db):
+    abandoned(db, 1)
+
+    async def handler():
+        raise AssertionError("ran twice")
+
+    with pytest.raises(HTTPException) as error:
+        run(handler)
+    assert error.value.status_code == 409
+
+
+def test_stale_in_progress_record_is_reclaimed(db):
+    """A retry after the owner's lease ran out runs the handler instead of getting 409 until the TTL"""
+    for record in (
+        abandoned(db, settings.IDEMPOTENCY_LEASE_SECONDS + 1),
+        abandoned(db, settings.IDEMPOTENCY_LEASE_SECONDS + 1, leased=False)
+    ):
+        db["idempotency_keys"].docs = [record]
+
+        async def handler():
+            return {"isPaid": True}
+
+        assert run(handler) == {"isPaid": True}
+        stored, = db["idempotency_keys"].docs
+        assert stored["_id"] == record["_id"] and stored["state"] == "completed"
+        idempotency._completed.clear()
+
+
+def test_stale_record_for_another_request_is_not_reclaimed(db):
+    abandoned(db, settings.IDEMPOTENCY_LEASE_SECONDS + 1, payload={"id": "CAPTURE-2"})
+
+    async def handler():
+        raise AssertionError("ran for a different request")
+
+    with pytest.raises(HTTPException) as error:
+        run(handler)
+    assert error.value.status_code == 409
+
+
+def test_owner_whose_lease_was_taken_over_leaves_the_record_alone(db):
+    """A slow owner finishing after a retry reclaimed its key neither completes nor deletes the new claim"""
+    taken = []
+
+    async def slow_handler():
+        doc, = db["idempotency_keys"].docs
+        doc["lockedUntil"] = datetime.utcnow() - timedelta(seconds=1)
+        taken.append(await idempotency._claim(db["idempotency_keys"], KEY, request_fingerprint(PAYLOAD)))
+        raise RuntimeError("PayPal timed out")
+
+    with pytest.raises(RuntimeError):
+        run(slow_handler)
+    stored, = db["idempotency_keys"].docs
+    assert stored["state"] == "in_progress" and stored["leaseId"] == taken[0]["leaseId"]
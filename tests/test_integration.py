@@ -446,7 +446,7 @@ def test_pay_order():
     
     print(f"Status: {response.status_code}")
     
-    if response.status_code == 200:
+    if response.status_code == 202:
         paid_order = response.json()
         print(f"Payment status: {'PAID' if paid_order['isPaid'] else 'NOT PAID'}")
         print(f"Paid at: {paid_order.get('paidAt', 'N/A')}")
@@ -0,0 +1,93 @@
+"""
+INVENTORY RESERVATION TEST
+Concurrent checkouts on one SKU must never oversell
+Requires the API running on BASE_URL with seeded data
+"""
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = "http://localhost:5000"
+
+
+def login(email, password="123456"):
+    session = requests.Session()
+    response = session.post(
+        f"{BASE_URL}/api/users/auth",
+        json={"email": email, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    return session
+
+
+def create_order(session, product, qty=1):
+    return session.post(f"{BASE_URL}/api/orders", json={
+        "orderItems": [{
+            "name": product["name"],
+            "qty": qty,
+            "image": product["image"],
+            "price": product["price"],
+            "product": product["_id"]
+        }],
+        "shippingAddress": {
+            "address": "1 Flash Sale Way",
+            "city": "Test City",
+            "postalCode": "12345",
+            "country": "Test Country"
+        },
+        "paymentMethod": "PayPal"
+    })
+
+
+def test_concurrent_checkouts_do_not_oversell():
+    """20 buyers racing for 5 units: exactly 5 orders succeed"""
+    admin = login("admin@email.com")
+    product = admin.get(f"{BASE_URL}/api/products").json()["products"][0]
+    original_stock = product["countInStock"]
+    admin.put(f"{BASE_URL}/api/products/{product['_id']}", json={"countInStock": 5})
+
+    buyers = [login("john@email.com") for _ in range(20)]
+    try:
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            responses = list(pool.map(lambda s: create_order(s, product), buyers))
+
+        created = [r for r in responses if r.status_code == 201]
+        rejected = [r for r in responses if r.status_code == 400]
+        assert len(created) == 5, [r.status_code for r in responses]
+        assert len(rejected) == 15
+        assert "Insufficient stock" in rejected[0].json()["detail"]
+
+        stock = admin.get(f"{BASE_URL}/api/products/{product['_id']}").json()["countInStock"]
+        assert stock == 0
+    finally:
+        admin.put(f"{BASE_URL}/api/products/{product['_id']}", json={"countInStock": original_stock})
+    return True
+
+
+def test_multi_item_order_is_all_or_nothing():
+    """If one line is short, stock taken for the other lines is put back"""
+    admin = login("admin@email.com")
+    first, second = admin.get(f"{BASE_URL}/api/products").json()["products"][:2]
+    admin.put(f"{BASE_URL}/api/products/{second['_id']}", json={"countInStock": 0})
+
+    try:
+        response = admin.post(f"{BASE_URL}/api/orders", json={
+            "orderItems": [
+                {"name": p["name"], "qty": 1, "image": p["image"], "price": p["price"], "product": p["_id"]}
+                for p in (first, second)
+            ],
+            "shippingAddress": {"address": "1 Test St", "city": "Test", "postalCode": "1", "country": "Test"},
+            "paymentMethod": "PayPal"
+        })
+        assert response.status_code == 400, response.text
+
+        stock = admin.get(f"{BASE_URL}/api/products/{first['_id']}").json()["countInStock"]
+        assert stock == first["countInStock"]
+    finally:
+        admin.put(f"{BASE_URL}/api/products/{second['_id']}", json={"countInStock": second["countInStock"]})
+    return True
+
+
+if __name__ == "__main__":
+    for test_func in (test_concurrent_checkouts_do_not_oversell, test_multi_item_order_is_all_or_nothing):
+        test_func()
+        print(f"✅ PASS: {test_func.__name__}")
@@ -0,0 +1,89 @@
+"""
+LEAN READ TEST
+Checks that raw order documents serialize exactly like loaded Order
+documents (no server needed)
+"""
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from bson import ObjectId, DBRef
+from models.order import OrderItem, ShippingAddress, PaymentResult
+from utils.order_serializer import serialize_order, serialize_order_doc
+from utils.lean_reads import _link_id
+
+CREATED = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def raw_order(payment=None):
+    return {
+        "_id": ObjectId(),
+        "user": ObjectId(),
+        "orderItems": [
+            {"name": "Widget", "qty": 2, "image": "/w.jpg", "price": 9.5, "product": ObjectId()},
+            {"name": "Gadget", "qty": 1, "image": "/g.jpg", "price": 20.0, "product": ObjectId()},
+        ],
+        "shippingAddress": {"address": "1 Main St", "city": "Springfield", "postalCode": "12345", "country": "US"},
+        "paymentMethod": "PayPal",
+        "paymentResult": payment,
+        "itemsPrice": 39.0,
+        "taxPrice": 5.85,
+        "shippingPrice": 10.0,
+        "totalPrice": 54.85,
+        "isPaid": payment is not None,
+        "paidAt": CREATED if payment else None,
+        "isDelivered": False,
+        "deliveredAt": None,
+        "stockReserved": True,
+        "createdAt": CREATED,
+        "updatedAt": CREATED,
+    }
+
+
+def as_loaded(doc):
+    """The attribute view serialize_order reads from a loaded Order"""
+    return SimpleNamespace(
+        id=doc["_id"],
+        user=doc["user"],
+        order_items=[OrderItem.model_validate(item) for item in doc["orderItems"]],
+        shipping_address=ShippingAddress.model_validate(doc["shippingAddress"]),
+        payment_method=doc["paymentMethod"],
+        payment_result=PaymentResult.model_validate(doc["paymentResult"]) if doc["paymentResult"] else None,
+        items_price=doc["itemsPrice"],
+        tax_price=doc["taxPrice"],
+        shipping_price=doc["shippingPrice"],
+        total_price=doc["totalPrice"],
+        is_paid=doc["isPaid"],
+        paid_at=doc["paidAt"],
+        is_delivered=doc["isDelivered"],
+        delivered_at=doc["deliveredAt"],
+        created_at=doc["createdAt"],
+        updated_at=doc["updatedAt"],
+    )
+
+
+def test_raw_order_serializes_like_loaded_order():
+    for payment in (None, {"id": "PAY-1", "status": "COMPLETED", "email_address": "a@b.c"}):
+        doc = raw_order(payment)
+        assert serialize_order_doc(doc) == serialize_order(as_loaded(doc))
+
+
+def test_link_id_accepts_dbrefs_and_bare_ids():
+    review_id = ObjectId()
+    assert _link_id(DBRef("reviews", review_id)) == review_id
+    assert _link_id(review_id) == review_id
+
+
+if __name__ == "__main__":
+    test_raw_order_serializes_like_loaded_order()
+    test_link_id_accepts_dbrefs_and_bare_ids()
+    print("✅ Lean read tests passed")
@@ -0,0 +1,138 @@
+"""
+ORDER ARCHIVE TEST
+Moves orders between the tiers in utils/order_archive.py using the
+in-memory collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+from config.settings import settings
+from models.order import Order, ArchivedOrder
+from routers import orders as orders_router
+from utils import paypal
+from utils.order_archive import archive_delivered_orders, get_order_any_tier, find_user_orders, find_all_orders
+
+NOW = datetime.utcnow()
+OLD = NOW - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS + 1)
+PAID_ONLY = {"paymentResult.id": {"$type": "string"}}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    db.collection("orders", unique=[("paymentResult.id", PAID_ONLY)])
+    db.collection("orders_archive", unique=[("paymentResult.id", PAID_ONLY)])
+    monkeypatch.setattr(Order, "get_motor_collection", lambda: db["orders"])
+    monkeypatch.setattr(ArchivedOrder, "get_motor_collection", lambda: db["orders_archive"])
+    return db
+
+
+def order(user, created_at, delivered_at=None, payment_id=None):
+    return {
+        "_id": ObjectId(), "user": user, "createdAt": created_at, "isPaid": payment_id is not None,
+        "paymentResult": {"id": payment_id} if payment_id else None,
+        "isDelivered": delivered_at is not None, "deliveredAt": delivered_at
+    }
+
+
+def test_archive_moves_old_delivered_orders(db):
+    user = ObjectId()
+    old = order(user, OLD, delivered_at=OLD, payment_id="CAPTURE-1")
+    recent = order(user, NOW, delivered_at=NOW, payment_id="CAPTURE-2")
+    pending = order(user, OLD)
+    db["orders"].docs = [old, recent, pending]
+
+    assert asyncio.run(archive_delivered_orders()) == 1
+    assert [doc["_id"] for doc in db["orders"].docs] == [recent["_id"], pending["_id"]]
+    assert [doc["_id"] for doc in db["orders_archive"].docs] == [old["_id"]]
+    assert asyncio.run(archive_delivered_orders()) == 0
+
+
+def test_interrupted_archive_is_finished_on_the_next_run(db):
+    """A copy left by a run that died before its delete is skipped, and the order still leaves the hot tier"""
+    old = order(ObjectId(), OLD, delivered_at=OLD)
+    db["orders"].docs = [dict(old)]
+    db["orders_archive"].docs = [dict(old)]
+
+    assert asyncio.run(archive_delivered_orders()) == 1
+    assert db["orders"].docs == []
+    assert len(db["orders_archive"].docs) == 1
+
+
+def test_get_order_any_tier(db):
+    hot, archived = order(ObjectId(), NOW), order(ObjectId(), OLD, delivered_at=OLD)
+    db["orders"].docs = [hot]
+    db["orders_archive"].docs = [archived]
+
+    assert asyncio.run(get_order_any_tier(hot["_id"]))["_id"] == hot["_id"]
+    assert asyncio.run(get_order_any_tier(archived["_id"], {"isDelivered": 1})) == {
+        "_id": archived["_id"], "isDelivered": True
+    }
+    assert asyncio.run(get_order_any_tier(ObjectId())) is None
+
+
+def test_find_user_orders_pages_across_tiers(db):
+    """Pages follow createdAt order whichever tier each order is in"""
+    user = ObjectId()
+    orders = [order(user, OLD + timedelta(hours=i)) for i in range(7)]
+    db["orders_archive"].docs = [orders[i] for i in (0, 2, 3, 5)]
+    db["orders"].docs = [orders[i] for i in (6, 1, 4)] + [order(ObjectId(), OLD)]
+
+    def page(skip, limit):
+        return [doc["_id"] for doc in asyncio.run(find_user_orders(user, skip=skip, limit=limit))]
+
+    expected = [doc["_id"] for doc in orders]
+    assert page(0, 3) == expected[0:3]
+    assert page(3, 3) == expected[3:6]
+    assert page(6, 3) == expected[6:]
+    assert page(0, None) == expected
+
+
+def test_find_all_orders_includes_the_archive(db):
+    hot, archived = order(ObjectId(), NOW), order(ObjectId(), OLD, delivered_at=OLD)
+    db["orders"].docs = [hot]
+    db["orders_archive"].docs = [archived]
+
+    assert [doc["_id"] for doc in asyncio.run(find_all_orders())] == [hot["_id"], archived["_id"]]
+    assert asyncio.run(find_all_orders({"isDelivered": 1}))[1] == {"_id": archived["_id"], "isDelivered": True}
+
+
+def test_delivering_an_archived_order_returns_it_unchanged(db, monkeypatch):
+    async def not_hot(order_id):
+        return None
+
+    monkeypatch.setattr(Order, "get", not_hot)
+    archived = {
+        **order(ObjectId(), OLD, delivered_at=OLD, payment_id="CAPTURE-1"),
+        "orderItems": [{"name": "Desk", "qty": 1, "image": "/images/desk.jpg", "price": 100.0, "product": ObjectId()}],
+        "shippingAddress": {"address": "1 Main St", "city": "Springfield", "postalCode": "12345", "country": "US"},
+        "paymentMethod": "PayPal", "itemsPrice": 100.0, "taxPrice": 15.0, "shippingPrice": 10.0,
+        "totalPrice": 125.0, "paidAt": OLD, "updatedAt": OLD
+    }
+    db["orders_archive"].docs = [archived]
+
+    response = asyncio.run(orders_router.update_order_to_delivered(str(archived["_id"]), None))
+    assert response.is_delivered and response.delivered_at == OLD
+    assert db["orders_archive"].docs[0]["deliveredAt"] == OLD
+
+
+def test_archived_transaction_cannot_pay_again(db, monkeypatch):
+    """The hot tier's unique index cannot see archived captures, so they are always looked up"""
+    monkeypatch.setattr(paypal, "_seen_transactions", paypal.BloomFilter(capacity=100))
+    db["orders_archive"].docs = [order(ObjectId(), OLD, delivered_at=OLD, payment_id="CAPTURE-1")]
+
+    assert asyncio.run(paypal.check_if_new_transaction((Order, ArchivedOrder), "CAPTURE-1")) is False
+    assert asyncio.run(paypal.check_if_new_transaction((Order, ArchivedOrder), "CAPTURE-2")) is True
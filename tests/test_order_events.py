@@ -0,0 +1,109 @@
+"""
+ORDER EVENTS TEST
+Exercises the in-process order event bus and SSE framing (no server needed)
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from config.settings import settings
+from utils import order_events
+
+
+class FakeRequest:
+    """Just enough of starlette's Request for stream_order_events"""
+
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def test_events_routed_by_order():
+    """Per-order subscribers only see their order; the firehose sees all"""
+    async def run():
+        mine = order_events.subscribe("order-1")
+        firehose = order_events.subscribe()
+        order_events.publish_order_event("order-1", "user-1", "paid", {"isPaid": True})
+        order_events.publish_order_event("order-2", "user-2", "delivered", {"isDelivered": True})
+
+        assert mine.queue.qsize() == 1
+        assert firehose.queue.qsize() == 2
+        assert (await mine.queue.get())["isPaid"] is True
+
+        order_events.unsubscribe(mine)
+        order_events.unsubscribe(firehose)
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_drops_oldest_and_resyncs():
+    """A full inbox never blocks publishers and the stream emits a resync"""
+    original_size = settings.SSE_QUEUE_SIZE
+    settings.SSE_QUEUE_SIZE = 2
+
+    async def run():
+        stream = order_events.stream_order_events(FakeRequest(), "order-3")
+        assert (await stream.__anext__()).startswith("retry:")
+        subscription, = [s for s in order_events._subscribers if s.order_id == "order-3"]
+        for i in range(5):
+            order_events.publish_order_event("order-3", "user-3", "paid", {"seq": i})
+
+        resync = await stream.__anext__()
+        assert resync.startswith("event: resync")
+        assert json.loads(resync.split("data: ", 1)[1])["dropped"] == 3
+
+        frame = await stream.__anext__()
+        assert json.loads(frame.split("data: ", 1)[1])["seq"] == 3
+        await stream.aclose()
+        assert subscription not in order_events._subscribers
+
+    try:
+        asyncio.run(run())
+    finally:
+        settings.SSE_QUEUE_SIZE = original_size
+
+
+def test_heartbeat_when_idle():
+    """Idle streams send comment heartbeats"""
+    original_heartbeat = settings.SSE_HEARTBEAT_SECONDS
+    settings.SSE_HEARTBEAT_SECONDS = 0.1
+
+    async def run():
+        stream = order_events.stream_order_events(FakeRequest(), "order-4")
+        await stream.__anext__()
+        assert await stream.__anext__() == ": heartbeat\n\n"
+        await stream.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        settings.SSE_HEARTBEAT_SECONDS = original_heartbeat
+
+
+def test_stream_never_started_leaves_no_subscriber():
+    """A client gone before the body streams must not leave an inbox behind"""
+    async def run():
+        before = len(order_events._subscribers)
+        stream = order_events.stream_order_events(FakeRequest(), "order-5")
+        await stream.aclose()
+        assert len(order_events._subscribers) == before
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    for test_func in (test_events_routed_by_order, test_slow_subscriber_drops_oldest_and_resyncs,
+                      test_heartbeat_when_idle, test_stream_never_started_leaves_no_subscriber):
+        test_func()
+        print(f"✅ PASS: {test_func.__name__}")
@@ -0,0 +1,164 @@
+"""
+UNPAID ORDER EXPIRY TEST
+Runs utils/order_expiry.py and the pay path in routers/orders.py against
+the in-memory collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from fake_mongo import FakeDatabase
+from config.settings import settings
+from models.order import Order, ArchivedOrder
+from models.product import Product
+from models.stock_shard import StockShard
+from routers import orders as orders_router
+from utils import order_expiry
+from utils.order_expiry import expire_unpaid_orders
+
+NOW = datetime.utcnow()
+STALE = NOW - timedelta(seconds=settings.UNPAID_ORDER_TTL + 60)
+DESK = ObjectId()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    # Static, since Order() itself looks its collection up on the instance
+    monkeypatch.setattr(Order, "get_motor_collection", staticmethod(lambda: db["orders"]))
+    monkeypatch.setattr(ArchivedOrder, "get_motor_collection", lambda: db["orders_archive"])
+    monkeypatch.setattr(Product, "get_motor_collection", lambda: db["products"])
+    monkeypatch.setattr(StockShard, "get_motor_collection", lambda: db["stock_shards"])
+    db["products"].docs = [{"_id": DESK, "countInStock": 10}]
+    return db
+
+
+@pytest.fixture
+def events(monkeypatch):
+    published = []
+    for module in (order_expiry, orders_router):
+        monkeypatch.setattr(
+            module, "publish_order_event", lambda order_id, user, kind, data: published.append((order_id, kind))
+        )
+    return published
+
+
+def order(created_at, qty=1, reserved=True, paid=False):
+    return {
+        "_id": ObjectId(), "user": ObjectId(), "createdAt": created_at, "updatedAt": created_at,
+        "orderItems": [{"name": "Desk", "qty": qty, "image": "/images/desk.jpg", "price": 100.0, "product": DESK}],
+        "shippingAddress": {"address": "1 Main St", "city": "Springfield", "postalCode": "12345", "country": "US"},
+        "paymentMethod": "PayPal", "paymentResult": None, "itemsPrice": 100.0, "taxPrice": 15.0,
+        "shippingPrice": 10.0, "totalPrice": 125.0, "isPaid": paid, "paidAt": NOW if paid else None,
+        "isDelivered": False, "deliveredAt": None, "stockReserved": reserved
+    }
+
+
+def stock(db):
+    return db["products"].docs[0]["countInStock"]
+
+
+def test_expires_stale_unpaid_orders(db, events):
+    reserved, lapsed = order(STALE, qty=3), order(STALE, qty=2, reserved=False)
+    paid, fresh = order(STALE, paid=True), order(NOW)
+    db["orders"].docs = [reserved, lapsed, paid, fresh]
+
+    assert asyncio.run(expire_unpaid_orders()) == 2
+    assert [doc["_id"] for doc in db["orders"].docs] == [paid["_id"], fresh["_id"]]
+
+    archived = db["expired_orders"].docs
+    assert [doc["_id"] for doc in archived] == [reserved["_id"], lapsed["_id"]]
+    assert all(doc["expiredAt"] >= NOW for doc in archived)
+    # Only the order still holding its reservation gives stock back
+    assert stock(db) == 13
+    assert sorted(events) == sorted([(str(reserved["_id"]), "expired"), (str(lapsed["_id"]), "expired")])
+    assert asyncio.run(expire_unpaid_orders()) == 0
+
+
+def test_order_paid_during_the_sweep_is_kept(db, events):
+    """An order paid between the read and the claim is neither expired nor left in the archive"""
+    stale = order(STALE)
+    db["orders"].docs = [stale]
+    claim = db["orders"].find_one_and_delete
+
+    async def paid_first(query, **kwargs):
+        db["orders"].docs[0]["isPaid"] = True
+        return await claim(query, **kwargs)
+
+    db["orders"].find_one_and_delete = paid_first
+    assert asyncio.run(expire_unpaid_orders()) == 0
+    assert db["orders"].docs[0]["isPaid"] is True
+    assert db["expired_orders"].docs == []
+    assert stock(db) == 10 and events == []
+
+
+def test_archive_can_be_turned_off(db, events, monkeypatch):
+    monkeypatch.setattr(settings, "UNPAID_ORDER_ARCHIVE", False)
+    db["orders"].docs = [order(STALE)]
+
+    assert asyncio.run(expire_unpaid_orders()) == 1
+    assert db["orders"].docs == [] and "expired_orders" not in db.collections
+
+
+def pay(monkeypatch, doc, payment_id="CAPTURE-1"):
+    """Pay for `doc` as loaded before anything else touched it"""
+    loaded = Order.model_validate(doc)
+
+    async def get(order_id):
+        return loaded
+
+    monkeypatch.setattr(Order, "get", get)
+    monkeypatch.setattr(orders_router, "enqueue_verification", lambda *args: True)
+
+    async def record_paid_order(order):
+        pass
+
+    monkeypatch.setattr(orders_router, "record_paid_order", record_paid_order)
+    return asyncio.run(orders_router._record_payment(str(doc["_id"]), {"id": payment_id}))
+
+
+def test_payment_marks_the_order_paid(db, events, monkeypatch):
+    doc = order(NOW)
+    db["orders"].docs = [dict(doc)]
+
+    response = pay(monkeypatch, doc)
+    assert response.is_paid
+    stored = db["orders"].docs[0]
+    assert stored["isPaid"] is True and stored["paymentResult"]["id"] == "CAPTURE-1"
+    assert stored["paymentResult"]["verification_queued_at"] == stored["paidAt"]
+    assert stored["stockReserved"] is True and stock(db) == 10
+
+
+def test_payment_cannot_resurrect_an_expired_order(db, events, monkeypatch):
+    """Expiry deleting the order between the pay path's read and write wins, and stock taken again goes back"""
+    doc = order(STALE, qty=4, reserved=False)
+    db["orders"].docs = [dict(doc)]
+    asyncio.run(expire_unpaid_orders())
+
+    with pytest.raises(HTTPException) as error:
+        pay(monkeypatch, doc)
+    assert error.value.status_code == 404
+    assert db["orders"].docs == []
+    assert stock(db) == 10
+
+
+def test_second_concurrent_payment_is_rejected(db, events, monkeypatch):
+    doc = order(NOW)
+    db["orders"].docs = [{**doc, "isPaid": True, "paymentResult": {"id": "CAPTURE-1"}}]
+
+    with pytest.raises(HTTPException) as error:
+        pay(monkeypatch, doc, payment_id="CAPTURE-2")
+    assert error.value.status_code == 400
+    assert db["orders"].docs[0]["paymentResult"]["id"] == "CAPTURE-1"
@@ -0,0 +1,115 @@
+"""
+PARTIAL UPDATE TEST
+Runs utils/partial_update.py and the product PUT handler against the
+in-memory collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import DBRef, ObjectId
+from fastapi import HTTPException
+from fake_mongo import FakeDatabase
+from models.product import Product, Review
+from models.stock_shard import StockShard
+from routers import products as products_router
+from routers.products import update_product
+from schemas.product import ProductUpdate
+from utils.partial_update import update_fields
+from utils.stock_shards import configure_stock_shards
+
+CREATED = datetime(2024, 5, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(Product, "get_motor_collection", lambda: db["products"])
+    monkeypatch.setattr(Review, "get_motor_collection", lambda: db["reviews"])
+    monkeypatch.setattr(StockShard, "get_motor_collection", lambda: db["stock_shards"])
+    return db
+
+
+def product(db, **fields):
+    review = {
+        "_id": ObjectId(), "name": "Ann", "rating": 5, "comment": "Sturdy", "user": ObjectId(), "createdAt": CREATED
+    }
+    db["reviews"].docs.append(review)
+    doc = {
+        "_id": ObjectId(), "user": ObjectId(), "name": "Desk", "image": "/images/desk.jpg", "brand": "Oakly",
+        "category": "Furniture", "description": "Oak desk", "reviews": [DBRef("reviews", review["_id"])],
+        "rating": 5.0, "numReviews": 1, "price": 120.0, "countInStock": 4, "stockShards": 0,
+        "createdAt": CREATED, "updatedAt": CREATED, **fields
+    }
+    db["products"].docs.append(doc)
+    return doc
+
+
+def test_update_fields_sets_only_supplied_fields(db):
+    doc = product(db)
+    updated = asyncio.run(update_fields(Product, doc["_id"], {"price": 99.5}, {"price": 1, "updatedAt": 1}))
+    assert set(updated) == {"_id", "price", "updatedAt"}
+    assert updated["price"] == 99.5 and updated["updatedAt"] > CREATED
+    assert db["products"].docs[0]["name"] == "Desk"
+
+
+def test_update_fields_wraps_values_in_literal_for_pipelines(db):
+    """With computed expressions a "$"-prefixed string is stored as text, not read as a field path"""
+    doc = product(db)
+    updated = asyncio.run(update_fields(
+        Product, doc["_id"], {"name": "$5 off", "brand": "$price"},
+        computed={"countInStock": {"$add": ["$countInStock", 1]}}
+    ))
+    assert updated["name"] == "$5 off" and updated["brand"] == "$price"
+    assert updated["countInStock"] == 5
+
+
+def test_update_fields_missing_document(db):
+    assert asyncio.run(update_fields(Product, ObjectId(), {"price": 1.0})) is None
+    assert db["products"].docs == []
+
+
+def test_update_product_returns_reviews(db):
+    doc = product(db)
+    response = asyncio.run(update_product(str(doc["_id"]), ProductUpdate(price=99.0, countInStock=9), None))
+    assert response.price == 99.0 and response.count_in_stock == 9
+    assert [review.comment for review in response.reviews] == ["Sturdy"]
+
+
+def test_update_product_redistributes_sharded_stock(db, monkeypatch):
+    """countInStock of a sharded product is left to configure_stock_shards, which spreads it over the shards"""
+    doc = product(db, countInStock=6, stockShards=2)
+    db["stock_shards"].docs = [
+        {"_id": ObjectId(), "product": doc["_id"], "shard": 0, "stock": 3},
+        {"_id": ObjectId(), "product": doc["_id"], "shard": 1, "stock": 3},
+    ]
+    seen = []
+
+    async def configure(product_id, num_shards, total=None):
+        seen.append(db["products"].docs[0]["countInStock"])
+        return await configure_stock_shards(product_id, num_shards, total)
+
+    monkeypatch.setattr(products_router, "configure_stock_shards", configure)
+    response = asyncio.run(update_product(str(doc["_id"]), ProductUpdate(countInStock=11), None))
+    # The update itself left the mirror alone
+    assert seen == [6]
+    assert response.count_in_stock == 11
+    assert sorted(shard["stock"] for shard in db["stock_shards"].docs) == [5, 6]
+    assert db["products"].docs[0]["countInStock"] == 11
+
+
+def test_update_product_missing_or_invalid_id(db):
+    for product_id in (str(ObjectId()), "not-an-id"):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(update_product(product_id, ProductUpdate(price=1.0), None))
+        assert error.value.status_code == 404
@@ -0,0 +1,84 @@
+"""
+PAYMENT ID INDEX TEST
+Runs the startup check in utils/payment_ids.py against the in-memory
+collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+from models.order import Order, ArchivedOrder
+from utils import payment_ids, paypal
+from utils.bloom_filter import BloomFilter
+from utils.payment_ids import prepare_payment_id_indexes, payment_ids_unique, UNIQUE_INDEX, FALLBACK_INDEX
+
+MODELS = (Order, ArchivedOrder)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    for model in MODELS:
+        monkeypatch.setattr(model.Settings, "indexes", list(model.Settings.indexes))
+        monkeypatch.setattr(model, "get_motor_collection", lambda name=model.Settings.name: db[name])
+    monkeypatch.setattr(payment_ids, "_not_unique", set())
+    monkeypatch.setattr(paypal, "_seen_transactions", BloomFilter(capacity=100))
+    return db
+
+
+def paid(payment_id):
+    return {"_id": ObjectId(), "isPaid": True, "paymentResult": {"id": payment_id}}
+
+
+def index_names(model):
+    return [index.document["name"] for index in model.Settings.indexes]
+
+
+def test_clean_database_keeps_the_unique_index(db):
+    db["orders"].docs = [paid("CAPTURE-1"), paid("CAPTURE-2"), {"_id": ObjectId(), "paymentResult": None}]
+    assert asyncio.run(prepare_payment_id_indexes(db, MODELS)) is True
+    assert UNIQUE_INDEX in index_names(Order) and UNIQUE_INDEX in index_names(ArchivedOrder)
+    assert payment_ids_unique(Order)
+
+
+def test_duplicates_fall_back_to_a_plain_index(db, caplog):
+    first, second = paid("CAPTURE-1"), paid("CAPTURE-1")
+    db["orders"].docs = [first, second, paid("CAPTURE-2")]
+
+    assert asyncio.run(prepare_payment_id_indexes(db, MODELS)) is False
+    assert FALLBACK_INDEX in index_names(Order) and UNIQUE_INDEX not in index_names(Order)
+    assert UNIQUE_INDEX in index_names(ArchivedOrder)
+    fallback, = [index.document for index in Order.Settings.indexes if index.document["name"] == FALLBACK_INDEX]
+    assert not fallback.get("unique")
+    assert "CAPTURE-1" in caplog.text and str(first["_id"]) in caplog.text and str(second["_id"]) in caplog.text
+
+    # Without the index behind it, an unseen capture is still looked up in the live orders
+    assert not payment_ids_unique(Order)
+    assert asyncio.run(paypal.check_if_new_transaction(MODELS, "CAPTURE-2")) is False
+
+
+def test_resolved_duplicates_get_the_unique_index_back(db):
+    db["orders"].docs = [paid("CAPTURE-1")]
+    db["orders"].indexes[FALLBACK_INDEX] = {"key": [("paymentResult.id", 1)]}
+    payment_ids._not_unique.add("orders")
+
+    assert asyncio.run(prepare_payment_id_indexes(db, MODELS)) is True
+    assert FALLBACK_INDEX not in db["orders"].indexes
+    assert UNIQUE_INDEX in index_names(Order) and payment_ids_unique(Order)
+
+
+def test_existing_unique_index_skips_the_scan(db, monkeypatch):
+    db["orders"].indexes[UNIQUE_INDEX] = {"key": [("paymentResult.id", 1)], "unique": True}
+    monkeypatch.setattr(db["orders"], "aggregate", None)
+    assert asyncio.run(prepare_payment_id_indexes(db, (Order,))) is True
@@ -0,0 +1,66 @@
+"""
+PAYMENT RECONCILIATION TEST
+Runs reconcile_pending_captures in utils/payment_verification.py against
+the in-memory collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+from config.settings import settings
+from models.order import Order
+from utils import payment_verification
+from utils.payment_verification import reconcile_pending_captures, PENDING, VERIFIED
+
+NOW = datetime.utcnow()
+STALE = NOW - timedelta(seconds=settings.PAYMENT_RECONCILE_STALE_SECONDS + 60)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(Order, "get_motor_collection", lambda: db["orders"])
+    return db
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    queued = []
+    monkeypatch.setattr(
+        payment_verification, "enqueue_verification",
+        lambda order_id, payment_id, total_price: queued.append(payment_id) or True
+    )
+    return queued
+
+
+def order(payment_id, queued_at, updated_at, verification_status=PENDING):
+    payment = {"id": payment_id, "verification_status": verification_status}
+    if queued_at is not None:
+        payment["verification_queued_at"] = queued_at
+    return {"_id": ObjectId(), "paymentResult": payment, "totalPrice": 10.0, "updatedAt": updated_at}
+
+
+def test_stale_captures_are_requeued_whatever_else_touched_the_order(db, queued):
+    db["orders"].docs = [
+        # Delivered a moment ago, but its verification has waited since STALE
+        order("CAPTURE-1", STALE, NOW),
+        order("CAPTURE-2", NOW, NOW),
+        # Recorded before verification_queued_at existed
+        order("CAPTURE-3", None, NOW),
+        order("CAPTURE-4", STALE, STALE, verification_status=VERIFIED),
+    ]
+
+    assert asyncio.run(reconcile_pending_captures()) == 2
+    assert queued == ["CAPTURE-1", "CAPTURE-3"]
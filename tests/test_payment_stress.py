@@ -121,7 +121,7 @@ def test_rapid_payment_processing():
         )
         end_time = time.time()
         
-        success = response.status_code == 200
+        success = response.status_code == 202
         if success:
             paid_order = response.json()
             success = paid_order['isPaid']
@@ -212,7 +212,7 @@ def test_payment_with_missing_fields():
         json=payment_data
     )
     
-    if response.status_code == 200:
+    if response.status_code == 202:
         paid_order = response.json()
         if paid_order['isPaid']:
             print_pass("Payment succeeded with minimal fields")
@@ -286,7 +286,7 @@ def test_payment_amount_mismatch():
     )
     
     # Should still work because PayPal verification is optional
-    if response.status_code == 200:
+    if response.status_code == 202:
         print_info("Payment accepted (verification is optional in dev mode)")
         return True
     else:
@@ -346,7 +346,7 @@ def test_double_payment_prevention():
         json=payment_data
     )
     
-    if response1.status_code != 200:
+    if response1.status_code != 202:
         print_fail(f"First payment failed: {response1.text}")
         return False
     
@@ -393,7 +393,7 @@ def attempt_payment(order_id, payment_id, session_cookies):
         )
         return {
             'status_code': response.status_code,
-            'success': response.status_code == 200,
+            'success': response.status_code == 202,
             'response': response.text
         }
     except Exception as e:
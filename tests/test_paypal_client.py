@@ -0,0 +1,252 @@
+"""
+PAYPAL CLIENT TEST
+Exercises utils/paypal.py against the local PayPal stub (no MongoDB needed)
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import paypal_stub
+from config.settings import settings
+from utils import paypal
+from utils.http_client import close_http_client
+from utils.metrics import outbound_metrics, reset_metrics
+from utils.circuit_breaker import CircuitOpenError, BulkheadFullError
+from utils import payment_verification
+from utils.payment_verification import check_payment, enqueue_verification, VERIFIED, MISMATCH
+
+settings.PAYPAL_API_URL = paypal_stub.start_in_thread()
+
+
+def setup_function():
+    paypal_stub.reset()
+    paypal.clear_paypal_token_cache()
+    reset_metrics()
+    paypal.paypal_breaker.reset()
+    paypal.paypal_bulkhead.reset()
+    # Each test runs on a fresh event loop
+    paypal._token_lock = asyncio.Lock()
+
+
+def run_async(coro_func):
+    """Run a test body on a fresh loop, closing the shared client afterwards"""
+    async def wrapper():
+        try:
+            await coro_func()
+        finally:
+            await close_http_client()
+
+    asyncio.run(wrapper())
+
+
+def test_token_is_cached():
+    """Repeated verifications reuse one OAuth token"""
+    async def run():
+        for _ in range(5):
+            result = await paypal.verify_paypal_payment("ORDER-1")
+            assert result == {"verified": True, "value": "10.00"}
+
+    run_async(run)
+    assert paypal_stub.state["token_requests"] == 1
+    assert paypal_stub.state["order_requests"] == 5
+
+
+def test_concurrent_callers_share_one_refresh():
+    """Single-flight: a burst of cold callers triggers one token request"""
+    paypal_stub.state["delay"] = 0.2
+
+    async def run():
+        tokens = await asyncio.gather(*(paypal.get_paypal_access_token() for _ in range(20)))
+        assert len(set(tokens)) == 1
+
+    run_async(run)
+    assert paypal_stub.state["token_requests"] == 1
+
+
+def test_token_refreshed_ahead_of_expiry():
+    """Inside the refresh margin the old token is served while a new one is fetched"""
+    paypal_stub.state["expires_in"] = 2
+
+    async def run():
+        first = await paypal.get_paypal_access_token()
+        # margin is capped at half the lifetime, so refresh starts after 1s
+        await asyncio.sleep(1.2)
+        assert await paypal.get_paypal_access_token() == first
+        await asyncio.sleep(0.2)
+        assert await paypal.get_paypal_access_token() != first
+
+    run_async(run)
+    assert paypal_stub.state["token_requests"] == 2
+
+
+def test_revoked_token_is_replaced():
+    """A 401 drops the cached token and retries once; a burst of refused callers shares one refresh"""
+    async def run():
+        revoked = await paypal.get_paypal_access_token()
+        paypal_stub.state["revoked"].add(revoked)
+
+        results = await asyncio.gather(*(paypal.verify_paypal_payment(f"ORDER-{i}") for i in range(5)))
+        assert all(result["verified"] for result in results)
+        assert await paypal.get_paypal_access_token() != revoked
+
+    run_async(run)
+    assert paypal_stub.state["token_requests"] == 2
+    assert paypal_stub.state["order_requests"] == 10
+
+
+def test_outbound_latency_recorded():
+    """Each PayPal call is timed under its own metric"""
+    async def run():
+        await paypal.verify_paypal_payment("ORDER-2")
+        await paypal.verify_paypal_payment("ORDER-3")
+
+    run_async(run)
+    metrics = outbound_metrics()
+    assert metrics["paypal.oauth_token"]["count"] == 1
+    assert metrics["paypal.verify_order"]["count"] == 2
+    assert metrics["paypal.verify_order"]["errors"] == 0
+
+
+def test_error_responses_count_as_errors():
+    """4xx and 5xx responses are recorded as errors, not successes"""
+    async def run():
+        try:
+            await paypal.verify_paypal_payment("MISSING-1")
+        except Exception:
+            pass
+        else:
+            raise AssertionError("expected a failed verification")
+
+        paypal.clear_paypal_token_cache()
+        paypal_stub.state["fail"] = True
+        try:
+            await paypal.get_paypal_access_token()
+        except Exception:
+            pass
+
+    run_async(run)
+    metrics = outbound_metrics()
+    assert metrics["paypal.verify_order"] == {**metrics["paypal.verify_order"], "count": 1, "errors": 1}
+    assert metrics["paypal.oauth_token"] == {**metrics["paypal.oauth_token"], "count": 2, "errors": 1}
+
+
+def test_call_deadline_enforced():
+    """A hung PayPal response fails after PAYPAL_CALL_DEADLINE"""
+    paypal_stub.state["delay"] = 2
+    original_deadline = settings.PAYPAL_CALL_DEADLINE
+    settings.PAYPAL_CALL_DEADLINE = 0.3
+
+    async def run():
+        try:
+            await paypal.get_paypal_access_token()
+        except asyncio.TimeoutError:
+            return
+        raise AssertionError("expected a timeout")
+
+    try:
+        run_async(run)
+    finally:
+        settings.PAYPAL_CALL_DEADLINE = original_deadline
+    assert outbound_metrics()["paypal.oauth_token"]["errors"] == 1
+
+
+def test_breaker_opens_and_probes():
+    """Repeated 5xx responses open the circuit; a half-open probe closes it"""
+    breaker = paypal.paypal_breaker
+    original_open_seconds = breaker.open_seconds
+    breaker.open_seconds = 0.5
+    paypal_stub.state["fail"] = True
+
+    async def run():
+        for _ in range(breaker.min_calls):
+            try:
+                await paypal.get_paypal_access_token()
+            except CircuitOpenError:
+                raise
+            except Exception:
+                pass
+        assert breaker.state == breaker.OPEN
+
+        requests_before = paypal_stub.state["token_requests"]
+        try:
+            await paypal.get_paypal_access_token()
+            raise AssertionError("expected the circuit to be open")
+        except CircuitOpenError:
+            pass
+        assert paypal_stub.state["token_requests"] == requests_before
+
+        await asyncio.sleep(0.6)
+        paypal_stub.state["fail"] = False
+        await paypal.get_paypal_access_token()
+        assert breaker.state == breaker.CLOSED
+
+    try:
+        run_async(run)
+    finally:
+        breaker.open_seconds = original_open_seconds
+
+
+def test_bulkhead_rejects_overflow():
+    """Calls beyond PAYPAL_MAX_CONCURRENCY wait briefly, then fail fast"""
+    bulkhead = paypal.paypal_bulkhead
+    paypal_stub.state["delay"] = bulkhead.max_wait + 0.5
+
+    async def run():
+        results = await asyncio.gather(
+            *(paypal.verify_paypal_payment(f"ORDER-{i}") for i in range(bulkhead.max_concurrent + 5)),
+            return_exceptions=True
+        )
+        assert any(isinstance(r, BulkheadFullError) for r in results), results
+
+    run_async(run)
+
+
+def test_check_payment_statuses():
+    """Matching amounts verify, mismatches are flagged, outages raise for retry"""
+    async def run():
+        assert await check_payment("ORDER-4", 10.0) == VERIFIED
+        assert await check_payment("ORDER-5", 12.5) == MISMATCH
+        paypal_stub.state["fail"] = True
+        try:
+            await check_payment("ORDER-6", 10.0)
+            raise AssertionError("expected PayPal failure")
+        except AssertionError:
+            raise
+        except Exception:
+            pass
+
+    run_async(run)
+
+
+def test_enqueue_is_deduplicated():
+    """An order already waiting for verification is not queued twice"""
+    async def run():
+        payment_verification._queue = None
+        payment_verification._in_flight.clear()
+        assert enqueue_verification("64b000000000000000000001", "ORDER-7", 10.0)
+        assert not enqueue_verification("64b000000000000000000001", "ORDER-7", 10.0)
+        assert payment_verification.verification_queue_depth() == 1
+        payment_verification._in_flight.clear()
+
+    run_async(run)
+
+
+if __name__ == "__main__":
+    for test_func in (test_token_is_cached, test_concurrent_callers_share_one_refresh,
+                      test_token_refreshed_ahead_of_expiry, test_revoked_token_is_replaced,
+                      test_outbound_latency_recorded,
+                      test_error_responses_count_as_errors, test_call_deadline_enforced, test_breaker_opens_and_probes,
+                      test_bulkhead_rejects_overflow, test_check_payment_statuses,
+                      test_enqueue_is_deduplicated):
+        setup_function()
+        test_func()
+        print(f"✅ PASS: {test_func.__name__}")
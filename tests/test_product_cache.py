@@ -0,0 +1,53 @@
+"""
+PRODUCT CACHE TEST
+Exercises the warm path and invalidation of utils/product_cache.py
+(no server needed)
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from utils import product_cache
+from utils.product_cache import get_product_summaries
+from utils.product_changes import products_changed
+
+WIDGET = "64b0000000000000000000aa"
+GADGET = "64b0000000000000000000bb"
+
+
+def setup_function():
+    product_cache._summaries.clear()
+    for product_id in (WIDGET, GADGET):
+        product_cache._summaries.set(product_id, {
+            "_id": product_id, "name": product_id, "image": "", "price": 1.0, "countInStock": 3
+        })
+
+
+def test_warm_ids_are_answered_in_request_order():
+    summaries, missing = asyncio.run(get_product_summaries([GADGET, "not-an-id", WIDGET, GADGET]))
+    assert [summary["_id"] for summary in summaries] == [GADGET, WIDGET]
+    assert missing == ["not-an-id"]
+
+
+def test_product_changes_drop_entries():
+    products_changed([WIDGET])
+    assert WIDGET not in product_cache._summaries
+    assert GADGET in product_cache._summaries
+
+    products_changed()
+    assert len(product_cache._summaries) == 0
+
+
+if __name__ == "__main__":
+    for test in (test_warm_ids_are_answered_in_request_order, test_product_changes_drop_entries):
+        setup_function()
+        test()
+    print("✅ Product cache tests passed")
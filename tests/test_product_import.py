@@ -0,0 +1,88 @@
+"""
+PRODUCT IMPORT PARSING TEST
+Exercises row parsing and the upserts in utils/product_import.py against
+the in-memory collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import io
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+from models.product import Product
+from schemas.product import ProductImportRow
+from utils.product_import import read_rows, detect_format, import_products
+
+ADMIN = ObjectId()
+
+
+def test_csv_rows_use_defaults_for_empty_cells():
+    data = (
+        "sku,name,price,countInStock,description\n"
+        'SKU-1,"Desk, oak",120.5,4,"Two\nlines"\n'
+        "SKU-2,Lamp,15,,\n"
+    ).encode()
+    rows = list(read_rows(io.BytesIO(data), "csv"))
+    assert [line for line, _ in rows] == [3, 4]
+
+    desk = ProductImportRow.model_validate(rows[0][1])
+    assert desk.name == "Desk, oak" and desk.description == "Two\nlines" and desk.count_in_stock == 4
+    lamp = ProductImportRow.model_validate(rows[1][1])
+    assert lamp.count_in_stock == 0 and lamp.description == ""
+
+
+def test_ndjson_reports_bad_lines_without_stopping():
+    data = b'{"sku": "A", "name": "A", "price": 1}\n\nnot json\n[1, 2]\n{"sku": "B", "name": "B", "price": 2}\n'
+    rows = list(read_rows(io.BytesIO(data), "ndjson"))
+    assert [line for line, _ in rows] == [1, 3, 4, 5]
+    assert isinstance(rows[1][1], ValueError)
+    assert isinstance(rows[2][1], ValueError)
+    assert rows[3][1]["sku"] == "B"
+
+
+def test_detect_format():
+    assert detect_format("catalog.CSV") == "csv"
+    assert detect_format("catalog.jsonl") == "ndjson"
+    assert detect_format(None) == "ndjson"
+
+
+def run_import(monkeypatch, db, data, file_format="ndjson"):
+    monkeypatch.setattr(Product, "get_motor_collection", lambda: db["products"])
+    return asyncio.run(import_products(io.BytesIO(data), file_format, ADMIN))
+
+
+def test_new_products_get_defaults(monkeypatch):
+    db = FakeDatabase()
+    report = run_import(monkeypatch, db, b'{"sku": "A", "name": "Lamp", "price": 15}\n')
+    assert report["inserted"] == 1
+
+    lamp = db["products"].docs[0]
+    assert lamp["image"] == "/images/sample.jpg" and lamp["countInStock"] == 0 and lamp["brand"] == ""
+    assert lamp["user"] == ADMIN and lamp["reviews"] == [] and lamp["stockShards"] == 0
+
+
+def test_partial_row_keeps_existing_fields(monkeypatch):
+    """Re-importing only a new price leaves the columns the row lacks alone"""
+    db = FakeDatabase()
+    run_import(monkeypatch, db, (
+        b'{"sku": "A", "name": "Lamp", "price": 15, "image": "/images/lamp.jpg", "brand": "Lumo", '
+        b'"category": "Lighting", "description": "Brass desk lamp", "countInStock": 7}\n'
+    ))
+    created = dict(db["products"].docs[0])
+
+    report = run_import(monkeypatch, db, b"sku,name,price,brand,countInStock\nA,Lamp,12.5,,\n", "csv")
+    assert report["inserted"] == 0 and report["updated"] == 1
+
+    lamp = db["products"].docs[0]
+    assert lamp["price"] == 12.5
+    for field in ("image", "brand", "category", "description", "countInStock", "user", "createdAt"):
+        assert lamp[field] == created[field], field
@@ -0,0 +1,68 @@
+"""
+SPARSE FIELDSET TEST
+Checks ?fields= parsing, projections and trimmed serialization
+(no server needed)
+"""
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+from bson import ObjectId
+from fastapi import HTTPException
+from routers.products import PRODUCT_FIELDS, product_doc_fields, product_doc_to_response
+from utils.order_serializer import ORDER_FIELDS, serialize_order_doc
+from utils.sparse_fields import parse_fields, field_projection
+
+CREATED = datetime(2024, 5, 1, 12, 0, 0)
+
+PRODUCT = {
+    "_id": ObjectId(), "user": ObjectId(), "name": "Widget", "image": "/w.jpg", "brand": "Acme",
+    "category": "Tools", "description": "A long description", "reviews": [], "rating": 4.5, "numReviews": 2,
+    "price": 9.99, "countInStock": 3, "createdAt": CREATED, "updatedAt": CREATED,
+}
+
+
+def test_parse_fields():
+    assert parse_fields(None, PRODUCT_FIELDS) is None
+    assert parse_fields("", PRODUCT_FIELDS) is None
+    assert parse_fields("price, name,price", PRODUCT_FIELDS) == ["_id", "price", "name"]
+    assert field_projection(["_id", "totalPrice"], "createdAt") == {"_id": 1, "totalPrice": 1, "createdAt": 1}
+
+    try:
+        parse_fields("name,secret", PRODUCT_FIELDS)
+        assert False, "unknown field was accepted"
+    except HTTPException as e:
+        assert e.status_code == 400
+        assert "secret" in e.detail
+
+
+def test_sparse_product_matches_full_response():
+    selected = parse_fields("name,price,countInStock", PRODUCT_FIELDS)
+    projected = {key: PRODUCT[key] for key in field_projection(selected)}
+    sparse = product_doc_fields(projected, selected)
+    full = product_doc_to_response(PRODUCT).model_dump(by_alias=True)
+    assert sparse == {key: full[key] for key in selected}
+
+
+def test_sparse_order_fields():
+    order = {
+        "_id": ObjectId(), "user": ObjectId(), "orderItems": [], "paymentMethod": "PayPal",
+        "totalPrice": 10.0, "isPaid": False, "createdAt": CREATED, "updatedAt": CREATED,
+    }
+    selected = parse_fields("totalPrice,isPaid", ORDER_FIELDS)
+    assert serialize_order_doc(order, selected) == {"_id": str(order["_id"]), "totalPrice": 10.0, "isPaid": False}
+
+
+if __name__ == "__main__":
+    test_parse_fields()
+    test_sparse_product_matches_full_response()
+    test_sparse_order_fields()
+    print("✅ Sparse fieldset tests passed")
@@ -0,0 +1,84 @@
+"""
+STOCK RESERVATION TEST
+Runs reserve_stock and release_stock from utils/inventory.py against the
+in-memory collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+from models.product import Product
+from models.stock_shard import StockShard
+from utils.inventory import reserve_stock, release_stock, InsufficientStockError
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(Product, "get_motor_collection", lambda: db["products"])
+    monkeypatch.setattr(StockShard, "get_motor_collection", lambda: db["stock_shards"])
+    return db
+
+
+def stock(db):
+    return {doc["_id"]: doc["countInStock"] for doc in db["products"].docs}
+
+
+def test_reserve_and_release(db):
+    desk, lamp = ObjectId(), ObjectId()
+    db["products"].docs = [{"_id": desk, "countInStock": 5}, {"_id": lamp, "countInStock": 2}]
+
+    asyncio.run(reserve_stock([(desk, 2), (lamp, 1), (desk, 1)]))
+    assert stock(db) == {desk: 2, lamp: 1}
+
+    asyncio.run(release_stock([(desk, 3), (lamp, 1)]))
+    assert stock(db) == {desk: 5, lamp: 2}
+
+
+def test_short_line_puts_the_others_back(db):
+    desk, lamp = ObjectId(), ObjectId()
+    db["products"].docs = [{"_id": desk, "countInStock": 5}, {"_id": lamp, "countInStock": 1}]
+
+    with pytest.raises(InsufficientStockError) as error:
+        asyncio.run(reserve_stock([(desk, 2), (lamp, 2)]))
+    assert error.value.product_ids == [str(lamp)]
+    assert stock(db) == {desk: 5, lamp: 1}
+
+
+def test_deleted_product_fails_without_a_stub(db):
+    """A product deleted after the cart was priced is short stock, not a new document"""
+    desk, deleted = ObjectId(), ObjectId()
+    db["products"].docs = [{"_id": desk, "countInStock": 5}]
+
+    with pytest.raises(InsufficientStockError) as error:
+        asyncio.run(reserve_stock([(desk, 1), (deleted, 1)]))
+    assert error.value.product_ids == [str(deleted)]
+    assert stock(db) == {desk: 5}
+
+
+def test_sharded_products_use_their_shards(db):
+    hot, desk = ObjectId(), ObjectId()
+    db["products"].docs = [{"_id": hot, "countInStock": 4, "stockShards": 2}, {"_id": desk, "countInStock": 1}]
+    db["stock_shards"].docs = [
+        {"_id": ObjectId(), "product": hot, "shard": 0, "stock": 2},
+        {"_id": ObjectId(), "product": hot, "shard": 1, "stock": 2},
+    ]
+
+    asyncio.run(reserve_stock([(hot, 3), (desk, 1)]))
+    assert sum(doc["stock"] for doc in db["stock_shards"].docs) == 1
+    assert stock(db)[desk] == 0
+
+    asyncio.run(release_stock([(hot, 3), (desk, 1)], {hot: 2}))
+    assert sum(doc["stock"] for doc in db["stock_shards"].docs) == 4
+    assert stock(db)[desk] == 1
@@ -0,0 +1,96 @@
+"""
+STOCK SHARD TEST
+Switches products between single and sharded stock with utils/stock_shards.py
+against the in-memory collections in fake_mongo.py (no server needed)
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("PAYPAL_CLIENT_ID", "stub-client")
+os.environ.setdefault("PAYPAL_APP_SECRET", "stub-secret")
+
+import pytest
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+from models.product import Product
+from models.stock_shard import StockShard
+from utils.stock_shards import configure_stock_shards, give_to_shards, take_from_shards
+
+HOT = ObjectId()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    db.collection("stock_shards", unique=[(("product", "shard"), None)])
+    monkeypatch.setattr(Product, "get_motor_collection", lambda: db["products"])
+    monkeypatch.setattr(StockShard, "get_motor_collection", lambda: db["stock_shards"])
+    db["products"].docs = [{"_id": HOT, "countInStock": 10, "stockShards": 0}]
+    return db
+
+
+def shards(db):
+    return sorted((doc["shard"], doc["stock"]) for doc in db["stock_shards"].docs)
+
+
+def product(db):
+    return db["products"].docs[0]
+
+
+def test_shard_and_unshard(db):
+    assert asyncio.run(configure_stock_shards(HOT, 3)) == 10
+    assert shards(db) == [(0, 4), (1, 3), (2, 3)]
+    assert product(db)["stockShards"] == 3 and product(db)["countInStock"] == 10
+
+    assert asyncio.run(take_from_shards(HOT, 7, 3))
+    assert sum(stock for _, stock in shards(db)) == 3
+    assert not asyncio.run(take_from_shards(HOT, 4, 3))
+    assert sum(stock for _, stock in shards(db)) == 3
+
+    assert asyncio.run(configure_stock_shards(HOT, 0)) == 3
+    assert shards(db) == []
+    assert product(db)["stockShards"] == 0 and product(db)["countInStock"] == 3
+
+
+def test_stock_given_back_while_sharding_is_kept(db):
+    """A release that creates a shard between the product update and the shard writes neither fails nor is lost"""
+    zero = db["products"].find_one_and_update
+
+    async def release_meanwhile(*args, **kwargs):
+        before = await zero(*args, **kwargs)
+        await give_to_shards(HOT, 2, shard=1)
+        return before
+
+    db["products"].find_one_and_update = release_meanwhile
+    assert asyncio.run(configure_stock_shards(HOT, 2)) == 10
+    assert shards(db) == [(0, 5), (1, 7)]
+
+
+def test_stock_given_back_while_unsharding_is_kept(db):
+    asyncio.run(configure_stock_shards(HOT, 2))
+    drain = db["stock_shards"].find_one_and_delete
+    released = []
+
+    async def release_after_drain(*args, **kwargs):
+        doc = await drain(*args, **kwargs)
+        if doc is None and not released:
+            released.append(True)
+            await give_to_shards(HOT, 2, shard=0)
+        return doc
+
+    db["stock_shards"].find_one_and_delete = release_after_drain
+    assert asyncio.run(configure_stock_shards(HOT, 0)) == 12
+    assert shards(db) == [] and product(db)["countInStock"] == 12
+
+
+def test_total_overrides_the_stock_level(db):
+    asyncio.run(configure_stock_shards(HOT, 2))
+    assert asyncio.run(configure_stock_shards(HOT, 4, total=6)) == 6
+    assert shards(db) == [(0, 2), (1, 2), (2, 1), (3, 1)]
+    assert asyncio.run(configure_stock_shards(ObjectId(), 2)) == 0
@@ -0,0 +1,143 @@
+"""
+Per-product admission control for checkout
+
+Caps how many checkouts for the same product may run at once, queues a
+bounded number behind them and rejects the rest. Products whose stock has
+run out are remembered for a few seconds so further checkouts fail before
+touching the database.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from config.settings import settings
+from utils.ttl_cache import TTLCache
+from utils.product_changes import on_products_changed
+from typing import Dict, Iterable, List, Optional
+
+
+class SoldOutError(Exception):
+    """Raised when a requested product is known to be out of stock"""
+
+    def __init__(self, product_ids: List[str]):
+        self.product_ids = product_ids
+        super().__init__(f"Sold out: {', '.join(product_ids)}")
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a product's checkout queue is full or the wait timed out"""
+
+    def __init__(self, product_id: str):
+        self.product_id = product_id
+        super().__init__(f"Checkout queue is full for product {product_id}")
+
+
+class ProductGate:
+    """Concurrency slots and counters for one product"""
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+_gates: Dict[str, ProductGate] = {}
+_sold_out = TTLCache(maxsize=100_000, ttl=settings.CHECKOUT_SOLD_OUT_TTL)
+
+
+def mark_sold_out(product_ids: Iterable[str]):
+    """Remember products whose stock ran out"""
+    for product_id in product_ids:
+        _sold_out.set(str(product_id), True)
+
+
+def clear_sold_out(product_ids: Iterable[str]):
+    """Forget sold-out markers after stock is added"""
+    for product_id in product_ids:
+        _sold_out.delete(str(product_id))
+
+
+def _forget_sold_out(product_ids: Optional[List[str]]):
+    # Stock edits can put a product back on sale
+    if product_ids is None:
+        _sold_out.clear()
+    else:
+        clear_sold_out(product_ids)
+
+
+on_products_changed(_forget_sold_out)
+
+
+def _check_sold_out(product_ids: Iterable[str]):
+    sold_out = [product_id for product_id in product_ids if product_id in _sold_out]
+    if sold_out:
+        raise SoldOutError(sold_out)
+
+
+@asynccontextmanager
+async def checkout_admission(product_ids: Iterable[str]):
+    """
+    Hold a checkout slot for every product in the order
+
+    Slots are taken in sorted order so orders sharing products cannot
+    deadlock. Waits at most CHECKOUT_ADMISSION_TIMEOUT per product and
+    refuses outright once CHECKOUT_MAX_QUEUE_PER_PRODUCT are already waiting.
+    """
+    product_ids = sorted({str(product_id) for product_id in product_ids})
+    _check_sold_out(product_ids)
+
+    held: List[ProductGate] = []
+    try:
+        for product_id in product_ids:
+            gate = _gates.get(product_id)
+            if gate is None:
+                gate = _gates[product_id] = ProductGate(settings.CHECKOUT_MAX_INFLIGHT_PER_PRODUCT)
+
+            if not gate.semaphore.locked():
+                await gate.semaphore.acquire()
+            elif gate.waiting >= settings.CHECKOUT_MAX_QUEUE_PER_PRODUCT:
+                gate.rejected += 1
+                raise AdmissionRejectedError(product_id)
+            else:
+                gate.waiting += 1
+                try:
+                    await asyncio.wait_for(gate.semaphore.acquire(), timeout=settings.CHECKOUT_ADMISSION_TIMEOUT)
+                except asyncio.TimeoutError:
+                    gate.rejected += 1
+                    raise AdmissionRejectedError(product_id)
+                finally:
+                    gate.waiting -= 1
+
+            gate.in_flight += 1
+            gate.admitted += 1
+            held.append(gate)
+
+            # Stock may have run out while this request was queued
+            _check_sold_out([product_id])
+
+        yield
+    finally:
+        for gate in held:
+            gate.in_flight -= 1
+            gate.semaphore.release()
+        for product_id in product_ids:
+            gate = _gates.get(product_id)
+            if gate is not None and gate.in_flight == 0 and gate.waiting == 0:
+                del _gates[product_id]
+
+
+def admission_status() -> List[dict]:
+    """Queue depth per product with checkouts in progress, deepest first"""
+    ranked = sorted(_gates.items(), key=lambda item: (item[1].waiting, item[1].in_flight), reverse=True)
+    return [
+        {"product": product_id, "soldOut": product_id in _sold_out, **gate.snapshot()}
+        for product_id, gate in ranked
+    ]
@@ -0,0 +1,210 @@
+"""
+Pre-aggregated sales rollups
+
+Every paid order is added to one hourly and one daily SalesRollup document
+(revenue, order count, units, and per-product and per-category breakdowns),
+so sales reports read a few hundred rollups instead of scanning orders.
+rebuild_rollups recomputes a date range from the orders themselves, for the
+initial backfill or to repair drift.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import UpdateOne, ReplaceOne
+from models.order import Order, ArchivedOrder
+from models.product import Product
+from models.sales_rollup import SalesRollup
+from typing import Dict, Iterable, Optional
+
+GRANULARITIES = ("hour", "day")
+UNCATEGORIZED = "Uncategorized"
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its hour or day"""
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def bucket_step(granularity: str) -> timedelta:
+    return timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+
+
+def _field_key(name: str) -> str:
+    """Make a category name usable as a document field name"""
+    return name.replace(".", "_").replace("$", "_") or UNCATEGORIZED
+
+
+def rollup_increments(order: dict, categories: Dict[str, str]) -> Dict[str, float]:
+    """
+    The $inc a paid order contributes to its rollup buckets
+
+    `order` is a raw orders document; `categories` maps product IDs to
+    category names.
+    """
+    inc: Dict[str, float] = defaultdict(float)
+    inc["revenue"] = order.get("totalPrice", 0.0)
+    inc["orders"] = 1
+    for item in order.get("orderItems", []):
+        product_id = str(item["product"])
+        qty = item["qty"]
+        line_revenue = item["price"] * qty
+        category = _field_key(categories.get(product_id, UNCATEGORIZED))
+        inc["itemsRevenue"] += line_revenue
+        inc["units"] += qty
+        inc[f"products.{product_id}.units"] += qty
+        inc[f"products.{product_id}.revenue"] += line_revenue
+        inc[f"categories.{category}.units"] += qty
+        inc[f"categories.{category}.revenue"] += line_revenue
+    return dict(inc)
+
+
+async def _product_categories(product_ids: Iterable) -> Dict[str, str]:
+    ids = list({ObjectId(str(pid)) for pid in product_ids})
+    if not ids:
+        return {}
+    cursor = Product.get_motor_collection().find({"_id": {"$in": ids}}, projection={"category": 1})
+    return {str(doc["_id"]): doc.get("category") or UNCATEGORIZED async for doc in cursor}
+
+
+async def record_paid_order(order: Order):
+    """Add a newly paid order to its hourly and daily rollups"""
+    doc = order.model_dump(by_alias=True, include={"order_items", "total_price"})
+    categories = await _product_categories(item.product for item in order.order_items)
+    inc = rollup_increments(doc, categories)
+    paid_at = order.paid_at or datetime.utcnow()
+    await SalesRollup.get_motor_collection().bulk_write(
+        [
+            UpdateOne(
+                {"granularity": granularity, "bucket": bucket_start(paid_at, granularity)},
+                {"$inc": inc},
+                upsert=True
+            )
+            for granularity in GRANULARITIES
+        ],
+        ordered=False
+    )
+
+
+async def catalogue_categories() -> Dict[str, str]:
+    """Category of every product, keyed by product ID"""
+    cursor = Product.get_motor_collection().find({}, projection={"category": 1})
+    return {str(doc["_id"]): doc.get("category") or UNCATEGORIZED async for doc in cursor}
+
+
+async def rebuild_rollups(start: datetime, end: datetime, categories: Optional[Dict[str, str]] = None) -> int:
+    """
+    Recompute every rollup between `start` and `end` from paid orders
+
+    The range is widened to whole days. Hot and archived orders are both
+    read, through their paid_paidAt indexes. Payments recorded while the
+    rebuild runs may be missed for the buckets being replaced, so run it
+    off-peak. Callers rebuilding many ranges pass `categories` from
+    catalogue_categories() so the catalogue is read once. Returns the
+    orders counted.
+    """
+    start = bucket_start(start, "day")
+    end = bucket_start(end, "day") + timedelta(days=1)
+    query = {"isPaid": True, "paidAt": {"$gte": start, "$lt": end}}
+    projection = {"paidAt": 1, "totalPrice": 1, "orderItems.product": 1, "orderItems.qty": 1, "orderItems.price": 1}
+
+    if categories is None:
+        categories = await catalogue_categories()
+
+    counted = 0
+    buckets: Dict[tuple, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for model in (Order, ArchivedOrder):
+        async for order in model.get_motor_collection().find(query, projection=projection):
+            counted += 1
+            for field, amount in rollup_increments(order, categories).items():
+                for granularity in GRANULARITIES:
+                    buckets[(granularity, bucket_start(order["paidAt"], granularity))][field] += amount
+
+    rollups = SalesRollup.get_motor_collection()
+    await rollups.delete_many({
+        "bucket": {"$gte": start, "$lt": end},
+        "$nor": [{"granularity": g, "bucket": b} for g, b in buckets] or [{"_id": None}]
+    })
+    if buckets:
+        await rollups.bulk_write(
+            [
+                ReplaceOne(
+                    {"granularity": granularity, "bucket": bucket},
+                    _expand({"granularity": granularity, "bucket": bucket}, fields),
+                    upsert=True
+                )
+                for (granularity, bucket), fields in buckets.items()
+            ],
+            ordered=False
+        )
+    return counted
+
+
+def _expand(doc: dict, fields: Dict[str, float]) -> dict:
+    """Turn dotted $inc paths into a nested document"""
+    for path, amount in fields.items():
+        target = doc
+        *parents, leaf = path.split(".")
+        for key in parents:
+            target = target.setdefault(key, {})
+        target[leaf] = amount
+    return doc
+
+
+def _merge_breakdown(total: Dict[str, Dict[str, float]], part: Dict[str, Dict[str, float]]):
+    for key, stats in part.items():
+        entry = total.setdefault(key, {"units": 0, "revenue": 0.0})
+        entry["units"] += stats.get("units", 0)
+        entry["revenue"] += stats.get("revenue", 0.0)
+
+
+async def sales_report(start: datetime, end: datetime, granularity: str, top: int = 10) -> dict:
+    """Revenue series and breakdowns for [start, end) from the rollups"""
+    rollups = await SalesRollup.find(
+        SalesRollup.granularity == granularity,
+        SalesRollup.bucket >= bucket_start(start, granularity),
+        SalesRollup.bucket < end
+    ).sort("+bucket").to_list()
+
+    products: Dict[str, Dict[str, float]] = {}
+    categories: Dict[str, Dict[str, float]] = {}
+    series = []
+    for rollup in rollups:
+        _merge_breakdown(products, rollup.products)
+        _merge_breakdown(categories, rollup.categories)
+        series.append({
+            "bucket": rollup.bucket,
+            "revenue": round(rollup.revenue, 2),
+            "orders": rollup.orders,
+            "units": rollup.units,
+        })
+
+    top_products = sorted(products.items(), key=lambda item: item[1]["revenue"], reverse=True)[:top]
+    names = {}
+    if top_products:
+        cursor = Product.get_motor_collection().find(
+            {"_id": {"$in": [ObjectId(pid) for pid, _ in top_products]}},
+            projection={"name": 1}
+        )
+        names = {str(doc["_id"]): doc["name"] async for doc in cursor}
+
+    return {
+        "granularity": granularity,
+        "from": start,
+        "to": end,
+        "totals": {
+            "revenue": round(sum(r.revenue for r in rollups), 2),
+            "orders": sum(r.orders for r in rollups),
+            "units": sum(r.units for r in rollups),
+        },
+        "series": series,
+        "topProducts": [
+            {"product": pid, "name": names.get(pid), "units": stats["units"], "revenue": round(stats["revenue"], 2)}
+            for pid, stats in top_products
+        ],
+        "categories": [
+            {"category": name, "units": stats["units"], "revenue": round(stats["revenue"], 2)}
+            for name, stats in sorted(categories.items(), key=lambda item: item[1]["revenue"], reverse=True)
+        ],
+    }
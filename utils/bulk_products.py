@@ -0,0 +1,158 @@
+"""
+Bulk price and stock changes
+
+Repricing runs as a single server-side update_many with an aggregation
+pipeline; stock levels from a CSV go out as one bulk_write per batch. Both
+support a dry run that only counts (and previews) what would change, and
+both notify product caches afterwards.
+"""
+import asyncio
+from datetime import datetime
+from itertools import islice
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from config.settings import settings
+from models.product import Product
+from schemas.product import BulkPriceUpdate, StockUpdateRow
+from utils.product_import import ImportReport, read_rows, validation_message
+from utils.product_changes import products_changed
+from utils.stock_shards import configure_stock_shards, give_to_shards, remove_from_shards
+from typing import BinaryIO, Dict, List, Tuple
+
+PREVIEW_SIZE = 5
+
+
+def price_filter(update: BulkPriceUpdate) -> dict:
+    query = {}
+    if update.category:
+        query["category"] = update.category
+    if update.brand:
+        query["brand"] = update.brand
+    return query
+
+
+def new_price_expression(update: BulkPriceUpdate) -> dict:
+    """The repriced value of $price, rounded to cents and never negative"""
+    if update.mode == "percent":
+        changed = {"$multiply": ["$price", 1 + update.value / 100]}
+    else:
+        changed = {"$add": ["$price", update.value]}
+    return {"$max": [0, {"$round": [changed, 2]}]}
+
+
+async def bulk_update_prices(update: BulkPriceUpdate) -> dict:
+    """Reprice every product matching the category/brand filter"""
+    products = Product.get_motor_collection()
+    query = price_filter(update)
+    new_price = new_price_expression(update)
+
+    if update.dry_run:
+        matched = await products.count_documents(query)
+        preview = await products.aggregate([
+            {"$match": query},
+            {"$limit": PREVIEW_SIZE},
+            {"$project": {"_id": 0, "sku": 1, "name": 1, "price": 1, "newPrice": new_price}},
+        ]).to_list(None)
+        return {"dryRun": True, "matched": matched, "preview": preview}
+
+    result = await products.update_many(
+        query,
+        [{"$set": {"price": new_price, "updatedAt": datetime.utcnow()}}]
+    )
+    products_changed()
+    return {"dryRun": False, "matched": result.matched_count, "modified": result.modified_count}
+
+
+def _collect(rows, mode: str, report: ImportReport) -> Dict[str, Tuple[int, int]]:
+    """Validated quantities by SKU; repeated SKUs add up for increments, last wins for set"""
+    quantities: Dict[str, Tuple[int, int]] = {}
+    for line, raw in rows:
+        report.rows += 1
+        if isinstance(raw, Exception):
+            report.error(line, f"Unreadable row: {raw}")
+            continue
+        try:
+            row = StockUpdateRow.model_validate(raw)
+        except ValidationError as e:
+            report.error(line, validation_message(e), raw.get("sku"))
+            continue
+        if mode == "set" and row.quantity < 0:
+            report.error(line, "quantity: stock level cannot be negative", row.sku)
+            continue
+        if row.sku in quantities:
+            report.duplicates += 1
+            if mode == "increment":
+                row.quantity += quantities[row.sku][1]
+        quantities[row.sku] = (line, row.quantity)
+    return quantities
+
+
+async def _update_stock_batch(rows, mode: str, dry_run: bool, report: ImportReport, changed: List[ObjectId]):
+    quantities = _collect(rows, mode, report)
+    if not quantities:
+        return
+
+    products = Product.get_motor_collection()
+    found = {
+        doc["sku"]: doc
+        async for doc in products.find(
+            {"sku": {"$in": list(quantities)}},
+            projection={"sku": 1, "stockShards": 1}
+        )
+    }
+    for sku, (line, _) in quantities.items():
+        if sku not in found:
+            report.error(line, "Unknown SKU", sku)
+
+    if dry_run:
+        report.updated += len(found)
+        return
+
+    now = datetime.utcnow()
+    operations = []
+    for sku, doc in found.items():
+        line, quantity = quantities[sku]
+        shards = doc.get("stockShards", 0)
+        if shards and mode == "set":
+            await configure_stock_shards(doc["_id"], shards, total=quantity)
+        elif shards and quantity > 0:
+            await give_to_shards(doc["_id"], quantity, num_shards=shards)
+        elif shards and quantity < 0:
+            # Decrements stop at zero rather than failing the row, sharded or not
+            await remove_from_shards(doc["_id"], -quantity)
+        elif not shards and mode == "set":
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"countInStock": quantity, "updatedAt": now}}))
+        elif not shards:
+            operations.append(UpdateOne({"_id": doc["_id"]}, [{"$set": {
+                "countInStock": {"$max": [0, {"$add": ["$countInStock", quantity]}]},
+                "updatedAt": now
+            }}]))
+        report.updated += 1
+        changed.append(doc["_id"])
+
+    if operations:
+        await products.bulk_write(operations, ordered=False)
+
+
+async def bulk_update_stock(binary: BinaryIO, mode: str, dry_run: bool = False) -> dict:
+    """
+    Apply a CSV of sku,quantity rows: set the stock level or add to it
+
+    Read PRODUCT_IMPORT_BATCH_SIZE rows at a time like the product import;
+    unknown SKUs and bad rows are reported by line and skipped.
+    """
+    report = ImportReport()
+    changed: List[ObjectId] = []
+    rows = read_rows(binary, "csv")
+    while True:
+        batch = await asyncio.to_thread(lambda: list(islice(rows, settings.PRODUCT_IMPORT_BATCH_SIZE)))
+        if not batch:
+            break
+        await _update_stock_batch(batch, mode, dry_run, report, changed)
+
+    if changed:
+        products_changed(changed)
+    summary = report.snapshot()
+    del summary["inserted"], summary["unchanged"]
+    return {"dryRun": dry_run, "mode": mode, **summary}
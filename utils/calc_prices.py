@@ -1,31 +1,88 @@
-from typing import List
+from typing import List, Sequence
 
+import numpy as np
 
-def calc_prices(order_items: List[dict]) -> dict:
-    """
-    Calculate order prices
-    
-    Args:
-        order_items: List of order items with qty and price
-        
-    Returns:
-        dict with itemsPrice, taxPrice, shippingPrice, totalPrice
-    """
-    # Calculate items price
-    items_price = sum(item['price'] * item['qty'] for item in order_items)
-    
+
+def _price_summary(items_price: float) -> dict:
     # Calculate shipping price (free if over $100, else $10)
     shipping_price = 0 if items_price > 100 else 10
-    
+
     # Calculate tax price (15% tax)
     tax_price = round(0.15 * items_price, 2)
-    
+
     # Calculate total price
     total_price = round(items_price + shipping_price + tax_price, 2)
-    
+
     return {
         "itemsPrice": round(items_price, 2),
         "shippingPrice": round(shipping_price, 2),
         "taxPrice": tax_price,
         "totalPrice": total_price
     }
+
+
+def calc_prices(order_items: List[dict]) -> dict:
+    """
+    Calculate order prices
+
+    Args:
+        order_items: List of order items with qty and price
+
+    Returns:
+        dict with itemsPrice, taxPrice, shippingPrice, totalPrice
+    """
+    # Calculate items price
+    items_price = sum(item['price'] * item['qty'] for item in order_items)
+
+    return _price_summary(items_price)
+
+
+def _round_cents(values):
+    """round(value, 2) for every value, matching Python's rounding exactly"""
+    scaled = values * 100
+    rounded = np.round(scaled) / 100
+    # Python rounds the exact decimal value; where a value sits on a half
+    # cent, x * 100 can land on the other side of .5, so those few go
+    # through round() itself
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def calc_prices_batch(carts: Sequence[List[dict]]) -> List[dict]:
+    """
+    Calculate prices for many carts in one call
+
+    Gives exactly what calc_prices gives for each cart, but the line totals,
+    shipping, tax and rounding of every cart are computed in vectorized
+    NumPy passes (np.bincount adds each cart's lines in the same order
+    sum() does).
+
+    Args:
+        carts: List of carts, each a list of items with qty and price
+
+    Returns:
+        list of calc_prices dicts, one per cart
+    """
+    lines = [item for cart in carts for item in cart]
+    prices = np.fromiter((item['price'] for item in lines), dtype=np.float64, count=len(lines))
+    quantities = np.fromiter((item['qty'] for item in lines), dtype=np.float64, count=len(lines))
+    sizes = np.fromiter((len(cart) for cart in carts), dtype=np.int64, count=len(carts))
+    cart_index = np.repeat(np.arange(len(carts)), sizes)
+    items_price = np.bincount(cart_index, weights=prices * quantities, minlength=len(carts))
+
+    shipping_price = np.where(items_price > 100, 0, 10)
+    tax_price = _round_cents(0.15 * items_price)
+    total_price = _round_cents(items_price + shipping_price + tax_price)
+
+    return [
+        {
+            "itemsPrice": items,
+            "shippingPrice": shipping,
+            "taxPrice": tax,
+            "totalPrice": total
+        }
+        for items, shipping, tax, total in zip(
+            _round_cents(items_price).tolist(), shipping_price.tolist(), tax_price.tolist(), total_price.tolist()
+        )
+    ]
@@ -0,0 +1,198 @@
+"""
+Catalog filtering, sorting and facets
+
+`product_filter` turns the listing's filter parameters into one Mongo query,
+shaped so the category/brand/price indexes can serve it. Each SORTS option
+has an index of its own (with and without a category prefix) ending in _id,
+so sorted listings never sort in memory and can be paged with a cursor that
+carries the last product's sort value and _id (and the sort and filters it
+belongs to).
+
+`product_facets` counts the matching products per category and brand and
+per price bucket in a single $facet aggregation; results are cached per
+filter combination and dropped whenever products change. Only cached
+results are fast: a miss reads every matching product, which for a broad
+filter on a large catalog takes far longer than a cached lookup.
+"""
+import base64
+import hashlib
+from bson import json_util
+from config.settings import settings
+from models.product import Product
+from utils.ttl_cache import TTLCache
+from utils.product_changes import on_products_changed
+from typing import List, Optional, Tuple
+
+_facets = TTLCache(maxsize=settings.PRODUCT_FACET_CACHE_SIZE, ttl=settings.PRODUCT_FACET_CACHE_TTL)
+# Bumped on every clear; an aggregation only caches its result if no clear
+# happened while it ran, since it may have counted the products as they were
+_generation = 0
+
+
+def _forget_facets(product_ids: Optional[List[str]]):
+    global _generation
+    # Any product can move between buckets, so every combination goes
+    _generation += 1
+    _facets.clear()
+
+
+on_products_changed(_forget_facets)
+
+
+def product_filter(
+    keyword: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+    brands: Optional[List[str]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None
+) -> dict:
+    """Mongo query for the listing filters; several categories or brands match any of them"""
+    query = {}
+    if categories:
+        query["category"] = categories[0] if len(categories) == 1 else {"$in": sorted(set(categories))}
+    if brands:
+        query["brand"] = brands[0] if len(brands) == 1 else {"$in": sorted(set(brands))}
+    if min_price is not None or max_price is not None:
+        query["price"] = {}
+        if min_price is not None:
+            query["price"]["$gte"] = min_price
+        if max_price is not None:
+            query["price"]["$lte"] = max_price
+    if min_rating is not None:
+        query["rating"] = {"$gte": min_rating}
+    if keyword:
+        query["name"] = {"$regex": keyword, "$options": "i"}
+    return query
+
+
+# ?sort= value -> (field, direction); ties are broken by _id in the same direction
+SORTS = {
+    "price": ("price", 1),
+    "-price": ("price", -1),
+    "rating": ("rating", 1),
+    "-rating": ("rating", -1),
+    "newest": ("createdAt", -1),
+    "popularity": ("numReviews", -1),
+}
+SORT_PATTERN = "^(" + "|".join(SORTS) + ")$"
+
+
+def product_sort(sort: Optional[str]) -> List[Tuple[str, int]]:
+    """Mongo sort for a SORTS option; no option lists products in _id order"""
+    if sort is None:
+        return [("_id", 1)]
+    field, direction = SORTS[sort]
+    return [(field, direction), ("_id", direction)]
+
+
+def _filter_hash(query: dict) -> str:
+    return hashlib.sha256(json_util.dumps(query, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def encode_cursor(doc: dict, sort: Optional[str], query: dict) -> str:
+    """
+    Opaque cursor pointing just after `doc` in this listing
+
+    It carries the SORTS option and a hash of the filter query along with
+    the position, so it is only accepted back for the same listing.
+    """
+    position = [doc.get(field) for field, _ in product_sort(sort)]
+    payload = {"sort": sort, "filters": _filter_hash(query), "after": position}
+    return base64.urlsafe_b64encode(json_util.dumps(payload).encode()).decode()
+
+
+def after_cursor(query: dict, sort: Optional[str], cursor: str) -> dict:
+    """
+    Narrow `query` to the products after the cursor in this sort order
+
+    Raises ValueError for a malformed cursor or one made for another sort
+    or other filters.
+    """
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+        position = payload["after"]
+        made_for = (payload["sort"], payload["filters"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if made_for != (sort, _filter_hash(query)):
+        raise ValueError("Cursor was made for a different sort or filters")
+    order = product_sort(sort)
+    if not isinstance(position, list) or len(position) != len(order):
+        raise ValueError("Invalid cursor")
+
+    # (a > x) or (a == x and b > y) ..., with < for descending keys
+    branches = []
+    for i, (field, direction) in enumerate(order):
+        branch = {order[j][0]: position[j] for j in range(i)}
+        branch[field] = {"$gt" if direction == 1 else "$lt": position[i]}
+        branches.append(branch)
+    after = branches[0] if len(branches) == 1 else {"$or": branches}
+    return {"$and": [query, after]} if query else after
+
+
+def _cache_key(query: dict):
+    return repr(sorted(query.items()))
+
+
+def _price_ranges(buckets: List[dict]) -> List[dict]:
+    """Non-empty price buckets as {min, max, count}; the last has no max"""
+    boundaries = settings.PRODUCT_PRICE_BUCKETS
+    counts = {bucket["_id"]: bucket["count"] for bucket in buckets}
+    ranges = []
+    for i, low in enumerate(boundaries):
+        if counts.get(low):
+            high = boundaries[i + 1] if i + 1 < len(boundaries) else None
+            ranges.append({"min": low, "max": high, "count": counts[low]})
+    return ranges
+
+
+async def product_facets(query: dict) -> dict:
+    """
+    Category, brand and price-range counts for the products matching `query`
+
+    The filter runs once as the leading $match (so it can use the indexes)
+    and $facet groups the matches three ways. Categories and brands are the
+    PRODUCT_FACET_LIMIT most common; price ranges are the
+    PRODUCT_PRICE_BUCKETS boundaries, the last one open-ended.
+    """
+    key = _cache_key(query)
+    cached = _facets.get(key)
+    if cached is not None:
+        return cached
+    generation = _generation
+
+    def top(field):
+        return [
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": settings.PRODUCT_FACET_LIMIT},
+        ]
+
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "categories": top("category"),
+            "brands": top("brand"),
+            "prices": [{"$bucket": {
+                "groupBy": "$price",
+                # A final boundary above every price makes the last bucket
+                # open-ended; anything below the first lands in "other"
+                "boundaries": [*settings.PRODUCT_PRICE_BUCKETS, float("inf")],
+                "default": "other",
+                "output": {"count": {"$sum": 1}},
+            }}],
+            "total": [{"$count": "count"}],
+        }},
+    ]
+    result = (await Product.get_motor_collection().aggregate(pipeline).to_list(1))[0]
+
+    facets = {
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "categories": [{"value": row["_id"], "count": row["count"]} for row in result["categories"]],
+        "brands": [{"value": row["_id"], "count": row["count"]} for row in result["brands"]],
+        "prices": _price_ranges(result["prices"]),
+    }
+    if generation == _generation:
+        _facets.set(key, facets)
+    return facets
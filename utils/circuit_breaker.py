@@ -0,0 +1,148 @@
+"""Circuit breaker and bulkhead guards for outbound dependencies"""
+import asyncio
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class BulkheadFullError(Exception):
+    """Raised when no concurrency slot frees up in time"""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker
+
+    Tracks the outcome of the last `window` calls. Once at least `min_calls`
+    have been seen and the failure rate reaches `failure_rate`, the circuit
+    opens and calls fail fast for `open_seconds`. It then goes half-open and
+    lets `half_open_probes` calls through: one success closes it again, a
+    failure reopens it. Cancelled calls count as failures because they are
+    almost always callers giving up on a slow dependency.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window: int = 20, failure_rate: float = 0.5,
+                 min_calls: int = 5, open_seconds: float = 30.0, half_open_probes: int = 1):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit will allow a probe"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def _acquire(self):
+        state = self.state
+        if state == self.OPEN:
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        if state == self.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                raise CircuitOpenError(f"{self.name} circuit is half-open")
+            self._probes_in_flight += 1
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+
+    def record_success(self):
+        if self._state == self.HALF_OPEN:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+        self._outcomes.append(True)
+
+    def record_failure(self):
+        if self._state == self.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    async def call(self, func, *args, **kwargs):
+        """Run `await func(*args, **kwargs)` through the breaker"""
+        self._acquire()
+        try:
+            result = await func(*args, **kwargs)
+        except (Exception, asyncio.CancelledError):
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def reset(self):
+        """Close the circuit and forget recent outcomes"""
+        self._state = self.CLOSED
+        self._outcomes.clear()
+        self._probes_in_flight = 0
+
+    def snapshot(self) -> dict:
+        failures = self._outcomes.count(False)
+        return {
+            "state": self.state,
+            "recentCalls": len(self._outcomes),
+            "recentFailures": failures,
+            "retryAfter": round(self.retry_after(), 2),
+        }
+
+
+class Bulkhead:
+    """Caps concurrent calls; waits at most `max_wait` seconds for a slot"""
+
+    def __init__(self, name: str, max_concurrent: int = 10, max_wait: float = 0.5):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def call(self, func, *args, **kwargs):
+        """Run `await func(*args, **kwargs)` inside a concurrency slot"""
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise BulkheadFullError(f"{self.name} bulkhead is full")
+        self.in_flight += 1
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def reset(self):
+        """Drop all slots and counters; only safe while no calls are in flight"""
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.in_flight = 0
+        self.rejected = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "inFlight": self.in_flight,
+            "maxConcurrent": self.max_concurrent,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,316 @@
+"""
+Columnar order snapshots for heavier reporting
+
+Paid orders (hot and archived) are periodically flattened into NumPy
+columns, one array per field, and saved as .npy files in a versioned
+directory that is memory-mapped on the next start. Percentiles, basket sizes and cohorts are then computed
+vectorized over those columns instead of looping over Order models.
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from config.settings import settings
+from models.order import Order, ArchivedOrder
+from typing import Dict, List, Optional
+
+ORDER_COLUMNS = ("paid_at", "user", "total", "units", "lines")
+LINE_COLUMNS = ("order", "product", "qty", "price")
+EPOCH = datetime(1970, 1, 1)
+# Names the snapshot version directory in use
+CURRENT = "CURRENT"
+
+_snapshot: Optional["ColumnarSnapshot"] = None
+_snapshot_task: Optional[asyncio.Task] = None
+_build_lock = asyncio.Lock()
+
+
+class ColumnarSnapshot:
+    """Order and order-line columns plus the ID tables they index into"""
+
+    def __init__(self, orders: Dict[str, np.ndarray], lines: Dict[str, np.ndarray],
+                 users: List[str], products: List[str], built_at: datetime, build_seconds: float):
+        self.orders = orders
+        self.lines = lines
+        self.users = users
+        self.products = products
+        self.built_at = built_at
+        self.build_seconds = build_seconds
+
+    @property
+    def order_count(self) -> int:
+        return len(self.orders["total"])
+
+    @property
+    def line_count(self) -> int:
+        return len(self.lines["qty"])
+
+    def describe(self) -> dict:
+        return {
+            "builtAt": self.built_at,
+            "buildSeconds": round(self.build_seconds, 2),
+            "orders": self.order_count,
+            "lines": self.line_count,
+            "users": len(self.users),
+            "products": len(self.products),
+        }
+
+    def save(self, root: Path) -> Path:
+        """
+        Write every column as .npy into a new version directory under `root`
+
+        The CURRENT pointer file is switched to it with os.replace, so a
+        reader always finds a whole snapshot, and the version in use (which
+        may be memory-mapped) is never written over. Returns the version
+        directory.
+        """
+        directory = root / f"snapshot-{self.built_at:%Y%m%dT%H%M%S%f}"
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        for name, column in self.orders.items():
+            np.save(directory / f"orders.{name}.npy", column)
+        for name, column in self.lines.items():
+            np.save(directory / f"lines.{name}.npy", column)
+        (directory / "meta.json").write_text(json.dumps({
+            "users": self.users,
+            "products": self.products,
+            "builtAt": self.built_at.isoformat(),
+            "buildSeconds": self.build_seconds,
+        }))
+        pointer = root / "CURRENT.tmp"
+        pointer.write_text(directory.name)
+        os.replace(pointer, root / CURRENT)
+        return directory
+
+    @classmethod
+    def load(cls, root: Path) -> Optional["ColumnarSnapshot"]:
+        """Memory-map the version CURRENT points to; None if there is none"""
+        pointer = root / CURRENT
+        if not pointer.exists():
+            return None
+        directory = root / pointer.read_text().strip()
+        meta_path = directory / "meta.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        return cls(
+            {name: np.load(directory / f"orders.{name}.npy", mmap_mode="r") for name in ORDER_COLUMNS},
+            {name: np.load(directory / f"lines.{name}.npy", mmap_mode="r") for name in LINE_COLUMNS},
+            meta["users"],
+            meta["products"],
+            datetime.fromisoformat(meta["builtAt"]),
+            meta["buildSeconds"],
+        )
+
+
+def prune_snapshots(root: Path):
+    """
+    Delete every version directory CURRENT does not point to
+
+    A version still memory-mapped (on Windows) cannot be deleted yet; it is
+    left for the next prune.
+    """
+    pointer = root / CURRENT
+    if not pointer.exists():
+        return
+    current = pointer.read_text().strip()
+    for directory in root.glob("snapshot-*"):
+        if directory.name != current:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+async def build_snapshot() -> ColumnarSnapshot:
+    """
+    Read every paid order once and flatten it into columns
+
+    Columns are accumulated in stdlib arrays, which grow without per-row
+    Python objects, and handed to NumPy without copying.
+    """
+    started = time.perf_counter()
+    paid_at, order_user, total, units, line_count = array("q"), array("l"), array("d"), array("l"), array("l")
+    line_order, line_product, line_qty, line_price = array("l"), array("l"), array("l"), array("d")
+    user_index: Dict[str, int] = {}
+    product_index: Dict[str, int] = {}
+
+    projection = {"user": 1, "paidAt": 1, "totalPrice": 1, "orderItems.product": 1, "orderItems.qty": 1,
+                  "orderItems.price": 1}
+    for model in (Order, ArchivedOrder):
+        cursor = model.get_motor_collection().find({"isPaid": True}, projection=projection)
+        cursor.batch_size(settings.ANALYTICS_SNAPSHOT_BATCH_SIZE)
+        async for doc in cursor:
+            row = len(total)
+            user = user_index.setdefault(str(doc["user"]), len(user_index))
+            items = doc.get("orderItems", [])
+            paid_at.append(int((doc["paidAt"] - EPOCH).total_seconds()) if doc.get("paidAt") else 0)
+            order_user.append(user)
+            total.append(doc.get("totalPrice", 0.0))
+            line_count.append(len(items))
+            order_units = 0
+            for item in items:
+                line_order.append(row)
+                line_product.append(product_index.setdefault(str(item["product"]), len(product_index)))
+                line_qty.append(item["qty"])
+                line_price.append(item["price"])
+                order_units += item["qty"]
+            units.append(order_units)
+
+    def column(values: array, dtype) -> np.ndarray:
+        return np.frombuffer(values, dtype=values.typecode).astype(dtype, copy=False) if len(values) \
+            else np.empty(0, dtype=dtype)
+
+    return ColumnarSnapshot(
+        {
+            "paid_at": column(paid_at, np.int64),
+            "user": column(order_user, np.int32),
+            "total": column(total, np.float64),
+            "units": column(units, np.int32),
+            "lines": column(line_count, np.int32),
+        },
+        {
+            "order": column(line_order, np.int32),
+            "product": column(line_product, np.int32),
+            "qty": column(line_qty, np.int32),
+            "price": column(line_price, np.float64),
+        },
+        list(user_index),
+        list(product_index),
+        datetime.utcnow(),
+        time.perf_counter() - started,
+    )
+
+
+async def refresh_snapshot() -> ColumnarSnapshot:
+    """Rebuild the snapshot, persist it, and make it the current one"""
+    global _snapshot
+    async with _build_lock:
+        snapshot = await build_snapshot()
+        root = Path(settings.ANALYTICS_SNAPSHOT_DIR)
+        await asyncio.to_thread(snapshot.save, root)
+        _snapshot = snapshot
+        # Older versions go only once nothing new is served from them
+        await asyncio.to_thread(prune_snapshots, root)
+        return snapshot
+
+
+def current_snapshot() -> Optional[ColumnarSnapshot]:
+    return _snapshot
+
+
+def revenue_percentiles(snapshot: ColumnarSnapshot, percentiles=(50, 75, 90, 95, 99)) -> dict:
+    """Order value distribution"""
+    totals = snapshot.orders["total"]
+    if not len(totals):
+        return {"orders": 0, "revenue": 0.0, "mean": 0.0, "percentiles": {}}
+    values = np.percentile(totals, percentiles)
+    return {
+        "orders": int(len(totals)),
+        "revenue": round(float(totals.sum()), 2),
+        "mean": round(float(totals.mean()), 2),
+        "percentiles": {f"p{p}": round(float(v), 2) for p, v in zip(percentiles, values)},
+    }
+
+
+def basket_sizes(snapshot: ColumnarSnapshot, cap: int = 20) -> dict:
+    """How many orders have 1, 2, ... units and distinct lines; the last bucket is `cap` or more"""
+    def histogram(values):
+        counts = np.bincount(np.minimum(values, cap), minlength=cap + 1)[1:]
+        return [{"size": size, "orders": int(count)} for size, count in enumerate(counts, start=1)]
+
+    units = snapshot.orders["units"]
+    return {
+        "cap": cap,
+        "meanUnits": round(float(units.mean()), 2) if len(units) else 0.0,
+        "units": histogram(units),
+        "lines": histogram(snapshot.orders["lines"]),
+    }
+
+
+def monthly_cohorts(snapshot: ColumnarSnapshot, max_months: int = 12) -> List[dict]:
+    """
+    Customers grouped by the month of their first paid order, with how many
+    of them ordered again 0..max_months months later
+    """
+    paid = snapshot.orders["paid_at"] > 0
+    users = snapshot.orders["user"][paid].astype(np.int64)
+    if not len(users):
+        return []
+    months = snapshot.orders["paid_at"][paid].astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+
+    first = np.full(len(snapshot.users), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first, users, months)
+    offsets = months - first[users]
+    keep = offsets <= max_months
+
+    # One count per (user, month offset), however many orders fell in that month
+    active = np.unique(users[keep] * (max_months + 1) + offsets[keep])
+    active_users, active_offsets = np.divmod(active, max_months + 1)
+    cells, counts = np.unique(first[active_users] * (max_months + 1) + active_offsets, return_counts=True)
+    cohort_months, cell_offsets = np.divmod(cells, max_months + 1)
+
+    cohorts: Dict[int, List[int]] = {}
+    for month, offset, count in zip(cohort_months.tolist(), cell_offsets.tolist(), counts.tolist()):
+        cohorts.setdefault(month, [0] * (max_months + 1))[offset] = count
+    return [
+        {
+            "cohort": str(np.datetime64(month, "M")),
+            "customers": retained[0],
+            "retention": retained,
+        }
+        for month, retained in sorted(cohorts.items())
+    ]
+
+
+def top_products(snapshot: ColumnarSnapshot, limit: int = 10) -> List[dict]:
+    """Products ranked by revenue across the snapshot"""
+    lines = snapshot.lines
+    if not len(lines["qty"]):
+        return []
+    size = len(snapshot.products)
+    revenue = np.bincount(lines["product"], weights=lines["qty"] * lines["price"], minlength=size)
+    units = np.bincount(lines["product"], weights=lines["qty"], minlength=size)
+    ranked = np.argsort(revenue)[::-1][:limit]
+    return [
+        {"product": snapshot.products[i], "units": int(units[i]), "revenue": round(float(revenue[i]), 2)}
+        for i in ranked.tolist()
+    ]
+
+
+async def _run_snapshots():
+    if _snapshot is not None:
+        # A snapshot saved by the previous run is reused until it is due
+        age = (datetime.utcnow() - _snapshot.built_at).total_seconds()
+        await asyncio.sleep(max(0.0, settings.ANALYTICS_SNAPSHOT_INTERVAL - age))
+    while True:
+        try:
+            await refresh_snapshot()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        await asyncio.sleep(settings.ANALYTICS_SNAPSHOT_INTERVAL)
+
+
+async def start_columnar_snapshots():
+    """Load the last saved snapshot and start the refresh loop (called from the app lifespan)"""
+    global _snapshot, _snapshot_task
+    if _snapshot is None:
+        _snapshot = await asyncio.to_thread(ColumnarSnapshot.load, Path(settings.ANALYTICS_SNAPSHOT_DIR))
+    if _snapshot_task is None or _snapshot_task.done():
+        _snapshot_task = asyncio.create_task(_run_snapshots())
+
+
+async def stop_columnar_snapshots():
+    """Stop the refresh loop"""
+    global _snapshot_task
+    if _snapshot_task is not None:
+        _snapshot_task.cancel()
+        try:
+            await _snapshot_task
+        except asyncio.CancelledError:
+            pass
+        _snapshot_task = None
@@ -0,0 +1,160 @@
+"""
+Streaming data export
+
+Rows are read from a Motor cursor one batch at a time, encoded as CSV or
+NDJSON into a small buffer, and yielded in chunks (optionally through a
+streaming gzip compressor), so memory stays flat however many rows there
+are.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from models.order import Order
+from utils.order_serializer import serialize_order
+from typing import AsyncIterator, Callable, Dict, Iterable, List
+
+CHUNK_SIZE = 64 * 1024
+
+ORDER_CSV_COLUMNS = [
+    "_id", "user", "paymentMethod", "paymentId", "itemCount", "units", "itemsPrice", "taxPrice",
+    "shippingPrice", "totalPrice", "isPaid", "paidAt", "isDelivered", "deliveredAt", "city", "country",
+    "createdAt", "updatedAt",
+]
+PRODUCT_COLUMNS = [
+    "_id", "name", "brand", "category", "price", "countInStock", "rating", "numReviews", "createdAt", "updatedAt",
+]
+USER_COLUMNS = ["_id", "name", "email", "isAdmin", "createdAt", "updatedAt"]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None:
+        return ""
+    return value
+
+
+def order_row(doc: dict) -> dict:
+    """A raw orders document in the API's order shape"""
+    return serialize_order(Order.model_validate(doc))
+
+
+def order_csv_row(order: dict) -> dict:
+    """Flatten a serialized order to one CSV line"""
+    payment = order["paymentResult"] or {}
+    return {
+        **{key: order[key] for key in ORDER_CSV_COLUMNS if key in order},
+        "paymentId": payment.get("id"),
+        "itemCount": len(order["orderItems"]),
+        "units": sum(item["qty"] for item in order["orderItems"]),
+        "city": order["shippingAddress"]["city"],
+        "country": order["shippingAddress"]["country"],
+    }
+
+
+def flat_row(columns: List[str]) -> Callable[[dict], dict]:
+    """Pick `columns` from a raw document, stringifying the _id"""
+    def row(doc: dict) -> dict:
+        values = {column: doc.get(column) for column in columns}
+        values["_id"] = str(doc["_id"])
+        return values
+    return row
+
+
+def encode_ndjson(rows: Iterable[dict]) -> Iterable[str]:
+    for row in rows:
+        yield json.dumps(row, default=_json_default, separators=(",", ":")) + "\n"
+
+
+class CsvEncoder:
+    """Incremental CSV writer; the header is emitted with the first batch"""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.writer = csv.DictWriter(self.buffer, fieldnames=columns, extrasaction="ignore")
+        self.header_written = False
+
+    def encode(self, rows: Iterable[dict]) -> Iterable[str]:
+        if not self.header_written:
+            self.writer.writeheader()
+            self.header_written = True
+            yield self._drain()
+        for row in rows:
+            self.writer.writerow({key: _csv_value(value) for key, value in row.items()})
+            yield self._drain()
+
+    def _drain(self) -> str:
+        text = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text
+
+
+async def stream_export(
+    cursors: Iterable,
+    to_row: Callable[[dict], dict],
+    export_format: str,
+    csv_columns: List[str],
+    csv_row: Callable[[dict], dict] = None,
+    compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Encode every document from `cursors` and yield bytes in ~CHUNK_SIZE pieces
+
+    `to_row` shapes a raw document; `csv_row` flattens that shape further
+    for CSV when it is nested.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    csv_encoder = CsvEncoder(csv_columns) if export_format == "csv" else None
+    pending: List[str] = []
+    pending_size = 0
+
+    def flush() -> bytes:
+        nonlocal pending, pending_size
+        data = "".join(pending).encode("utf-8")
+        pending, pending_size = [], 0
+        return compressor.compress(data) if compressor else data
+
+    for cursor in cursors:
+        async for doc in cursor:
+            row = to_row(doc)
+            if csv_encoder is not None:
+                pieces = csv_encoder.encode([csv_row(row) if csv_row else row])
+            else:
+                pieces = encode_ndjson([row])
+            for piece in pieces:
+                pending.append(piece)
+                pending_size += len(piece)
+            if pending_size >= CHUNK_SIZE:
+                chunk = flush()
+                if chunk:
+                    yield chunk
+
+    if csv_encoder is not None and not csv_encoder.header_written:
+        pending.extend(csv_encoder.encode([]))
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_headers(name: str, export_format: str, compress: bool) -> Dict[str, str]:
+    extension = "csv" if export_format == "csv" else "ndjson"
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{extension}" + (".gz" if compress else "")
+    return {"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+
+
+def media_type(export_format: str, compress: bool) -> str:
+    if compress:
+        return "application/gzip"
+    return "text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson"
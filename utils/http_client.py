@@ -0,0 +1,58 @@
+"""Application-wide pooled HTTP client for outbound API calls"""
+import httpx
+from config.settings import settings
+from typing import Optional
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.OUTBOUND_HTTP2 and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=settings.OUTBOUND_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OUTBOUND_MAX_KEEPALIVE,
+            keepalive_expiry=settings.OUTBOUND_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.OUTBOUND_CONNECT_TIMEOUT,
+            read=settings.OUTBOUND_READ_TIMEOUT,
+            write=settings.OUTBOUND_READ_TIMEOUT,
+            pool=settings.OUTBOUND_CONNECT_TIMEOUT,
+        ),
+    )
+
+
+async def start_http_client():
+    """Create the shared client (called from the app lifespan)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+
+
+async def close_http_client():
+    """Close the shared client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client
+
+    Created lazily so scripts that never run the app lifespan still work.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,141 @@
+"""
+Idempotency-Key support for unsafe endpoints
+
+The first request with a given key runs the handler and stores its response;
+retries with the same key and body replay the stored response without
+running the handler again. Records live in a TTL-indexed collection with an
+in-memory cache in front for hot retries.
+"""
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config.settings import settings
+from models.idempotency import IdempotencyRecord
+from utils.ttl_cache import TTLCache
+from typing import Any, Awaitable, Callable, Optional
+
+# Completed records: key -> (fingerprint, status_code, response)
+_completed = TTLCache(maxsize=settings.IDEMPOTENCY_CACHE_SIZE, ttl=settings.IDEMPOTENCY_CACHE_TTL)
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a request body"""
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _replay(fingerprint: str, stored_fingerprint: str, status_code: int, response: Any) -> JSONResponse:
+    if fingerprint != stored_fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was reused with a different request"
+        )
+    return JSONResponse(
+        content=response,
+        status_code=status_code,
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+async def run_idempotent(
+    idempotency_key: Optional[str],
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+    status_code: int = status.HTTP_200_OK
+) -> Any:
+    """
+    Run `handler` at most once per (scope, idempotency_key)
+
+    Without a key the handler simply runs. `scope` should identify the
+    caller and endpoint so keys from different users never collide. Failed
+    handlers release the key so the client can retry, and a key left in
+    progress by a crashed process can be retried once its lease
+    (IDEMPOTENCY_LEASE_SECONDS) runs out.
+    """
+    if not idempotency_key:
+        return await handler()
+
+    key = f"{scope}:{idempotency_key}"
+    fingerprint = request_fingerprint(payload)
+
+    cached = _completed.get(key)
+    if cached:
+        return _replay(fingerprint, *cached)
+
+    collection = IdempotencyRecord.get_motor_collection()
+    record = await _claim(collection, key, fingerprint)
+    if record is None:
+        existing = await collection.find_one({"key": key})
+        if existing is None:
+            # Expired between the insert and the lookup; treat as a new request
+            return await run_idempotent(idempotency_key, scope, payload, handler, status_code)
+        if existing["state"] != "completed":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is already in progress"
+            )
+        stored = (existing["fingerprint"], existing["statusCode"], existing["response"])
+        _completed.set(key, stored)
+        return _replay(fingerprint, *stored)
+
+    # Only the holder of this lease may finish or release the record
+    lease = {"_id": record["_id"], "leaseId": record["leaseId"]}
+    try:
+        result = await handler()
+    except BaseException:
+        await collection.delete_one(lease)
+        raise
+
+    response = jsonable_encoder(result, by_alias=True)
+    await collection.update_one(lease, {
+        "$set": {"state": "completed", "statusCode": status_code, "response": response},
+        "$unset": {"leaseId": "", "lockedUntil": ""}
+    })
+    _completed.set(key, (fingerprint, status_code, response))
+
+    return result
+
+
+async def _claim(collection, key: str, fingerprint: str) -> Optional[dict]:
+    """
+    Insert an in-progress record for `key`, or take over one whose lease ran out
+
+    A lease outlives any healthy handler, so an expired one was left by a
+    process that died mid-request; its retry takes the record over rather
+    than getting 409 until the TTL index removes it. Returns None if the key
+    is completed or still leased.
+    """
+    now = datetime.utcnow()
+    lease_id = uuid.uuid4().hex
+    lease = timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    record = {
+        "key": key, "fingerprint": fingerprint, "state": "in_progress",
+        "leaseId": lease_id, "lockedUntil": now + lease, "createdAt": now
+    }
+    try:
+        result = await collection.insert_one(record)
+        return {**record, "_id": result.inserted_id}
+    except DuplicateKeyError:
+        pass
+
+    return await collection.find_one_and_update(
+        {
+            "key": key,
+            "fingerprint": fingerprint,
+            "state": "in_progress",
+            "$or": [
+                {"lockedUntil": {"$lt": now}},
+                # Records from before leases existed
+                {"lockedUntil": None, "createdAt": {"$lt": now - lease}},
+            ],
+        },
+        {"$set": {"leaseId": lease_id, "lockedUntil": now + lease, "createdAt": now}},
+        return_document=ReturnDocument.AFTER
+    )
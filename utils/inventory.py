@@ -0,0 +1,236 @@
+"""
+Stock reservation for orders
+
+Stock is taken when an order is created with concurrent conditional $inc
+updates, one per product (sharded hot products go through their stock
+shards instead). Either every line is reserved or the lines that did succeed
+are put back. Unpaid orders give their stock back after
+INVENTORY_RESERVATION_TIMEOUT.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import UpdateOne
+from config.settings import settings
+from models.order import Order
+from models.product import Product
+from utils.stock_shards import take_from_shards, give_to_shards
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class InsufficientStockError(Exception):
+    """Raised when one or more products cannot cover the requested quantity"""
+
+    def __init__(self, product_ids: List[str]):
+        self.product_ids = product_ids
+        super().__init__(f"Insufficient stock for products: {', '.join(product_ids)}")
+
+
+class ProductContention:
+    """Reservation counters for one product"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.reserved = 0
+        self.out_of_stock = 0
+        self.rolled_back = 0
+        self.released = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "reserved": self.reserved,
+            "outOfStock": self.out_of_stock,
+            "rolledBack": self.rolled_back,
+            "released": self.released,
+        }
+
+
+_contention: Dict[str, ProductContention] = defaultdict(ProductContention)
+_sweeper: Optional[asyncio.Task] = None
+
+
+def _products_collection():
+    return Product.get_motor_collection()
+
+
+def _orders_collection():
+    return Order.get_motor_collection()
+
+
+def _group_quantities(items: Iterable[Tuple[ObjectId, int]]) -> Dict[ObjectId, int]:
+    quantities: Dict[ObjectId, int] = defaultdict(int)
+    for product_id, qty in items:
+        quantities[ObjectId(product_id)] += qty
+    return quantities
+
+
+async def _restore(quantities: Dict[ObjectId, int]):
+    if quantities:
+        await _products_collection().bulk_write(
+            [UpdateOne({"_id": pid}, {"$inc": {"countInStock": qty}}) for pid, qty in quantities.items()],
+            ordered=False
+        )
+
+
+async def sharded_products(product_ids: List[ObjectId]) -> Dict[ObjectId, int]:
+    """Shard counts of the sharded products among `product_ids`"""
+    cursor = _products_collection().find(
+        {"_id": {"$in": product_ids}, "stockShards": {"$gt": 0}},
+        projection={"stockShards": 1}
+    )
+    return {doc["_id"]: doc["stockShards"] async for doc in cursor}
+
+
+async def _reserve_documents(quantities: Dict[ObjectId, int]) -> List[ObjectId]:
+    """
+    Decrement countInStock on each product document, all or nothing
+
+    Each line is an update filtered on {_id, countInStock >= qty}, so it
+    matches nothing when stock is short or the product has been deleted.
+    The lines go out concurrently and each result says whether its line
+    was taken. Returns the failed product IDs after putting back whatever
+    was taken.
+    """
+    if not quantities:
+        return []
+
+    product_ids = list(quantities)
+    results = await asyncio.gather(*(
+        _products_collection().update_one(
+            {"_id": pid, "countInStock": {"$gte": quantities[pid]}},
+            {"$inc": {"countInStock": -quantities[pid]}}
+        )
+        for pid in product_ids
+    ))
+    failed = [pid for pid, result in zip(product_ids, results) if not result.matched_count]
+
+    if failed:
+        succeeded = {pid: quantities[pid] for pid in product_ids if pid not in failed}
+        await _restore(succeeded)
+        for pid in succeeded:
+            _contention[str(pid)].rolled_back += 1
+
+    return failed
+
+
+async def reserve_stock(items: Iterable[Tuple[ObjectId, int]], sharded: Optional[Dict[ObjectId, int]] = None):
+    """
+    Atomically take stock for every (product_id, qty) line, or none of it
+
+    `sharded` maps product IDs to their shard count (see utils.stock_shards);
+    it is looked up when the caller does not already know it. Raises
+    InsufficientStockError naming the products that were short.
+    """
+    quantities = _group_quantities(items)
+    if sharded is None:
+        sharded = await sharded_products(list(quantities))
+
+    for pid in quantities:
+        _contention[str(pid)].attempts += 1
+
+    documents = {pid: qty for pid, qty in quantities.items() if pid not in sharded}
+    failed = await _reserve_documents(documents)
+
+    if not failed:
+        taken = []
+        for pid in quantities:
+            if pid not in sharded:
+                continue
+            if await take_from_shards(pid, quantities[pid], sharded[pid]):
+                taken.append(pid)
+            else:
+                failed.append(pid)
+                break
+
+        if failed:
+            for pid in taken:
+                await give_to_shards(pid, quantities[pid], num_shards=sharded[pid])
+            await _restore(documents)
+            for pid in taken + list(documents):
+                _contention[str(pid)].rolled_back += 1
+
+    if failed:
+        for pid in failed:
+            _contention[str(pid)].out_of_stock += 1
+        raise InsufficientStockError([str(pid) for pid in failed])
+
+    for pid in quantities:
+        _contention[str(pid)].reserved += 1
+
+
+async def release_stock(items: Iterable[Tuple[ObjectId, int]], sharded: Optional[Dict[ObjectId, int]] = None):
+    """Give reserved stock back; `sharded` is as for reserve_stock"""
+    quantities = _group_quantities(items)
+    if sharded is None:
+        sharded = await sharded_products(list(quantities))
+    await _restore({pid: qty for pid, qty in quantities.items() if pid not in sharded})
+    for pid, qty in quantities.items():
+        if pid in sharded:
+            await give_to_shards(pid, qty, num_shards=sharded[pid])
+    for pid in quantities:
+        _contention[str(pid)].released += 1
+
+
+async def release_expired_reservations() -> int:
+    """Return stock held by unpaid orders older than INVENTORY_RESERVATION_TIMEOUT"""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.INVENTORY_RESERVATION_TIMEOUT)
+    orders = _orders_collection()
+    cursor = orders.find(
+        {"isPaid": False, "stockReserved": True, "createdAt": {"$lt": cutoff}},
+        projection={"_id": 1}
+    ).limit(settings.INVENTORY_RELEASE_BATCH_SIZE)
+
+    released = 0
+    async for doc in cursor:
+        # Claim the order so concurrent sweepers never release it twice
+        order = await orders.find_one_and_update(
+            {"_id": doc["_id"], "isPaid": False, "stockReserved": True},
+            {"$set": {"stockReserved": False, "updatedAt": datetime.utcnow()}},
+            projection={"orderItems.product": 1, "orderItems.qty": 1}
+        )
+        if order:
+            await release_stock((item["product"], item["qty"]) for item in order["orderItems"])
+            released += 1
+    return released
+
+
+async def _run_sweeper():
+    while True:
+        try:
+            await release_expired_reservations()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        await asyncio.sleep(settings.INVENTORY_SWEEP_INTERVAL)
+
+
+async def start_reservation_sweeper():
+    """Start the expired-reservation sweeper (called from the app lifespan)"""
+    global _sweeper
+    if _sweeper is None or _sweeper.done():
+        _sweeper = asyncio.create_task(_run_sweeper())
+
+
+async def stop_reservation_sweeper():
+    """Stop the expired-reservation sweeper"""
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        try:
+            await _sweeper
+        except asyncio.CancelledError:
+            pass
+        _sweeper = None
+
+
+def contention_metrics(limit: int = 50) -> List[dict]:
+    """Per-product reservation counters, most contended first"""
+    ranked = sorted(
+        _contention.items(),
+        key=lambda item: (item[1].out_of_stock + item[1].rolled_back, item[1].attempts),
+        reverse=True
+    )
+    return [{"product": pid, **stats.snapshot()} for pid, stats in ranked[:limit]]
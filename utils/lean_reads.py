@@ -0,0 +1,69 @@
+"""
+Read-only queries without Beanie state management
+
+Product, User and Order set use_state_management, so every document Beanie
+loads carries a saved-state copy of itself for change tracking - twice the
+memory on a big list load. GET handlers never save what they read, so they
+use these raw Motor reads instead and build their responses from the dicts.
+Handlers that modify a document keep loading it through Beanie.
+"""
+from bson import ObjectId
+from models.product import Product, Review
+from models.order import Order
+from typing import List, Optional
+
+# Fields no response shows
+PRODUCT_PROJECTION = {"stockShards": 0}
+ORDER_PROJECTION = {"stockReserved": 0}
+
+
+def _link_id(ref):
+    """The _id behind a stored Link (a DBRef, or a bare ObjectId)"""
+    return getattr(ref, "id", ref)
+
+
+async def resolve_reviews(docs: List[dict]) -> List[dict]:
+    """
+    Replace the review links of each product with the review documents
+
+    One $in query covers every product in the list; reviews keep the order
+    they are linked in, and links to deleted reviews are dropped, as
+    fetch_links does.
+    """
+    review_ids = [_link_id(ref) for doc in docs for ref in doc.get("reviews", [])]
+    reviews = {}
+    if review_ids:
+        cursor = Review.get_motor_collection().find({"_id": {"$in": review_ids}})
+        reviews = {review["_id"]: review async for review in cursor}
+    for doc in docs:
+        doc["reviews"] = [
+            reviews[_link_id(ref)] for ref in doc.get("reviews", []) if _link_id(ref) in reviews
+        ]
+    return docs
+
+
+async def find_products(
+    query: dict,
+    sort: Optional[list] = None,
+    skip: int = 0,
+    limit: int = 0,
+    projection: Optional[dict] = None
+) -> List[dict]:
+    """Raw product documents, with their reviews resolved unless the projection leaves reviews out"""
+    projection = projection or PRODUCT_PROJECTION
+    cursor = Product.get_motor_collection().find(query, projection=projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    docs = await cursor.skip(skip).limit(limit).to_list(None)
+    if projection is PRODUCT_PROJECTION or projection.get("reviews"):
+        await resolve_reviews(docs)
+    return docs
+
+
+async def get_product(product_id: ObjectId, projection: Optional[dict] = None) -> Optional[dict]:
+    docs = await find_products({"_id": product_id}, limit=1, projection=projection)
+    return docs[0] if docs else None
+
+
+async def find_orders(query: dict, projection: Optional[dict] = None) -> List[dict]:
+    return await Order.get_motor_collection().find(query, projection=projection or ORDER_PROJECTION).to_list(None)
@@ -0,0 +1,84 @@
+"""In-process latency metrics for outbound calls"""
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class LatencyStats:
+    """Running counters plus a window of recent samples for percentiles"""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float, ok: bool = True):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avgMs": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50Ms": round(self.percentile(50) * 1000, 2),
+            "p95Ms": round(self.percentile(95) * 1000, 2),
+            "maxMs": round(self.max * 1000, 2),
+        }
+
+
+_outbound: Dict[str, LatencyStats] = {}
+
+
+class TrackedCall:
+    """What the block inside track_latency reports about its call"""
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code is None or self.status_code < 400
+
+
+@contextmanager
+def track_latency(name: str):
+    """
+    Time the wrapped block and record it under `name`
+
+    The block counts as an error if it raises or if it sets the yielded
+    call's status_code to a 4xx or 5xx.
+    """
+    stats = _outbound.setdefault(name, LatencyStats())
+    call = TrackedCall()
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield call
+        ok = call.ok
+    finally:
+        stats.record(time.perf_counter() - start, ok)
+
+
+def outbound_metrics() -> dict:
+    """Snapshot of every tracked outbound call"""
+    return {name: stats.snapshot() for name, stats in _outbound.items()}
+
+
+def reset_metrics():
+    """Clear all recorded metrics"""
+    _outbound.clear()
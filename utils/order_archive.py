@@ -0,0 +1,118 @@
+"""
+Cold-storage tier for delivered orders
+
+Orders delivered more than ORDER_ARCHIVE_AFTER_DAYS ago are moved in
+batches from `orders` to `orders_archive`, keeping the hot collection and
+its indexes small. Reads that may hit old orders look in both tiers.
+"""
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
+from config.settings import settings
+from models.order import Order, ArchivedOrder
+from typing import List, Optional
+
+DUPLICATE_KEY = 11000
+
+_archive_task: Optional[asyncio.Task] = None
+
+
+async def archive_delivered_orders() -> int:
+    """
+    Move one batch of old delivered orders to the archive
+
+    Orders are copied before they are deleted, so an interrupted run leaves
+    duplicates (skipped on the next copy) rather than losing orders.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS)
+    orders = Order.get_motor_collection()
+    docs = await orders.find(
+        {"isDelivered": True, "deliveredAt": {"$lt": cutoff}}
+    ).limit(settings.ORDER_ARCHIVE_BATCH_SIZE).to_list(None)
+    if not docs:
+        return 0
+
+    try:
+        await ArchivedOrder.get_motor_collection().insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+            raise
+
+    result = await orders.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+    return result.deleted_count
+
+
+async def get_order_any_tier(order_id: PydanticObjectId, projection: Optional[dict] = None) -> Optional[dict]:
+    """Look a raw order document up in the hot collection, then in the archive"""
+    order = await Order.get_motor_collection().find_one({"_id": order_id}, projection=projection)
+    if order is None:
+        order = await ArchivedOrder.get_motor_collection().find_one({"_id": order_id}, projection=projection)
+    return order
+
+
+async def find_user_orders(
+    user_id: PydanticObjectId,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    projection: Optional[dict] = None
+) -> List[dict]:
+    """
+    A user's raw order documents from both tiers, oldest first
+
+    Both tiers are read in (createdAt, _id) order and merged, so a page is
+    the same whichever tier its orders currently live in. Each tier only
+    needs to return skip + limit orders.
+    """
+    def tier_query(model):
+        cursor = model.get_motor_collection().find({"user": user_id}, projection=projection)
+        cursor = cursor.sort([("createdAt", 1), ("_id", 1)])
+        if limit is not None:
+            cursor = cursor.limit(skip + limit)
+        return cursor.to_list(None)
+
+    hot, archived = await asyncio.gather(tier_query(Order), tier_query(ArchivedOrder))
+    merged = list(heapq.merge(hot, archived, key=lambda order: (order["createdAt"], order["_id"])))
+    end = None if limit is None else skip + limit
+    return merged[skip:end]
+
+
+async def find_all_orders(projection: Optional[dict] = None) -> List[dict]:
+    """Every raw order document, the hot tier's followed by the archive's"""
+    hot, archived = await asyncio.gather(*(
+        model.get_motor_collection().find({}, projection=projection).to_list(None)
+        for model in (Order, ArchivedOrder)
+    ))
+    return hot + archived
+
+
+async def _run_archiver():
+    while True:
+        try:
+            while await archive_delivered_orders() >= settings.ORDER_ARCHIVE_BATCH_SIZE:
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        await asyncio.sleep(settings.ORDER_ARCHIVE_INTERVAL)
+
+
+async def start_order_archiver():
+    """Start the archival loop (called from the app lifespan)"""
+    global _archive_task
+    if _archive_task is None or _archive_task.done():
+        _archive_task = asyncio.create_task(_run_archiver())
+
+
+async def stop_order_archiver():
+    """Stop the archival loop"""
+    global _archive_task
+    if _archive_task is not None:
+        _archive_task.cancel()
+        try:
+            await _archive_task
+        except asyncio.CancelledError:
+            pass
+        _archive_task = None
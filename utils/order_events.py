@@ -0,0 +1,94 @@
+"""In-process pub/sub bus for order status changes, streamed to clients over SSE"""
+import asyncio
+import json
+from datetime import datetime
+from fastapi import Request
+from config.settings import settings
+from typing import AsyncIterator, Optional, Set
+
+
+class OrderSubscription:
+    """
+    A subscriber's bounded inbox, optionally scoped to one order
+
+    A slow consumer never blocks publishers: when the inbox is full the
+    oldest event is dropped and the subscriber is told to resync once it
+    catches up.
+    """
+
+    def __init__(self, order_id: Optional[str] = None, maxsize: int = 100):
+        self.order_id = order_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, event: dict) -> bool:
+        return self.order_id is None or self.order_id == event["orderId"]
+
+    def offer(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+_subscribers: Set[OrderSubscription] = set()
+
+
+def subscribe(order_id: Optional[str] = None) -> OrderSubscription:
+    """Register a subscriber for one order, or every order when order_id is None"""
+    subscription = OrderSubscription(order_id, maxsize=settings.SSE_QUEUE_SIZE)
+    _subscribers.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription: OrderSubscription):
+    """Remove a subscriber"""
+    _subscribers.discard(subscription)
+
+
+def publish_order_event(order_id: str, user_id: str, event_type: str, data: dict):
+    """Fan an order event out to interested subscribers without blocking"""
+    event = {
+        "type": event_type,
+        "orderId": order_id,
+        "user": user_id,
+        "at": datetime.utcnow().isoformat(),
+        **data
+    }
+    for subscription in list(_subscribers):
+        if subscription.wants(event):
+            subscription.offer(event)
+
+
+def _sse_frame(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream_order_events(request: Request, order_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Subscribe to one order (or every order) and yield SSE frames until the
+    client disconnects
+
+    The subscription is made when the body starts streaming, so a client
+    that disconnects before then never leaves one behind. Sends a comment
+    heartbeat every SSE_HEARTBEAT_SECONDS so proxies keep the connection
+    open and dead clients are noticed.
+    """
+    subscription = subscribe(order_id)
+    try:
+        yield f"retry: {int(settings.SSE_HEARTBEAT_SECONDS * 1000)}\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+
+            if subscription.dropped:
+                dropped, subscription.dropped = subscription.dropped, 0
+                yield _sse_frame({"type": "resync", "orderId": subscription.order_id, "dropped": dropped})
+            yield _sse_frame(event)
+    finally:
+        unsubscribe(subscription)
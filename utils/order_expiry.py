@@ -0,0 +1,119 @@
+"""
+Expiry of abandoned unpaid orders
+
+Unpaid orders older than UNPAID_ORDER_TTL are removed from `orders` in
+batches, copied to `expired_orders` first when UNPAID_ORDER_ARCHIVE is on,
+and any stock they still hold is given back in one release per batch.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from pymongo.errors import BulkWriteError
+from config.settings import settings
+from models.order import Order
+from utils.inventory import release_stock
+from utils.order_events import publish_order_event
+from typing import List, Optional
+
+ARCHIVE_COLLECTION = "expired_orders"
+DUPLICATE_KEY = 11000
+
+_expiry_task: Optional[asyncio.Task] = None
+
+
+def _orders_collection():
+    return Order.get_motor_collection()
+
+
+def _archive_collection():
+    return _orders_collection().database[ARCHIVE_COLLECTION]
+
+
+async def _archive(docs: List[dict]):
+    """Copy orders to the archive; copies left by an interrupted sweep are kept"""
+    try:
+        await _archive_collection().insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+            raise
+
+
+async def expire_unpaid_orders() -> int:
+    """
+    Remove one batch of unpaid orders older than UNPAID_ORDER_TTL
+
+    Orders are archived before they are deleted so a crash never loses one.
+    Each delete re-checks isPaid, and an order paid after it was read is
+    dropped from the archive again instead of being expired.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.UNPAID_ORDER_TTL)
+    orders = _orders_collection()
+    docs = await orders.find(
+        {"isPaid": False, "createdAt": {"$lt": cutoff}}
+    ).sort("createdAt", 1).limit(settings.UNPAID_ORDER_BATCH_SIZE).to_list(None)
+    if not docs:
+        return 0
+
+    if settings.UNPAID_ORDER_ARCHIVE:
+        expired_at = datetime.utcnow()
+        await _archive([{**doc, "expiredAt": expired_at} for doc in docs])
+
+    expired = []
+    paid_meanwhile = []
+    for doc in docs:
+        # Claiming by delete means the reservation sweeper or a payment racing
+        # this one sees either the whole order or nothing
+        claimed = await orders.find_one_and_delete(
+            {"_id": doc["_id"], "isPaid": False},
+            projection={"user": 1, "orderItems.product": 1, "orderItems.qty": 1, "stockReserved": 1}
+        )
+        if claimed:
+            expired.append(claimed)
+        else:
+            paid_meanwhile.append(doc["_id"])
+
+    if paid_meanwhile and settings.UNPAID_ORDER_ARCHIVE:
+        await _archive_collection().delete_many({"_id": {"$in": paid_meanwhile}})
+
+    reserved = [
+        (item["product"], item["qty"])
+        for order in expired if order.get("stockReserved")
+        for item in order["orderItems"]
+    ]
+    if reserved:
+        await release_stock(reserved)
+
+    for order in expired:
+        publish_order_event(str(order["_id"]), str(order["user"]), "expired", {})
+    return len(expired)
+
+
+async def _run_expiry():
+    while True:
+        try:
+            # Drain the backlog a batch at a time, then wait for the next round
+            while await expire_unpaid_orders() >= settings.UNPAID_ORDER_BATCH_SIZE:
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        await asyncio.sleep(settings.UNPAID_ORDER_SWEEP_INTERVAL)
+
+
+async def start_order_expiry():
+    """Start the unpaid order expiry loop (called from the app lifespan)"""
+    global _expiry_task
+    if _expiry_task is None or _expiry_task.done():
+        _expiry_task = asyncio.create_task(_run_expiry())
+
+
+async def stop_order_expiry():
+    """Stop the unpaid order expiry loop"""
+    global _expiry_task
+    if _expiry_task is not None:
+        _expiry_task.cancel()
+        try:
+            await _expiry_task
+        except asyncio.CancelledError:
+            pass
+        _expiry_task = None
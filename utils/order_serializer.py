@@ -30,7 +30,8 @@ def serialize_payment_result(payment):
         "id": payment.id,
         "status": payment.status,
         "update_time": payment.update_time,
-        "email_address": payment.email_address
+        "email_address": payment.email_address,
+        "verification_status": payment.verification_status
     }
 
 
@@ -54,3 +55,61 @@ def serialize_order(order):
         "createdAt": order.created_at,
         "updatedAt": order.updated_at
     }
+
+
+def _serialize_order_item_doc(item):
+    return {
+        "name": item["name"],
+        "qty": item["qty"],
+        "image": item["image"],
+        "price": item["price"],
+        "product": str(item["product"])
+    }
+
+
+def _serialize_shipping_address_doc(address):
+    return {
+        "address": address["address"],
+        "city": address["city"],
+        "postalCode": address["postalCode"],
+        "country": address["country"]
+    }
+
+
+def _serialize_payment_result_doc(payment):
+    if not payment:
+        return None
+    return {
+        "id": payment.get("id"),
+        "status": payment.get("status"),
+        "update_time": payment.get("update_time"),
+        "email_address": payment.get("email_address"),
+        "verification_status": payment.get("verification_status")
+    }
+
+
+# OrderResponse field -> how to read it from a raw orders document; also
+# the fields a ?fields= list may name
+ORDER_FIELDS = {
+    "_id": lambda doc: str(doc["_id"]),
+    "user": lambda doc: str(doc["user"]),
+    "orderItems": lambda doc: [_serialize_order_item_doc(item) for item in doc.get("orderItems", [])],
+    "shippingAddress": lambda doc: _serialize_shipping_address_doc(doc["shippingAddress"]),
+    "paymentMethod": lambda doc: doc["paymentMethod"],
+    "paymentResult": lambda doc: _serialize_payment_result_doc(doc.get("paymentResult")),
+    "itemsPrice": lambda doc: doc.get("itemsPrice", 0.0),
+    "taxPrice": lambda doc: doc.get("taxPrice", 0.0),
+    "shippingPrice": lambda doc: doc.get("shippingPrice", 0.0),
+    "totalPrice": lambda doc: doc.get("totalPrice", 0.0),
+    "isPaid": lambda doc: doc.get("isPaid", False),
+    "paidAt": lambda doc: doc.get("paidAt"),
+    "isDelivered": lambda doc: doc.get("isDelivered", False),
+    "deliveredAt": lambda doc: doc.get("deliveredAt"),
+    "createdAt": lambda doc: doc["createdAt"],
+    "updatedAt": lambda doc: doc["updatedAt"],
+}
+
+
+def serialize_order_doc(doc, fields=None):
+    """Convert a raw orders document to the OrderResponse dict (or just `fields` of it), without loading an Order"""
+    return {field: ORDER_FIELDS[field](doc) for field in (fields or ORDER_FIELDS)}
@@ -0,0 +1,227 @@
+"""
+Incremental Parquet export of order history
+
+Each run writes the orders changed since the last run's watermark (their
+updatedAt) to month-partitioned Parquet datasets:
+
+    <PARQUET_EXPORT_DIR>/orders/month=YYYY-MM/part-<run>.parquet
+    <PARQUET_EXPORT_DIR>/order_items/month=YYYY-MM/part-<run>.parquet
+
+Partitions are by the month an order was created. An order changed after it
+was exported appears again in a later part; readers keep the row with the
+latest updated_at per order_id. The first run (no watermark) also exports
+the archive tier.
+
+pyarrow is optional: without it `available()` is False.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from config.settings import settings
+from models.order import Order, ArchivedOrder
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+WATERMARK_FILE = "_watermark.json"
+
+_export_lock = asyncio.Lock()
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _schemas():
+    orders = pa.schema([
+        ("order_id", pa.string()),
+        ("user", pa.string()),
+        ("payment_method", pa.string()),
+        ("payment_id", pa.string()),
+        ("verification_status", pa.string()),
+        ("items_price", pa.float64()),
+        ("tax_price", pa.float64()),
+        ("shipping_price", pa.float64()),
+        ("total_price", pa.float64()),
+        ("item_count", pa.int32()),
+        ("units", pa.int32()),
+        ("is_paid", pa.bool_()),
+        ("paid_at", pa.timestamp("ms")),
+        ("is_delivered", pa.bool_()),
+        ("delivered_at", pa.timestamp("ms")),
+        ("city", pa.string()),
+        ("country", pa.string()),
+        ("created_at", pa.timestamp("ms")),
+        ("updated_at", pa.timestamp("ms")),
+    ])
+    items = pa.schema([
+        ("order_id", pa.string()),
+        ("line", pa.int32()),
+        ("product", pa.string()),
+        ("name", pa.string()),
+        ("qty", pa.int32()),
+        ("price", pa.float64()),
+        ("line_total", pa.float64()),
+        ("created_at", pa.timestamp("ms")),
+        ("updated_at", pa.timestamp("ms")),
+    ])
+    return orders, items
+
+
+def order_rows(doc: dict) -> Tuple[dict, List[dict]]:
+    """One orders row and its exploded order_items rows from a raw document"""
+    order_id = str(doc["_id"])
+    items = doc.get("orderItems", [])
+    payment = doc.get("paymentResult") or {}
+    address = doc.get("shippingAddress") or {}
+    order = {
+        "order_id": order_id,
+        "user": str(doc["user"]),
+        "payment_method": doc.get("paymentMethod"),
+        "payment_id": payment.get("id"),
+        "verification_status": payment.get("verification_status"),
+        "items_price": doc.get("itemsPrice"),
+        "tax_price": doc.get("taxPrice"),
+        "shipping_price": doc.get("shippingPrice"),
+        "total_price": doc.get("totalPrice"),
+        "item_count": len(items),
+        "units": sum(item["qty"] for item in items),
+        "is_paid": doc.get("isPaid", False),
+        "paid_at": doc.get("paidAt"),
+        "is_delivered": doc.get("isDelivered", False),
+        "delivered_at": doc.get("deliveredAt"),
+        "city": address.get("city"),
+        "country": address.get("country"),
+        "created_at": doc.get("createdAt"),
+        "updated_at": doc.get("updatedAt"),
+    }
+    lines = [
+        {
+            "order_id": order_id,
+            "line": line,
+            "product": str(item["product"]),
+            "name": item.get("name"),
+            "qty": item["qty"],
+            "price": item["price"],
+            "line_total": item["qty"] * item["price"],
+            "created_at": order["created_at"],
+            "updated_at": order["updated_at"],
+        }
+        for line, item in enumerate(items)
+    ]
+    return order, lines
+
+
+class PartitionedWriter:
+    """One open ParquetWriter per month partition of a dataset"""
+
+    def __init__(self, root: Path, schema, run_id: str):
+        self.root = root
+        self.schema = schema
+        self.run_id = run_id
+        self.writers: Dict[str, "pq.ParquetWriter"] = {}
+        self.paths: List[Path] = []
+        self.rows = 0
+
+    def write(self, rows_by_month: Dict[str, List[dict]]):
+        for month, rows in rows_by_month.items():
+            if not rows:
+                continue
+            writer = self.writers.get(month)
+            if writer is None:
+                directory = self.root / f"month={month}"
+                directory.mkdir(parents=True, exist_ok=True)
+                path = directory / f"part-{self.run_id}.parquet"
+                self.paths.append(path)
+                writer = self.writers[month] = pq.ParquetWriter(path, self.schema, compression="zstd")
+            writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+            self.rows += len(rows)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+
+    def discard(self):
+        """Remove this run's files after a failed run"""
+        self.close()
+        for path in self.paths:
+            path.unlink(missing_ok=True)
+
+
+def read_watermark(root: Path) -> Optional[datetime]:
+    path = root / WATERMARK_FILE
+    if not path.exists():
+        return None
+    return datetime.fromisoformat(json.loads(path.read_text())["updatedAt"])
+
+
+def write_watermark(root: Path, watermark: datetime, run_id: str, orders: int):
+    path = root / WATERMARK_FILE
+    staging = path.with_suffix(".tmp")
+    staging.write_text(json.dumps({"updatedAt": watermark.isoformat(), "run": run_id, "orders": orders}))
+    staging.replace(path)
+
+
+async def export_orders_parquet(root: Optional[Path] = None) -> dict:
+    """
+    Export orders changed since the last watermark; returns run statistics
+
+    Only orders updated before now - PARQUET_EXPORT_LAG are taken, so writes
+    still in flight when the run starts are picked up next time rather than
+    skipped. The watermark only moves once every file has been closed; a
+    failed run removes its files.
+    """
+    root = Path(root or settings.PARQUET_EXPORT_DIR)
+    async with _export_lock:
+        root.mkdir(parents=True, exist_ok=True)
+        since = read_watermark(root)
+        until = datetime.utcnow() - timedelta(seconds=settings.PARQUET_EXPORT_LAG)
+        run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+
+        order_schema, item_schema = _schemas()
+        orders = PartitionedWriter(root / "orders", order_schema, run_id)
+        items = PartitionedWriter(root / "order_items", item_schema, run_id)
+
+        query = {"updatedAt": {"$lte": until}}
+        if since is not None:
+            query["updatedAt"]["$gt"] = since
+        models = (Order,) if since is not None else (Order, ArchivedOrder)
+
+        try:
+            for model in models:
+                cursor = model.get_motor_collection().find(query, batch_size=settings.PARQUET_EXPORT_BATCH_SIZE)
+                batch = await cursor.to_list(settings.PARQUET_EXPORT_BATCH_SIZE)
+                while batch:
+                    order_batch: Dict[str, List[dict]] = {}
+                    item_batch: Dict[str, List[dict]] = {}
+                    for doc in batch:
+                        order, lines = order_rows(doc)
+                        month = order["created_at"].strftime("%Y-%m")
+                        order_batch.setdefault(month, []).append(order)
+                        item_batch.setdefault(month, []).extend(lines)
+                    await asyncio.to_thread(orders.write, order_batch)
+                    await asyncio.to_thread(items.write, item_batch)
+                    batch = await cursor.to_list(settings.PARQUET_EXPORT_BATCH_SIZE)
+        except BaseException:
+            orders.discard()
+            items.discard()
+            raise
+        orders.close()
+        items.close()
+
+        write_watermark(root, until, run_id, orders.rows)
+        return {
+            "run": run_id,
+            "since": since,
+            "until": until,
+            "orders": orders.rows,
+            "orderItems": items.rows,
+            "files": [str(path.relative_to(root)) for path in orders.paths + items.paths],
+        }
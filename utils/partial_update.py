@@ -0,0 +1,39 @@
+"""
+Partial document updates
+
+Writes only the fields a request supplied (plus updatedAt) with a single
+find_one_and_update and returns the projected result, instead of loading
+the whole document and save()-ing it back.
+"""
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument
+from typing import Optional, Type
+
+
+async def update_fields(
+    model: Type,
+    doc_id: ObjectId,
+    fields: dict,
+    projection: Optional[dict] = None,
+    computed: Optional[dict] = None
+) -> Optional[dict]:
+    """
+    $set `fields` on one document and return it as it is afterwards
+
+    `computed` holds aggregation expressions that depend on the document's
+    current values; with it the update runs as a pipeline, so plain values
+    are wrapped in $literal to keep strings like "$5 off" from being read
+    as field paths. Returns None when no document has that _id.
+    """
+    values = {**fields, "updatedAt": datetime.utcnow()}
+    if computed:
+        update = [{"$set": {**{key: {"$literal": value} for key, value in values.items()}, **computed}}]
+    else:
+        update = {"$set": values}
+    return await model.get_motor_collection().find_one_and_update(
+        {"_id": doc_id},
+        update,
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
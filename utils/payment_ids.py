@@ -0,0 +1,86 @@
+"""
+Startup check for the unique paymentResult.id indexes
+
+Before duplicate captures were looked up by paymentResult.id, nothing
+stopped two orders from sharing a PayPal capture, so older databases can
+hold such pairs and building the unique index over them would stop the app
+from starting. prepare_payment_id_indexes runs before init_beanie: a
+collection with duplicates has them logged and gets a plain index in place
+of the unique one, and check_if_new_transaction then always looks its
+orders up. Once the duplicates are resolved (see README) the next start
+builds the unique index.
+"""
+import logging
+from pymongo import IndexModel, ASCENDING
+from typing import Iterable, List
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_INDEX = "paymentResult_id_unique"
+FALLBACK_INDEX = "paymentResult_id"
+PAID_ONLY = {"paymentResult.id": {"$type": "string"}}
+
+# Collections running on the fallback index
+_not_unique = set()
+
+
+def payment_ids_unique(model) -> bool:
+    """Whether the collection behind `model` rejects a second order with the same capture"""
+    return model.Settings.name not in _not_unique
+
+
+async def duplicate_payment_ids(collection, limit: int = 100) -> List[dict]:
+    """Capture ids shared by more than one order, each with the _ids of its orders"""
+    cursor = collection.aggregate([
+        {"$match": PAID_ONLY},
+        {"$group": {"_id": "$paymentResult.id", "orders": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ])
+    return await cursor.to_list(None)
+
+
+async def prepare_payment_id_indexes(database, models: Iterable) -> bool:
+    """
+    Swap the unique paymentResult.id index for a plain one where duplicates exist
+
+    Collections that already have the unique index are left alone. Returns
+    whether every collection can have it.
+    """
+    for model in models:
+        name = model.Settings.name
+        collection = database[name]
+        existing = await collection.index_information()
+        if UNIQUE_INDEX in existing:
+            _not_unique.discard(name)
+            continue
+
+        duplicates = await duplicate_payment_ids(collection)
+        if not duplicates:
+            _not_unique.discard(name)
+            if FALLBACK_INDEX in existing:
+                # Its keys clash with the unique index about to be built
+                await collection.drop_index(FALLBACK_INDEX)
+            continue
+
+        _not_unique.add(name)
+        for duplicate in duplicates:
+            logger.error(
+                "%s: capture %s is recorded on orders %s",
+                name, duplicate["_id"], ", ".join(str(order_id) for order_id in duplicate["orders"])
+            )
+        logger.error(
+            "%s: not building %s until the orders above are resolved; using %s instead",
+            name, UNIQUE_INDEX, FALLBACK_INDEX
+        )
+        model.Settings.indexes = [
+            IndexModel(
+                [("paymentResult.id", ASCENDING)],
+                name=FALLBACK_INDEX,
+                partialFilterExpression=PAID_ONLY
+            )
+            if index.document["name"] == UNIQUE_INDEX else index
+            for index in model.Settings.indexes
+        ]
+
+    return not _not_unique
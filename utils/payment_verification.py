@@ -0,0 +1,173 @@
+"""
+Background PayPal payment verification
+
+The pay endpoint records the capture as pending and enqueues it. A pool of
+asyncio workers checks each capture against PayPal with retries and
+exponential backoff, and a reconciliation loop re-enqueues captures that
+have stayed pending too long (e.g. lost from the in-memory queue on restart).
+"""
+import asyncio
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from config.settings import settings
+from models.order import Order
+from utils.paypal import verify_paypal_payment, paypal_breaker
+from utils.order_events import publish_order_event
+from typing import List, Optional
+
+VERIFIED = "verified"
+PENDING = "pending"
+MISMATCH = "mismatch"
+FAILED = "failed"
+
+_queue: Optional[asyncio.Queue] = None
+_tasks: List[asyncio.Task] = []
+# Order IDs currently queued, retrying or being checked
+_in_flight = set()
+
+
+def _get_queue() -> asyncio.Queue:
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue(maxsize=settings.PAYMENT_VERIFY_QUEUE_SIZE)
+    return _queue
+
+
+async def check_payment(payment_id: str, total_price: float) -> str:
+    """Ask PayPal about a transaction and compare the captured amount"""
+    payment_info = await verify_paypal_payment(payment_id)
+
+    if not payment_info["verified"]:
+        return MISMATCH
+
+    if abs(float(payment_info["value"]) - total_price) >= 0.01:
+        return MISMATCH
+
+    return VERIFIED
+
+
+def enqueue_verification(order_id: str, payment_id: str, total_price: float, attempt: int = 1) -> bool:
+    """
+    Queue a capture for verification
+
+    Returns False if the order is already being verified or the queue is
+    full; reconciliation picks up anything left pending.
+    """
+    if attempt == 1 and order_id in _in_flight:
+        return False
+    try:
+        _get_queue().put_nowait((order_id, payment_id, total_price, attempt))
+    except asyncio.QueueFull:
+        _in_flight.discard(order_id)
+        return False
+    _in_flight.add(order_id)
+    return True
+
+
+async def _set_verification_status(order_id: str, verification_status: str):
+    order = await Order.get_motor_collection().find_one_and_update(
+        {"_id": ObjectId(order_id), "paymentResult.verification_status": PENDING},
+        {"$set": {
+            "paymentResult.verification_status": verification_status,
+            "updatedAt": datetime.utcnow()
+        }},
+        projection={"user": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if order:
+        publish_order_event(order_id, str(order["user"]), "payment_verification", {
+            "verificationStatus": verification_status
+        })
+
+
+def _retry_later(order_id: str, payment_id: str, total_price: float, attempt: int):
+    delay = min(settings.PAYMENT_VERIFY_MAX_BACKOFF, 2 ** attempt)
+    # Wait out an open circuit instead of spending attempts on it
+    delay = max(delay, paypal_breaker.retry_after())
+    asyncio.get_running_loop().call_later(
+        delay, enqueue_verification, order_id, payment_id, total_price, attempt + 1
+    )
+
+
+async def _run_worker():
+    queue = _get_queue()
+    while True:
+        order_id, payment_id, total_price, attempt = await queue.get()
+        try:
+            try:
+                verification_status = await check_payment(payment_id, total_price)
+            except Exception:
+                if attempt < settings.PAYMENT_VERIFY_MAX_ATTEMPTS:
+                    _retry_later(order_id, payment_id, total_price, attempt)
+                    continue
+                verification_status = FAILED
+
+            _in_flight.discard(order_id)
+            await _set_verification_status(order_id, verification_status)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            _in_flight.discard(order_id)
+        finally:
+            queue.task_done()
+
+
+async def reconcile_pending_captures() -> int:
+    """
+    Re-enqueue captures left pending longer than PAYMENT_RECONCILE_STALE_SECONDS
+
+    Staleness is judged by paymentResult.verification_queued_at, which
+    unrelated writes to the order (delivery, admin edits) leave alone.
+    Captures recorded before that field existed have none and count as stale.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.PAYMENT_RECONCILE_STALE_SECONDS)
+    cursor = Order.get_motor_collection().find(
+        {
+            "paymentResult.verification_status": PENDING,
+            "$or": [
+                {"paymentResult.verification_queued_at": {"$lt": cutoff}},
+                {"paymentResult.verification_queued_at": None},
+            ],
+        },
+        projection={"paymentResult.id": 1, "totalPrice": 1}
+    ).limit(settings.PAYMENT_RECONCILE_BATCH_SIZE)
+
+    queued = 0
+    async for doc in cursor:
+        if enqueue_verification(str(doc["_id"]), doc["paymentResult"]["id"], doc["totalPrice"]):
+            queued += 1
+    return queued
+
+
+async def _run_reconciler():
+    while True:
+        try:
+            await reconcile_pending_captures()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        await asyncio.sleep(settings.PAYMENT_RECONCILE_INTERVAL)
+
+
+async def start_verification_workers():
+    """Start the worker pool and reconciliation loop (called from the app lifespan)"""
+    if _tasks:
+        return
+    for _ in range(settings.PAYMENT_VERIFY_WORKERS):
+        _tasks.append(asyncio.create_task(_run_worker()))
+    _tasks.append(asyncio.create_task(_run_reconciler()))
+
+
+async def stop_verification_workers():
+    """Cancel the worker pool and reconciliation loop"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+def verification_queue_depth() -> int:
+    """Number of captures waiting for a verification worker"""
+    return _get_queue().qsize()
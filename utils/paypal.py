@@ -1,11 +1,64 @@
 import httpx
+import asyncio
 import base64
+import time
 from config.settings import settings
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional
+from utils.bloom_filter import BloomFilter
+from utils.http_client import get_http_client
+from utils.metrics import track_latency
+from utils.payment_ids import payment_ids_unique
+from utils.circuit_breaker import CircuitBreaker, Bulkhead
 
+# Transaction IDs recently stored by this process
+_seen_transactions = BloomFilter(capacity=100_000)
 
-async def get_paypal_access_token() -> str:
-    """Get PayPal access token"""
+# Cached OAuth token; times are time.monotonic() values
+_token_cache = {"access_token": None, "expires_at": 0.0, "refresh_at": 0.0}
+_token_lock = asyncio.Lock()
+_refresh_task = None
+
+# Guards around every outbound PayPal call
+paypal_breaker = CircuitBreaker(
+    "paypal",
+    window=settings.PAYPAL_BREAKER_WINDOW,
+    failure_rate=settings.PAYPAL_BREAKER_FAILURE_RATE,
+    min_calls=settings.PAYPAL_BREAKER_MIN_CALLS,
+    open_seconds=settings.PAYPAL_BREAKER_OPEN_SECONDS
+)
+paypal_bulkhead = Bulkhead(
+    "paypal",
+    max_concurrent=settings.PAYPAL_MAX_CONCURRENCY,
+    max_wait=settings.PAYPAL_BULKHEAD_WAIT
+)
+
+async def _send_paypal_request(metric: str, method: str, path: str, **kwargs) -> httpx.Response:
+    client = get_http_client()
+    with track_latency(metric) as call:
+        response = await asyncio.wait_for(
+            client.request(method, f"{settings.PAYPAL_API_URL}{path}", **kwargs),
+            timeout=settings.PAYPAL_CALL_DEADLINE
+        )
+        call.status_code = response.status_code
+    if response.status_code >= 500:
+        raise Exception(f"PayPal returned {response.status_code}")
+    return response
+
+
+async def _paypal_request(metric: str, method: str, path: str, **kwargs) -> httpx.Response:
+    """
+    Send a request to PayPal on the shared client
+
+    Runs inside the PayPal bulkhead and circuit breaker and is bounded by the
+    call deadline. 5xx responses count as failures for the breaker.
+    """
+    return await paypal_bulkhead.call(
+        paypal_breaker.call, _send_paypal_request, metric, method, path, **kwargs
+    )
+
+
+async def _request_paypal_access_token() -> Tuple[str, int]:
+    """Request a new OAuth access token from PayPal"""
     # Check if credentials are placeholder values
     if settings.PAYPAL_CLIENT_ID == "your_paypal_client_id" or settings.PAYPAL_APP_SECRET == "your_paypal_secret":
         raise Exception("PayPal credentials not configured")
@@ -14,8 +67,6 @@ async def get_paypal_access_token() -> str:
         f"{settings.PAYPAL_CLIENT_ID}:{settings.PAYPAL_APP_SECRET}".encode()
     ).decode()
     
-    url = f"{settings.PAYPAL_API_URL}/v1/oauth2/token"
-    
     headers = {
         "Accept": "application/json",
         "Accept-Language": "en_US",
@@ -24,48 +75,152 @@ async def get_paypal_access_token() -> str:
     
     data = {"grant_type": "client_credentials"}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, data=data)
+    response = await _paypal_request(
+        "paypal.oauth_token", "POST", "/v1/oauth2/token", headers=headers, data=data
+    )
+    
+    if response.status_code != 200:
+        raise Exception("Failed to get access token")
+    
+    paypal_data = response.json()
+    return paypal_data["access_token"], int(paypal_data.get("expires_in", 0))
+
+
+async def _refresh_paypal_access_token() -> str:
+    """Refresh the cached token; concurrent callers share one request"""
+    async with _token_lock:
+        now = time.monotonic()
+        if _token_cache["access_token"] and now < _token_cache["refresh_at"]:
+            return _token_cache["access_token"]
         
-        if response.status_code != 200:
-            raise Exception("Failed to get access token")
+        access_token, expires_in = await _request_paypal_access_token()
         
-        paypal_data = response.json()
-        return paypal_data["access_token"]
+        now = time.monotonic()
+        margin = min(settings.PAYPAL_TOKEN_REFRESH_MARGIN, expires_in // 2)
+        _token_cache["access_token"] = access_token
+        _token_cache["expires_at"] = now + expires_in
+        _token_cache["refresh_at"] = now + expires_in - margin
+        return access_token
 
 
-async def check_if_new_transaction(order_model, paypal_transaction_id: str) -> bool:
-    """Check if the PayPal transaction ID has been used before"""
+async def _refresh_in_background():
     try:
-        orders = await order_model.find(
-            {"payment_result.id": paypal_transaction_id}
-        ).to_list()
-        
-        return len(orders) == 0
+        await _refresh_paypal_access_token()
     except Exception:
-        return False
+        # The current token is still valid; the next caller retries
+        pass
 
 
-async def verify_paypal_payment(paypal_transaction_id: str) -> Dict:
-    """Verify PayPal payment"""
-    access_token = await get_paypal_access_token()
+def _schedule_token_refresh():
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_in_background())
+
+
+def clear_paypal_token_cache(rejected: Optional[str] = None):
+    """
+    Drop the cached access token
+
+    With `rejected`, only if that is still the cached token, so callers that
+    all had it refused trigger one refresh rather than one each.
+    """
+    if rejected is None or _token_cache["access_token"] == rejected:
+        _token_cache.update(access_token=None, expires_at=0.0, refresh_at=0.0)
+
+
+async def get_paypal_access_token() -> str:
+    """
+    Get PayPal access token
     
-    url = f"{settings.PAYPAL_API_URL}/v2/checkout/orders/{paypal_transaction_id}"
+    Tokens are cached until PayPal's expires_in. Inside the refresh margin the
+    cached token is still returned while a background task fetches a new one.
+    """
+    now = time.monotonic()
+    access_token = _token_cache["access_token"]
     
+    if access_token and now < _token_cache["expires_at"]:
+        if now >= _token_cache["refresh_at"]:
+            _schedule_token_refresh()
+        return access_token
+    
+    return await _refresh_paypal_access_token()
+
+
+def remember_transaction(paypal_transaction_id: str):
+    """Record a transaction ID that has just been stored on an order"""
+    _seen_transactions.add(paypal_transaction_id)
+
+
+async def check_if_new_transaction(order_models, paypal_transaction_id: str) -> bool:
+    """
+    Check if the PayPal transaction ID has been used before
+
+    `order_models` is the live order model followed by its archive tiers.
+    IDs this process has never seen skip the live collection; its unique
+    index on paymentResult.id still rejects a duplicate when the order is
+    saved. That index cannot see archived orders, so the archive tiers are
+    always checked, as is the live collection while it runs without the
+    index (see utils.payment_ids). Each lookup is indexed and _id-only.
+    """
+    live, *archives = order_models
+    if paypal_transaction_id in _seen_transactions or not payment_ids_unique(live):
+        models = order_models
+    else:
+        models = archives
+
+    try:
+        found = await asyncio.gather(*(
+            model.get_motor_collection().find_one(
+                {"paymentResult.id": paypal_transaction_id},
+                projection={"_id": 1}
+            )
+            for model in models
+        ))
+
+        return all(existing is None for existing in found)
+    except Exception:
+        return False
+
+
+async def _get_paypal_order(paypal_transaction_id: str, access_token: str) -> httpx.Response:
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {access_token}",
     }
+    return await _paypal_request(
+        "paypal.verify_order", "GET", f"/v2/checkout/orders/{paypal_transaction_id}", headers=headers
+    )
+
+
+async def verify_paypal_payment(paypal_transaction_id: str) -> Dict:
+    """
+    Verify PayPal payment
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            raise Exception("Failed to verify payment")
-        
-        paypal_data = response.json()
-        
-        return {
-            "verified": paypal_data["status"] == "COMPLETED",
-            "value": paypal_data["purchase_units"][0]["amount"]["value"]
-        }
+    A 401 means PayPal revoked the cached token before it expired; it is
+    dropped and the call retried once with a fresh one.
+    """
+    access_token = await get_paypal_access_token()
+    response = await _get_paypal_order(paypal_transaction_id, access_token)
+    
+    if response.status_code == 401:
+        clear_paypal_token_cache(rejected=access_token)
+        access_token = await _refresh_paypal_access_token()
+        response = await _get_paypal_order(paypal_transaction_id, access_token)
+    
+    if response.status_code != 200:
+        raise Exception("Failed to verify payment")
+    
+    paypal_data = response.json()
+    
+    return {
+        "verified": paypal_data["status"] == "COMPLETED",
+        "value": paypal_data["purchase_units"][0]["amount"]["value"]
+    }
+
+
+def paypal_health() -> dict:
+    """Circuit breaker and bulkhead state for PayPal"""
+    return {
+        "breaker": paypal_breaker.snapshot(),
+        "bulkhead": paypal_bulkhead.snapshot()
+    }
@@ -0,0 +1,82 @@
+"""
+In-memory price table for cart quotes
+
+Holds the current price of every product, keyed by product ID string, so
+quotes are priced without a database round trip. The table is loaded on
+first use; product writes in this process mark their products stale through
+product_changes and those prices are re-read before the next quote, and the
+whole table is reloaded every PRICE_TABLE_REFRESH_INTERVAL seconds to pick
+up writes made by other processes.
+"""
+import asyncio
+import time
+from bson import ObjectId
+from config.settings import settings
+from models.product import Product
+from utils.product_changes import on_products_changed
+from typing import Dict, Iterable, List, Optional, Set
+
+_prices: Dict[str, float] = {}
+_loaded_at: Optional[float] = None
+_stale: Set[str] = set()
+_stale_all = False
+_refresh_lock = asyncio.Lock()
+
+
+def _mark_stale(product_ids: Optional[List[str]]):
+    global _stale_all
+    if product_ids is None:
+        _stale_all = True
+    else:
+        _stale.update(product_ids)
+
+
+on_products_changed(_mark_stale)
+
+
+async def _load_all():
+    global _prices, _loaded_at, _stale_all
+    # A write during the load is caught by the marks made while it ran
+    _stale.clear()
+    _stale_all = False
+    started = time.monotonic()
+    cursor = Product.get_motor_collection().find({}, projection={"price": 1})
+    _prices = {str(doc["_id"]): doc["price"] async for doc in cursor}
+    _loaded_at = started
+
+
+async def _reload(product_ids: List[str]):
+    _stale.difference_update(product_ids)
+    found = {
+        str(doc["_id"]): doc["price"]
+        async for doc in Product.get_motor_collection().find(
+            {"_id": {"$in": [ObjectId(product_id) for product_id in product_ids]}},
+            projection={"price": 1}
+        )
+    }
+    for product_id in product_ids:
+        if product_id in found:
+            _prices[product_id] = found[product_id]
+        else:
+            # Deleted
+            _prices.pop(product_id, None)
+
+
+def _needs_full_load() -> bool:
+    return (
+        _loaded_at is None
+        or _stale_all
+        or time.monotonic() - _loaded_at > settings.PRICE_TABLE_REFRESH_INTERVAL
+    )
+
+
+async def get_prices(product_ids: Iterable[str]) -> Dict[str, float]:
+    """Current prices for these product IDs; unknown IDs are left out"""
+    if _needs_full_load() or _stale:
+        async with _refresh_lock:
+            if _needs_full_load():
+                await _load_all()
+            elif _stale:
+                await _reload(list(_stale))
+    return {product_id: _prices[product_id] for product_id in product_ids if product_id in _prices}
+
@@ -0,0 +1,71 @@
+"""
+Cache of product summaries for cart revalidation
+
+Holds the name, image, price and stock of recently requested products for
+PRODUCT_CACHE_TTL seconds. Product writes drop their entries through
+product_changes; checkout stock changes do not, so cached stock can lag by
+up to the TTL (orders still check stock when they are placed).
+"""
+from bson import ObjectId
+from bson.errors import InvalidId
+from config.settings import settings
+from models.product import Product
+from utils.ttl_cache import TTLCache
+from utils.product_changes import on_products_changed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SUMMARY_PROJECTION = {"name": 1, "image": 1, "price": 1, "countInStock": 1}
+
+_summaries = TTLCache(maxsize=settings.PRODUCT_CACHE_SIZE, ttl=settings.PRODUCT_CACHE_TTL)
+
+
+def _forget(product_ids: Optional[List[str]]):
+    if product_ids is None:
+        _summaries.clear()
+    else:
+        for product_id in product_ids:
+            _summaries.delete(product_id)
+
+
+on_products_changed(_forget)
+
+
+async def get_product_summaries(product_ids: Iterable[str]) -> Tuple[List[dict], List[str]]:
+    """
+    Summaries in request order, from the cache or one $in query for the rest
+
+    Returns (summaries, missing); missing holds the requested IDs that are
+    malformed or match no product. Repeated IDs are answered once.
+    """
+    requested: Dict[str, str] = {}
+    found: Dict[str, dict] = {}
+    misses: List[ObjectId] = []
+    missing: List[str] = []
+    for product_id in dict.fromkeys(product_ids):
+        try:
+            object_id = ObjectId(product_id)
+        except (InvalidId, TypeError):
+            missing.append(product_id)
+            continue
+        key = requested[product_id] = str(object_id)
+        cached = _summaries.get(key)
+        if cached is None:
+            misses.append(object_id)
+        else:
+            found[key] = cached
+
+    if misses:
+        cursor = Product.get_motor_collection().find({"_id": {"$in": misses}}, projection=SUMMARY_PROJECTION)
+        async for doc in cursor:
+            key = str(doc.pop("_id"))
+            found[key] = {"_id": key, "countInStock": 0, **doc}
+            _summaries.set(key, found[key])
+
+    summaries = []
+    for product_id, key in requested.items():
+        summary = found.get(key)
+        if summary is None:
+            missing.append(product_id)
+        else:
+            summaries.append(summary)
+    return summaries, missing
@@ -0,0 +1,25 @@
+"""
+Product change notifications
+
+Anything that caches product data registers a listener here, and every
+write path that changes products calls products_changed so those caches
+drop what is stale.
+"""
+from typing import Callable, Iterable, List, Optional
+
+Listener = Callable[[Optional[List[str]]], None]
+
+_listeners: List[Listener] = []
+
+
+def on_products_changed(listener: Listener):
+    """Register a listener; it receives changed product IDs, or None for "possibly all"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def products_changed(product_ids: Optional[Iterable] = None):
+    """Tell every listener that these products (or, with None, any product) changed"""
+    ids = None if product_ids is None else [str(product_id) for product_id in product_ids]
+    for listener in list(_listeners):
+        listener(ids)
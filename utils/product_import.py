@@ -0,0 +1,184 @@
+"""
+Bulk product import from NDJSON or CSV
+
+The file is read a batch of rows at a time, each batch is validated
+against ProductImportRow and written with one unordered bulk_write of
+upserts keyed by SKU. Bad rows are reported by line number and skipped;
+they never abort the import.
+"""
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+from beanie import PydanticObjectId
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config.settings import settings
+from models.product import Product
+from schemas.product import ProductImportRow
+from utils.stock_shards import configure_stock_shards
+from utils.product_changes import products_changed
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union
+
+FORMATS = ("csv", "ndjson")
+
+Row = Tuple[int, Union[dict, Exception]]
+
+
+class ImportReport:
+    """Running totals and the first PRODUCT_IMPORT_MAX_ERRORS row errors"""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, line: int, message: str, sku: str = None):
+        self.failed += 1
+        if len(self.errors) < settings.PRODUCT_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "sku": sku, "error": message})
+
+    def snapshot(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errorsTruncated": self.failed > len(self.errors),
+        }
+
+
+def detect_format(filename: str) -> str:
+    """csv for .csv files, ndjson otherwise"""
+    return "csv" if (filename or "").lower().endswith(".csv") else "ndjson"
+
+
+def read_rows(binary: BinaryIO, file_format: str) -> Iterator[Row]:
+    """Yield (line number, parsed row or parse error) without loading the whole file"""
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty cells are left out, like missing NDJSON keys: new products
+            # get the schema defaults and existing ones keep their values
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("expected a JSON object")
+            yield line_number, row
+        except ValueError as e:
+            yield line_number, e
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+async def _import_batch(rows: List[Row], user_id: PydanticObjectId, report: ImportReport):
+    valid: Dict[str, Tuple[int, ProductImportRow]] = {}
+    for line, raw in rows:
+        report.rows += 1
+        if isinstance(raw, Exception):
+            report.error(line, f"Unreadable row: {raw}")
+            continue
+        try:
+            product = ProductImportRow.model_validate(raw)
+        except ValidationError as e:
+            report.error(line, validation_message(e), raw.get("sku"))
+            continue
+        if product.sku in valid:
+            # Later rows win, as they would if the file were imported row by row
+            report.duplicates += 1
+        valid[product.sku] = (line, product)
+
+    if not valid:
+        return
+
+    products = Product.get_motor_collection()
+    skus = list(valid)
+    sharded = {
+        doc["sku"]: doc
+        async for doc in products.find(
+            {"sku": {"$in": skus}, "stockShards": {"$gt": 0}},
+            projection={"sku": 1, "stockShards": 1}
+        )
+    }
+
+    now = datetime.utcnow()
+    operations = []
+    for sku in skus:
+        row = valid[sku][1]
+        # Only the columns the row has overwrite an existing product; the
+        # schema defaults fill in the rest on new products alone
+        fields = row.model_dump(by_alias=True, exclude_unset=True)
+        defaults = {key: value for key, value in row.model_dump(by_alias=True).items() if key not in fields}
+        if sku in sharded:
+            # Sharded stock lives in stock_shards and is redistributed below
+            fields.pop("countInStock", None)
+        operations.append(UpdateOne(
+            {"sku": sku},
+            {
+                "$set": {**fields, "updatedAt": now},
+                "$setOnInsert": {
+                    **defaults,
+                    "user": user_id, "reviews": [], "rating": 0, "numReviews": 0, "stockShards": 0, "createdAt": now
+                }
+            },
+            upsert=True
+        ))
+
+    failed = set()
+    try:
+        result = await products.bulk_write(operations, ordered=False)
+        upserted, matched, modified = result.upserted_count, result.matched_count, result.modified_count
+    except BulkWriteError as e:
+        details = e.details
+        for error in details.get("writeErrors", []):
+            sku = skus[error["index"]]
+            failed.add(sku)
+            report.error(valid[sku][0], error.get("errmsg", "write failed"), sku)
+        upserted, matched, modified = details.get("nUpserted", 0), details.get("nMatched", 0), details.get("nModified", 0)
+
+    report.inserted += upserted
+    report.updated += modified
+    report.unchanged += matched - modified
+
+    for sku, doc in sharded.items():
+        if sku not in failed and "count_in_stock" in valid[sku][1].model_fields_set:
+            await configure_stock_shards(doc["_id"], doc["stockShards"], total=valid[sku][1].count_in_stock)
+
+
+async def import_products(binary: BinaryIO, file_format: str, user_id: PydanticObjectId) -> dict:
+    """
+    Import every row of an NDJSON or CSV file; returns the ImportReport snapshot
+
+    Rows are parsed in a worker thread, PRODUCT_IMPORT_BATCH_SIZE at a time,
+    so a large upload neither blocks the event loop nor sits in memory.
+    """
+    report = ImportReport()
+    rows = read_rows(binary, file_format)
+    while True:
+        batch = await asyncio.to_thread(lambda: list(islice(rows, settings.PRODUCT_IMPORT_BATCH_SIZE)))
+        if not batch:
+            break
+        await _import_batch(batch, user_id, report)
+    products_changed()
+    return report.snapshot()
@@ -0,0 +1,47 @@
+"""
+Sparse fieldsets (?fields=name,price,...)
+
+Clients list the response fields they want, comma separated. Only those
+fields are read from Mongo (the projection goes into the query) and only
+those are serialized. `_id` is always included.
+"""
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Any, Iterable, List, Optional
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    The requested field names in request order, or None for the full response
+
+    Unknown field names are a 400 listing the allowed ones.
+    """
+    if not fields:
+        return None
+    allowed = list(allowed)
+    requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    if "_id" not in requested:
+        requested.insert(0, "_id")
+    return requested
+
+
+def field_projection(fields: Iterable[str], *extra: str) -> dict:
+    """Mongo projection for these fields plus any the handler needs itself"""
+    return {name: 1 for name in (*fields, *extra)}
+
+
+def sparse_response(content: Any) -> JSONResponse:
+    """
+    Return sparse results as-is
+
+    They cannot pass the endpoint's response_model (required fields are
+    missing by design), so they skip it.
+    """
+    return JSONResponse(jsonable_encoder(content))
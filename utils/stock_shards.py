@@ -0,0 +1,204 @@
+"""
+Sharded stock counters for hot products
+
+A sharded product keeps its real stock in N documents in `stock_shards`
+instead of in its own countInStock, so concurrent checkouts spread their
+writes across N documents rather than queueing on one. Product.count_in_stock
+becomes a mirror refreshed by a periodic fold-back job.
+"""
+import asyncio
+import random
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from config.settings import settings
+from models.product import Product
+from models.stock_shard import StockShard
+from typing import List, Optional, Tuple
+
+_fold_task: Optional[asyncio.Task] = None
+
+
+def _shards():
+    return StockShard.get_motor_collection()
+
+
+def _products():
+    return Product.get_motor_collection()
+
+
+async def take_from_shards(product_id: ObjectId, qty: int, num_shards: int) -> bool:
+    """
+    Decrement `qty` across a product's shards; False if stock is short
+
+    A random shard that can cover the whole quantity is tried first, which
+    is the common case. Otherwise stock is gathered from the fullest shards
+    and put back if the total still falls short.
+    """
+    shard = random.randrange(num_shards)
+    result = await _shards().update_one(
+        {"product": product_id, "shard": shard, "stock": {"$gte": qty}},
+        {"$inc": {"stock": -qty}}
+    )
+    if result.modified_count:
+        return True
+
+    taken = await _take_from_fullest(product_id, qty)
+    if sum(take for _, take in taken) == qty:
+        return True
+
+    for shard, take in taken:
+        await give_to_shards(product_id, take, shard=shard)
+    return False
+
+
+async def _take_from_fullest(product_id: ObjectId, qty: int) -> List[Tuple[int, int]]:
+    """Take up to `qty` from the fullest shards first; returns (shard, amount) for each one taken from"""
+    taken: List[Tuple[int, int]] = []
+    remaining = qty
+    cursor = _shards().find({"product": product_id, "stock": {"$gt": 0}}).sort("stock", -1)
+    async for doc in cursor:
+        take = min(remaining, doc["stock"])
+        result = await _shards().update_one(
+            {"_id": doc["_id"], "stock": {"$gte": take}},
+            {"$inc": {"stock": -take}}
+        )
+        if result.modified_count:
+            taken.append((doc["shard"], take))
+            remaining -= take
+            if remaining == 0:
+                break
+    return taken
+
+
+async def remove_from_shards(product_id: ObjectId, qty: int) -> int:
+    """
+    Remove up to `qty` from a product's shards, stopping at zero
+
+    The sharded counterpart of an admin decrement clamped with $max; returns
+    how much was removed.
+    """
+    return sum(take for _, take in await _take_from_fullest(product_id, qty))
+
+
+async def give_to_shards(product_id: ObjectId, qty: int, shard: Optional[int] = None, num_shards: int = 1):
+    """Add stock back to one shard (random if not given)"""
+    if shard is None:
+        shard = random.randrange(max(1, num_shards))
+    await _shards().update_one(
+        {"product": product_id, "shard": shard},
+        {"$inc": {"stock": qty}},
+        upsert=True
+    )
+
+
+async def _drain_shards(product_id: ObjectId) -> int:
+    """Delete a product's shards one by one, returning the stock they held"""
+    total = 0
+    while True:
+        doc = await _shards().find_one_and_delete({"product": product_id})
+        if doc is None:
+            return total
+        total += doc["stock"]
+
+
+async def configure_stock_shards(product_id: ObjectId, num_shards: int, total: Optional[int] = None) -> int:
+    """
+    Switch a product to `num_shards` shards, or back to a single counter when 0
+
+    Stock is moved, never copied: countInStock is zeroed before the old
+    shards are drained, so racing checkouts fail safe rather than oversell.
+    `total` overrides the stock level (an admin setting countInStock).
+    Returns the product's stock afterwards.
+    """
+    before = await _products().find_one_and_update(
+        {"_id": product_id},
+        {"$set": {"countInStock": 0, "stockShards": num_shards}},
+        projection={"countInStock": 1, "stockShards": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return 0
+
+    if before.get("stockShards", 0) > 0:
+        stock = await _drain_shards(product_id)
+    else:
+        stock = before.get("countInStock", 0)
+    if total is not None:
+        stock = total
+
+    if num_shards > 0:
+        # $inc upserts rather than inserts: a give_to_shards racing this
+        # switch may already have created a shard, and its stock is kept
+        base, extra = divmod(stock, num_shards)
+        await _shards().bulk_write(
+            [
+                UpdateOne(
+                    {"product": product_id, "shard": i},
+                    {"$inc": {"stock": base + (1 if i < extra else 0)}},
+                    upsert=True
+                )
+                for i in range(num_shards)
+            ],
+            ordered=False
+        )
+        await _products().update_one({"_id": product_id}, {"$set": {"countInStock": stock}})
+    else:
+        await _products().update_one({"_id": product_id}, {"$inc": {"countInStock": stock}})
+        # Stock given back to a shard while this ran belongs to the product now
+        late = await _drain_shards(product_id)
+        if late:
+            await _products().update_one({"_id": product_id}, {"$inc": {"countInStock": late}})
+            stock += late
+    return stock
+
+
+async def delete_stock_shards(product_id: ObjectId):
+    """Remove a product's shards (when the product itself is deleted)"""
+    await _shards().delete_many({"product": product_id})
+
+
+async def fold_back_shards() -> int:
+    """Refresh countInStock on every sharded product from the sum of its shards"""
+    totals = await _shards().aggregate([
+        {"$group": {"_id": "$product", "total": {"$sum": "$stock"}}}
+    ]).to_list(None)
+    if not totals:
+        return 0
+    await _products().bulk_write(
+        [
+            UpdateOne({"_id": doc["_id"], "stockShards": {"$gt": 0}}, {"$set": {"countInStock": doc["total"]}})
+            for doc in totals
+        ],
+        ordered=False
+    )
+    return len(totals)
+
+
+async def _run_fold_back():
+    while True:
+        try:
+            await fold_back_shards()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        await asyncio.sleep(settings.STOCK_SHARD_FOLD_INTERVAL)
+
+
+async def start_shard_fold_back():
+    """Start the fold-back loop (called from the app lifespan)"""
+    global _fold_task
+    if _fold_task is None or _fold_task.done():
+        _fold_task = asyncio.create_task(_run_fold_back())
+
+
+async def stop_shard_fold_back():
+    """Stop the fold-back loop"""
+    global _fold_task
+    if _fold_task is not None:
+        _fold_task.cancel()
+        try:
+            await _fold_task
+        except asyncio.CancelledError:
+            pass
+        _fold_task = None